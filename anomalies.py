@@ -0,0 +1,171 @@
+# anomalies.py
+# Erkennung auffälliger Stunden (Feste, Neujahr, Ausfälle) für alle Zählstellen zugleich.
+# Erwartungswert je Stunde der Woche (168 Slots) und Reihe, laufend nachgeführt:
+# - Mittel/Varianz je Slot mit Welford-Update, ab WINDOW Wochen exponentiell gewichtet
+#   (gleitendes Fenster ohne gespeicherte Historie, O(1) pro Wert)
+# - z-Wert = (Wert − Slot-Mittel) / Slot-Streuung; auffällig ab |z| ≥ THRESHOLD
+# - Auffällige Werte fliessen nur begrenzt (auf ± THRESHOLD·Streuung) in den Zustand ein
+# Innerhalb einer Woche kommt jeder Slot höchstens einmal vor → ein Block von bis zu
+# 168 Stunden wird für alle Reihen in einem Schritt verarbeitet. Neue Stunden (inkrementelles
+# Nachladen) werden an den bestehenden Zustand angehängt, ohne die Historie neu zu rechnen.
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_layer
+from forecasting import PERIOD, week_slots
+from memo import memo_by_identity
+from rollups import COUNT_COLS
+
+THRESHOLD = 4.0
+WINDOW = 8          # Wochen; danach exponentielles Vergessen mit Gewicht 1/WINDOW
+WARMUP = 4          # Wochen je Slot, bevor Werte markiert werden
+MIN_STD = 1.0       # Untergrenze der Streuung (ruhige Nachtstunden mit fast konstanten Zählwerten)
+CITY = "Stadt"
+
+
+class AnomalyDetector:
+    def __init__(self, period=PERIOD, window=WINDOW, threshold=THRESHOLD, warmup=WARMUP):
+        self.period = period
+        self.window = window
+        self.threshold = threshold
+        self.warmup = warmup
+        self.columns = pd.MultiIndex.from_tuples([], names=["Merkmal", "Zählstelle"])
+        self.mean = np.zeros((period, 0))
+        self.var = np.zeros((period, 0))
+        self.count = np.zeros((period, 0))
+        self.start = None
+        self.end = None
+        self.points = 0
+        self._flags = []
+
+    def _extend(self, columns):
+        # Neue Reihen (z.B. neue Zählstellen) bekommen einen leeren Zustand
+        new = columns.difference(self.columns, sort=False)
+        if len(new):
+            pad = np.zeros((self.period, len(new)))
+            self.mean = np.hstack([self.mean, pad])
+            self.var = np.hstack([self.var, pad])
+            self.count = np.hstack([self.count, pad])
+            self.columns = self.columns.append(new)
+        return self.columns.get_indexer(columns)
+
+    def _step(self, values, slots, cols):
+        # values: (h, k) mit paarweise verschiedenen Slots → z-Werte und Erwartung (h, k)
+        mean = self.mean[slots[:, None], cols]
+        var = self.var[slots[:, None], cols]
+        count = self.count[slots[:, None], cols]
+        std = np.maximum(np.sqrt(var), MIN_STD)
+        valid = ~np.isnan(values)
+
+        z = np.where(valid, (values - mean) / std, np.nan)
+        z[count < self.warmup] = np.nan
+
+        # Begrenzter Wert fürs Update, damit Ausreisser den Erwartungswert nicht verschieben
+        limited = np.where(count >= self.warmup, np.clip(values, mean - self.threshold * std,
+                                                         mean + self.threshold * std), values)
+        count_new = count + valid
+        weight = np.where(valid, 1.0 / np.minimum(np.maximum(count_new, 1), self.window), 0.0)
+        delta = np.where(valid, limited - mean, 0.0)
+        mean_new = mean + weight * delta
+        # Welford (Gewicht 1/n) bzw. exponentiell gewichtete Varianz (Gewicht 1/WINDOW)
+        var_new = np.where(valid, (1 - weight) * (var + weight * delta ** 2), var)
+
+        self.mean[slots[:, None], cols] = mean_new
+        self.var[slots[:, None], cols] = var_new
+        self.count[slots[:, None], cols] = count_new
+        return z, mean
+
+    def update(self, Y):
+        # Y: lückenloses Stundenraster (Zeilen) × Reihen (Spalten (Merkmal, Zählstelle)).
+        # Verarbeitet nur Stunden nach self.end und gibt deren auffällige Stunden zurück.
+        if self.end is not None:
+            Y = Y.loc[Y.index > self.end]
+        if Y.empty:
+            return _empty_flags()
+        if self.start is None:
+            self.start = Y.index[0]
+
+        cols = self._extend(Y.columns)
+        values = Y.to_numpy(dtype=np.float64)
+        slots = week_slots(Y.index)
+        found = []
+        # Blöcke mit streng steigendem Slot (bis zur nächsten Wochengrenze) → kein Slot doppelt
+        breaks = np.flatnonzero(np.diff(slots) <= 0) + 1
+        for part in np.split(np.arange(len(Y)), breaks):
+            z, expected = self._step(values[part], slots[part], cols)
+            rows, hits = np.nonzero(np.abs(np.nan_to_num(z)) >= self.threshold)
+            if len(rows):
+                found.append(pd.DataFrame({
+                    "DATUM": Y.index[part[rows]],
+                    "Merkmal": Y.columns.get_level_values(0)[hits],
+                    "Zählstelle": Y.columns.get_level_values(1)[hits],
+                    "Wert": values[part[rows], hits],
+                    "Erwartet": expected[rows, hits],
+                    "z": z[rows, hits],
+                }))
+        self.points += int(np.sum(~np.isnan(values)))
+        self.end = Y.index[-1]
+        new = pd.concat(found, ignore_index=True) if found else _empty_flags()
+        self._flags.append(new)
+        return new
+
+    def flagged(self):
+        flags = [f for f in self._flags if not f.empty]
+        if not flags:
+            return _empty_flags()
+        return pd.concat(flags, ignore_index=True).sort_values(["DATUM", "Merkmal", "Zählstelle"], ignore_index=True)
+
+
+def _empty_flags():
+    return pd.DataFrame({
+        "DATUM": pd.Series(dtype="datetime64[ns]"), "Merkmal": pd.Series(dtype=object),
+        "Zählstelle": pd.Series(dtype=object), "Wert": pd.Series(dtype="float64"),
+        "Erwartet": pd.Series(dtype="float64"), "z": pd.Series(dtype="float64"),
+    })
+
+
+def hourly_matrix(rollups):
+    # Stadtweite Reihen und alle Zählstellen als Spalten (Merkmal, Zählstelle)
+    city = rollups.city["H"]["last"][COUNT_COLS].astype("float64")
+    city.columns = pd.MultiIndex.from_product([COUNT_COLS, [CITY]], names=["Merkmal", "Zählstelle"])
+    parts = [city]
+    if rollups.station_hourly is not None:
+        stations = rollups.station_hourly[COUNT_COLS].astype("float64")
+        stations.columns = stations.columns.set_names(["Merkmal", "Zählstelle"])
+        parts.append(stations)
+    return pd.concat(parts, axis=1)
+
+
+def flagged_hours(flags, target, stations=None):
+    # Stunden, in denen die Zielgrösse stadtweit (bzw. an einer der Zählstellen) auffällig war
+    rows = flags[flags["Merkmal"] == target]
+    rows = rows[rows["Zählstelle"].isin(list(stations))] if stations else rows[rows["Zählstelle"] == CITY]
+    return pd.DatetimeIndex(rows["DATUM"].unique(), name="DATUM")
+
+
+_lock = threading.Lock()
+_state = {"lineage": None, "detector": None}
+
+
+def _is_append(previous, current):
+    # Nur wenn data_layer bestätigt, dass seit dem letzten Aufbau ausschliesslich Zeilen
+    # angehängt wurden (gleicher Voll-Load, mehr Anhänge); ausserhalb der App nie
+    return (previous is not None and current[0] is not None
+            and current[0] == previous[0] and current[1] >= previous[1])
+
+
+@memo_by_identity
+def get_anomalies(rollups):
+    # Ein Detektor pro Prozess. Nach inkrementellem Nachladen werden nur die neuen Stunden
+    # fortgeschrieben; nach jedem Voll-Load (auch mit korrigierter Historie) neu aufgebaut.
+    current = data_layer.lineage()
+    with _lock:
+        detector = _state["detector"]
+        if detector is None or not _is_append(_state["lineage"], current):
+            detector = AnomalyDetector()
+        detector.update(hourly_matrix(rollups))
+        _state["lineage"] = current
+        _state["detector"] = detector
+        return detector
@@ -1,12 +1,20 @@
 # app.py
+import time
+
 import streamlit as st
-from load_data import load_all_data
+from data_layer import get_data
+from profiling import span, sidebar_panel
 
 # Seitenmodule importieren
 from seiten import start, deskriptiv, mlr, pca, zeitreihe, clustering
 
-# Daten laden
-mobility_df, wetter_df, standorte_df, df, mobility_agg = load_all_data()
+# Messpunkte: Laden und Seiten als Spans, die Seiten messen ihre Diagramme selbst (profiled_chart);
+# Debug-Panel mit STADA_DEBUG=1 oder ?debug=1
+run_started = time.time()
+
+# Daten laden (prozessweit gecacht, neu geladen nur bei geänderten Quelldateien)
+with span("get_data", "load"):
+    mobility_df, wetter_df, standorte_df, df, mobility_agg = get_data()
 
 # Sidebar
 st.sidebar.title("Navigation")
@@ -20,15 +28,18 @@ page = st.sidebar.radio("Seite auswählen", [
 ])
 
 # Seiten-Dispatch
-if page == "Start":
-    start.show(mobility_df, wetter_df)
-elif page == "Deskriptive Statistik":
-    deskriptiv.show(mobility_df, wetter_df, df)
-elif page == "Multiple Lineare Regression (MLR)":
-    mlr.show(df)
-elif page == "PCA":
-    pca.show(df)
-elif page == "Zeitreihenanalyse":
-    zeitreihe.show(mobility_df, df)
-elif page == "Clustering (K-Means)":
-    clustering.show(df)
+with span(page, "page"):
+    if page == "Start":
+        start.show(mobility_df, wetter_df)
+    elif page == "Deskriptive Statistik":
+        deskriptiv.show(mobility_df, wetter_df, df)
+    elif page == "Multiple Lineare Regression (MLR)":
+        mlr.show(df, mobility_df, standorte_df)
+    elif page == "PCA":
+        pca.show(df)
+    elif page == "Zeitreihenanalyse":
+        zeitreihe.show(mobility_df, df)
+    elif page == "Clustering (K-Means)":
+        clustering.show(df)
+
+sidebar_panel(st, run_started)
@@ -0,0 +1,168 @@
+# benchmarks/generate.py
+# Synthetische Quelldaten im Format der echten Zürcher CSVs (Mobility, Wetter, Standorte).
+# Skala 1 entspricht dem heutigen Umfang: 83 Zählstellen, ein Jahr in 15-Minuten-Werten
+# (≈ 2.9 Mio. Mobility-Zeilen). Grössere Skalen verlängern zuerst den Zeitraum (bis
+# MAX_YEARS Jahre) und vervielfachen danach die Zählstellen; Skalen < 1 kürzen den Zeitraum.
+# Die Mobility-Dateien werden stationsweise angehängt, es liegt nie der ganze Datensatz im Speicher.
+#
+#   python -m benchmarks.generate --scale 10 --out /tmp/stada_bench_10
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_STATIONS = 83
+MAX_YEARS = 10
+START = "2014-01-01"
+FREQ = "15min"
+MOBILITY_FILES = ["zurich_mobility_1.csv", "zurich_mobility_2.csv", "zurich_mobility_3.csv"]
+
+MOBILITY_COLUMNS = ["FK_ZAEHLER", "FK_STANDORT", "DATUM", "VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT", "OST", "NORD"]
+WETTER_COLUMNS = [
+    "dt", "dt_iso", "timezone", "city_name", "lat", "lon", "temp", "visibility", "dew_point", "feels_like",
+    "temp_min", "temp_max", "pressure", "sea_level", "grnd_level", "humidity", "wind_speed", "wind_deg",
+    "wind_gust", "rain_1h", "rain_3h", "snow_1h", "snow_3h", "clouds_all", "weather_id", "weather_main",
+    "weather_description", "weather_icon",
+]
+STANDORTE_COLUMNS = ["abkuerzung", "bezeichnung", "bis", "fk_zaehler", "id1", "richtung_in", "richtung_out",
+                     "von", "objectid", "korrekturfaktor", "geometry"]
+
+# Tagesprofil (Stunde → Faktor): Pendlerspitzen morgens und abends
+HOUR_PROFILE = np.array([0.1, 0.05, 0.03, 0.03, 0.05, 0.2, 0.6, 1.4, 1.8, 1.0, 0.8, 0.9,
+                         1.1, 1.0, 0.9, 1.0, 1.3, 1.8, 1.5, 1.0, 0.7, 0.5, 0.3, 0.2])
+WEEKDAY_FACTOR = np.array([1.0, 1.05, 1.05, 1.05, 1.0, 0.7, 0.5])
+
+
+def dimensions(scale):
+    # Skala → (Tage, Anzahl Zählstellen)
+    days = max(1, round(365 * min(scale, MAX_YEARS)))
+    stations = max(1, round(BASE_STATIONS * max(scale / MAX_YEARS, 1)))
+    return days, stations
+
+
+def _weather(hours, rng):
+    n = len(hours)
+    day_of_year = hours.dayofyear.to_numpy()
+    hour = hours.hour.to_numpy()
+    temp = (10 - 9 * np.cos(2 * np.pi * (day_of_year - 15) / 365) - 4 * np.cos(2 * np.pi * (hour - 3) / 24)
+            + rng.normal(0, 2.5, n))
+    humidity = np.clip(75 - 1.2 * (temp - 10) + rng.normal(0, 8, n), 20, 100).round()
+    wind = np.abs(rng.normal(2.5, 1.5, n)).round(2)
+    clouds = np.clip(rng.normal(55, 35, n), 0, 100).round()
+    rain = np.where(rng.random(n) < 0.1, rng.exponential(1.0, n).round(2), np.nan)
+    unix = hours.asi8 // 10 ** 9
+    weather = pd.DataFrame({
+        "dt": unix,
+        "dt_iso": hours.strftime("%Y-%m-%d %H:%M:%S +0000 UTC"),
+        "timezone": 3600,
+        "city_name": "Zürich",
+        "lat": 47.376887,
+        "lon": 8.541694,
+        "temp": temp.round(2),
+        "visibility": np.clip(rng.normal(9000, 2500, n), 100, 10000).round(),
+        "dew_point": (temp - (100 - humidity) / 5).round(2),
+        "feels_like": (temp - 0.7 * wind).round(2),
+        "temp_min": (temp - np.abs(rng.normal(1, 0.5, n))).round(2),
+        "temp_max": (temp + np.abs(rng.normal(1, 0.5, n))).round(2),
+        "pressure": rng.normal(1017, 8, n).round().astype(int),
+        "sea_level": np.nan,
+        "grnd_level": np.nan,
+        "humidity": humidity.astype(int),
+        "wind_speed": wind,
+        "wind_deg": rng.integers(0, 360, n),
+        "wind_gust": np.where(wind > 4, (wind * 1.6).round(2), np.nan),
+        "rain_1h": rain,
+        "rain_3h": np.nan,
+        "snow_1h": np.where((temp < 0) & (rng.random(n) < 0.1), 0.3, np.nan),
+        "snow_3h": np.nan,
+        "clouds_all": clouds.astype(int),
+        "weather_id": np.where(np.isnan(rain), 800, 500),
+        "weather_main": np.where(np.isnan(rain), "Clouds", "Rain"),
+        "weather_description": np.where(np.isnan(rain), "scattered clouds", "light rain"),
+        "weather_icon": np.where(np.isnan(rain), "03d", "10d"),
+    })
+    return weather[WETTER_COLUMNS]
+
+
+def _stations(count, start, rng):
+    numbers = np.arange(1, count + 1)
+    von = (pd.Timestamp(start) - pd.Timedelta(days=365)).strftime("%Y%m%d%H%M%S")
+    return pd.DataFrame({
+        "abkuerzung": [f"BNCH_{i:04d}" for i in numbers],
+        "bezeichnung": [f"Benchmark-Zählstelle {i}" for i in numbers],
+        "bis": "",                                   # leer = noch in Betrieb
+        "fk_zaehler": [f"BENCH{i:06d}" for i in numbers],
+        "id1": numbers,
+        "richtung_in": "Zentrum",
+        "richtung_out": "Aussen",
+        "von": von,
+        "objectid": numbers,
+        "korrekturfaktor": rng.uniform(0.9, 1.4, count).round(10),
+        "geometry": [f"POINT ({2676000 + x:.1f} {1241000 + y:.1f})"
+                     for x, y in zip(rng.uniform(0, 13000, count), rng.uniform(0, 13000, count))],
+    })[STANDORTE_COLUMNS]
+
+
+def generate(directory, scale=1, seed=0, verbose=True):
+    # Schreibt zurich_mobility_{1,2,3}.csv, zurich_wetter.csv und zurich_standorte.csv nach directory.
+    # Gibt die Kennzahlen des erzeugten Datensatzes zurück.
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    days, station_count = dimensions(scale)
+    os.makedirs(directory, exist_ok=True)
+
+    times = pd.date_range(START, periods=days * 96, freq=FREQ)
+    hours = pd.date_range(START, periods=days * 24, freq="h")
+    weather = _weather(hours, rng)
+    weather.to_csv(os.path.join(directory, "zurich_wetter.csv"), index=False)
+
+    stations = _stations(station_count, START, rng)
+    stations.to_csv(os.path.join(directory, "zurich_standorte.csv"), index=False, quoting=1, encoding="utf-8-sig")
+
+    # Erwartete Zählung je 15 Minuten ohne Stationsniveau: Tagesprofil × Wochentag × Temperatur
+    temp_hourly = weather["temp"].to_numpy()
+    shape = (HOUR_PROFILE[times.hour] * WEEKDAY_FACTOR[times.dayofweek]
+             * np.clip(1 + 0.03 * (np.repeat(temp_hourly, 4) - 10), 0.3, None))
+    datum = times.strftime("%Y-%m-%dT%H:%M")
+
+    rows = 0
+    paths = [os.path.join(directory, name) for name in MOBILITY_FILES]
+    for path in paths:
+        pd.DataFrame(columns=MOBILITY_COLUMNS).to_csv(path, index=False)
+    for i, station in enumerate(stations.itertuples()):
+        level = rng.lognormal(1.5, 0.6)
+        velo = i % 2 == 0
+        counts = [rng.poisson(level * shape).astype(float) for _ in range(2)]
+        missing = np.full(len(times), np.nan)
+        x, y = station.geometry[7:-1].split()
+        part = pd.DataFrame({
+            "FK_ZAEHLER": station.fk_zaehler,
+            "FK_STANDORT": station.id1,
+            "DATUM": datum,
+            "VELO_IN": counts[0] if velo else missing,
+            "VELO_OUT": counts[1] if velo else missing,
+            "FUSS_IN": missing if velo else counts[0],
+            "FUSS_OUT": missing if velo else counts[1],
+            "OST": int(float(x)),
+            "NORD": int(float(y)),
+        })
+        part.to_csv(paths[i % len(paths)], mode="a", header=False, index=False)
+        rows += len(part)
+
+    info = {"scale": scale, "days": days, "stations": station_count, "mobility_rows": rows,
+            "wetter_rows": len(weather), "seconds": round(time.perf_counter() - started, 2)}
+    if verbose:
+        print(f"ℹ️ Synthetische Daten (Skala {scale}): {station_count} Zählstellen, {days} Tage, "
+              f"{rows:,} Mobility-Zeilen in {info['seconds']} s → {directory}")
+    return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetische Zürcher Mobility-/Wetter-/Standortdaten erzeugen")
+    parser.add_argument("--scale", type=float, default=1.0, help="1 = heutiger Umfang, 10, 100, ...")
+    parser.add_argument("--out", required=True, help="Zielverzeichnis")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.out, args.scale, args.seed)
@@ -0,0 +1,225 @@
+# benchmarks/run.py
+# Benchmark der Ladekette und der Seitenberechnungen auf synthetischen Daten (benchmarks/generate.py).
+# Je Schritt werden Laufzeit (Wand- und CPU-Zeit) und Spitzenspeicher gemessen und als eine
+# JSON-Zeile an die Ergebnisdatei angehängt; jeder Lauf bekommt eine run_id, damit Läufe
+# (z.B. vor und nach einer Änderung) mit --compare verglichen werden können.
+# Spitzenspeicher über tracemalloc (Python- und NumPy-/pandas-Allokationen; Arrow-Puffer
+# nicht enthalten); das Tracing verlangsamt Python-lastige Schritte etwas (--no-memory schaltet es ab).
+#
+#   python -m benchmarks.run --scales 1 10
+#   python -m benchmarks.run --compare              # die letzten beiden Läufe
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate import generate
+from load_data import load_all_data, merge_mobility_wetter, COUNT_COLS
+from ingest_cache import clear_cache
+from rollups import build_rollups
+from feature_store import build_feature_store, FEATURES, CALENDAR_FEATURES, MOBILITY_FEATURES
+from correlation import correlation
+from pca_engine import fit_pca
+from clustering_engine import METHODS as CLUSTER_METHODS, run as run_clustering
+from mlr_engine import build_sufficient_stats, CANDIDATES, TARGETS
+from cross_validation import cross_validate
+
+OUTPUT = os.path.join(ROOT, "bench_results.jsonl")
+DEFAULT_SCALES = [1]
+
+
+def _steps():
+    # (Name, Funktion(ctx) → Ergebnis, Schlüssel im ctx oder None); Reihenfolge = Abhängigkeiten
+    def ingest_cold(ctx):
+        clear_cache()
+        return load_all_data()
+
+    def ingest_cached(ctx):
+        return load_all_data()
+
+    def groupby_hourly(ctx):
+        mobility_df = ctx["data"][0]
+        return mobility_df.groupby("DATUM")[COUNT_COLS].sum().astype("float64").reset_index()
+
+    def merge(ctx):
+        return merge_mobility_wetter(ctx["agg"], ctx["data"][1])
+
+    def features(ctx):
+        return build_feature_store(ctx["df"])
+
+    def matrix(ctx):
+        return ctx["store"].matrix([f for f in FEATURES if f not in CALENDAR_FEATURES])
+
+    steps = [
+        ("ingest_csv_cold", ingest_cold, "data"),
+        ("ingest_cached", ingest_cached, None),
+        ("groupby_hourly", groupby_hourly, "agg"),
+        ("merge_mobility_wetter", merge, "df"),
+        ("resample_rollups", lambda ctx: build_rollups(ctx["data"][0], ctx["df"]), None),
+        ("feature_store", features, "store"),
+        ("correlation_pearson", lambda ctx: correlation(ctx["store"].frame(FEATURES, dropna=False)), None),
+        ("correlation_spearman", lambda ctx: correlation(ctx["store"].frame(FEATURES, dropna=False), "spearman"),
+         None),
+        ("pca_covariance", lambda ctx: fit_pca(matrix(ctx), "covariance"), None),
+        ("pca_randomized", lambda ctx: fit_pca(matrix(ctx), "randomized"), None),
+    ]
+    for method in CLUSTER_METHODS:
+        steps.append((f"clustering_{method}", lambda ctx, m=method: run_clustering(m, matrix(ctx), k=4), None))
+
+    def mlr_stats(ctx):
+        columns = CANDIDATES + TARGETS
+        suff = build_sufficient_stats(ctx["store"].matrix(columns, scaled=False, dropna=False), columns)
+        return suff.solve(MOBILITY_FEATURES[0], CANDIDATES)
+
+    def mlr_cv(ctx):
+        frame = ctx["store"].frame([MOBILITY_FEATURES[0]] + CANDIDATES)
+        return cross_validate(frame[CANDIDATES].to_numpy(), frame[MOBILITY_FEATURES[0]].to_numpy(), "timeseries", 5)
+
+    steps += [("mlr_fit", mlr_stats, None), ("mlr_cv_timeseries", mlr_cv, None)]
+    return steps
+
+
+def measure(fn, ctx, trace_memory=True):
+    if trace_memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        result = fn(ctx)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    # ru_maxrss: KiB unter Linux, Bytes unter macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return result, {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_mb": None if peak is None else round(peak / 1024 ** 2, 1),
+        "max_rss_mb": round(rss / 1024 ** 2, 1),
+    }
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"git": commit, "python": platform.python_version(), "pandas": pd.__version__,
+            "numpy": np.__version__, "cpu_count": os.cpu_count(), "machine": platform.machine()}
+
+
+def run_scale(scale, workdir, output, run_id, trace_memory=True, only=None):
+    data_dir = os.path.join(workdir, "data")
+    if os.path.exists(os.path.join(data_dir, "zurich_wetter.csv")):
+        print(f"ℹ️ Verwende vorhandene Daten in {data_dir}")
+        info = {"scale": scale}
+    else:
+        info = generate(data_dir, scale)
+
+    base = {"run_id": run_id, "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "scale": scale, **_environment(), "dataset": info}
+    ctx = {}
+    previous = os.getcwd()
+    os.chdir(workdir)  # load_data liest data/…, die Caches liegen unter data/cache
+    try:
+        for name, fn, key in _steps():
+            needed = only is None or any(o in name for o in only) or key is not None
+            if not needed:
+                continue
+            result, stats = measure(fn, ctx, trace_memory)
+            if key is not None:
+                ctx[key] = result
+            if key == "data":
+                ctx["df"] = result[3]
+            if only is not None and not any(o in name for o in only):
+                continue
+            record = {**base, "step": name, **stats}
+            with open(output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+            peak = "–" if stats["peak_mb"] is None else f"{stats['peak_mb']:.1f} MB"
+            print(f"  {name:<45} {stats['wall_s']:>9.3f} s  CPU {stats['cpu_s']:>9.3f} s  Spitze {peak}")
+    finally:
+        os.chdir(previous)
+
+
+def load_results(path=OUTPUT):
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare(path=OUTPUT, old=None, new=None):
+    # Zwei Läufe gegenüberstellen (Standard: die letzten beiden); Faktor > 1 = langsamer
+    results = load_results(path)
+    runs = list(dict.fromkeys(results["run_id"]))
+    if len(runs) < 2 and (old is None or new is None):
+        print("⚠️ Für einen Vergleich braucht es mindestens zwei Läufe.")
+        return None
+    old, new = old or runs[-2], new or runs[-1]
+    keys = ["scale", "step"]
+    a = results[results["run_id"] == old].set_index(keys)[["wall_s", "peak_mb"]]
+    b = results[results["run_id"] == new].set_index(keys)[["wall_s", "peak_mb"]]
+    table = a.join(b, lsuffix="_alt", rsuffix="_neu", how="inner")
+    if table.empty:
+        print(f"⚠️ Läufe {old} und {new} haben keine gemeinsamen Schritte (gleiche Skala?).")
+        return table
+    table["faktor_zeit"] = (table["wall_s_neu"] / table["wall_s_alt"]).round(2)
+    table["faktor_speicher"] = (table["peak_mb_neu"] / table["peak_mb_alt"]).round(2)
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        print(f"Vergleich {old} → {new}")
+        print(table)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für Laden, Aggregation und Modelle")
+    parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES,
+                        help="Datenumfang relativ zu heute, z.B. 1 10 100")
+    parser.add_argument("--workdir", help="Verzeichnis für die synthetischen Daten (bleibt erhalten; "
+                                          "vorhandene Daten werden wiederverwendet)")
+    parser.add_argument("--output", default=OUTPUT, help="JSONL-Datei, an die die Ergebnisse angehängt werden")
+    parser.add_argument("--only", nargs="+", help="nur Schritte, deren Name einen dieser Teile enthält")
+    parser.add_argument("--no-memory", action="store_true", help="Spitzenspeicher nicht messen (kein tracemalloc)")
+    parser.add_argument("--compare", nargs="*", metavar="RUN_ID",
+                        help="Läufe aus --output vergleichen (ohne Angabe: die letzten beiden)")
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        compare(args.output, *args.compare[:2])
+        return
+
+    output = os.path.abspath(args.output)
+    run_id = uuid.uuid4().hex[:8]
+    print(f"ℹ️ Benchmark-Lauf {run_id} → {output}")
+    for scale in args.scales:
+        label = f"{scale:g}x"
+        if args.workdir:
+            workdir, cleanup = os.path.join(args.workdir, label), False
+        else:
+            workdir, cleanup = tempfile.mkdtemp(prefix=f"stada_bench_{label}_"), True
+        print(f"=== Skala {label} ===")
+        try:
+            run_scale(scale, workdir, output, run_id, not args.no_memory, args.only)
+        finally:
+            if cleanup:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
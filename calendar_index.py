@@ -0,0 +1,169 @@
+# calendar_index.py
+# Kalendermerkmale für Zürich, lokal aus Regeln erzeugt (kein Netzwerk, keine Zusatzpakete):
+# - feiertag:    gesetzliche Feiertage Kanton Zürich, dazu die städtischen Halbfeiertage
+#                (Sechseläuten, Knabenschiessen-Montag) ab 12 Uhr
+# - schulferien: Schulferien der Stadt Zürich nach Kalenderwochen-Regel (Näherung; die
+#                exakten Daten legt das Volksschulamt jährlich fest)
+# - event:       Grossanlässe (Sechseläuten, Street Parade, Züri Fäscht, Knabenschiessen, Silvester)
+# Pro Jahr wird einmal eine Tagestabelle aufgebaut; die stündlichen Werte entstehen durch
+# ein Nachschlagen über den Tag (Index-Array) und den Vergleich mit der Startstunde.
+import datetime as dt
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+CALENDAR_COLUMNS = ["feiertag", "schulferien", "event"]
+
+# Züri Fäscht findet alle drei Jahre statt (2022 auf 2023 verschoben)
+ZUERI_FAESCHT_YEARS = {2010, 2013, 2016, 2019, 2023, 2026, 2029, 2032}
+
+# Schulferien: (Name, Montag der Kalenderwoche, Anzahl Wochen)
+SCHOOL_HOLIDAYS = [
+    ("Sportferien", 7, 2),
+    ("Frühlingsferien", 16, 2),
+    ("Sommerferien", 29, 5),
+    ("Herbstferien", 41, 2),
+    ("Weihnachtsferien", 52, 2),
+]
+
+
+def easter(year):
+    # Ostersonntag (gregorianisch, anonymer Algorithmus nach Meeus/Jones/Butcher)
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return dt.date(year, month, day)
+
+
+def _nth_weekday(year, month, weekday, n):
+    # n-ter Wochentag (0 = Montag) im Monat
+    first = dt.date(year, month, 1)
+    return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _public_holidays(year):
+    # (Datum, Name, Startstunde)
+    e = easter(year)
+    days = [
+        (dt.date(year, 1, 1), "Neujahr", 0),
+        (dt.date(year, 1, 2), "Berchtoldstag", 0),
+        (e - dt.timedelta(days=2), "Karfreitag", 0),
+        (e + dt.timedelta(days=1), "Ostermontag", 0),
+        (dt.date(year, 5, 1), "Tag der Arbeit", 0),
+        (e + dt.timedelta(days=39), "Auffahrt", 0),
+        (e + dt.timedelta(days=50), "Pfingstmontag", 0),
+        (dt.date(year, 8, 1), "Bundesfeier", 0),
+        (dt.date(year, 12, 25), "Weihnachten", 0),
+        (dt.date(year, 12, 26), "Stephanstag", 0),
+    ]
+    days.append((_sechselaeuten(year), "Sechseläuten", 12))
+    days.append((_knabenschiessen(year) + dt.timedelta(days=2), "Knabenschiessen", 12))
+    return days
+
+
+def _sechselaeuten(year):
+    # Dritter Montag im April; fällt er auf Ostermontag, eine Woche später,
+    # liegt er in der Karwoche (Ostermontag eine Woche danach), eine Woche früher
+    day = _nth_weekday(year, 4, 0, 3)
+    easter_monday = easter(year) + dt.timedelta(days=1)
+    if day == easter_monday:
+        return day + dt.timedelta(days=7)
+    if day + dt.timedelta(days=7) == easter_monday:
+        return day - dt.timedelta(days=7)
+    return day
+
+
+def _knabenschiessen(year):
+    # Samstag des zweiten Septemberwochenendes (Samstag bis Montag)
+    return _nth_weekday(year, 9, 5, 2)
+
+
+def _events(year):
+    days = [(_sechselaeuten(year), "Sechseläuten")]
+    days.append((_nth_weekday(year, 8, 5, 2), "Street Parade"))
+    if year in ZUERI_FAESCHT_YEARS:
+        friday = _nth_weekday(year, 7, 4, 1)
+        days += [(friday + dt.timedelta(days=i), "Züri Fäscht") for i in range(3)]
+    saturday = _knabenschiessen(year)
+    days += [(saturday + dt.timedelta(days=i), "Knabenschiessen") for i in range(3)]
+    days.append((dt.date(year, 12, 31), "Silvester"))
+    return days
+
+
+def _school_holidays(year):
+    days = []
+    for name, week, weeks in SCHOOL_HOLIDAYS:
+        # Samstag davor bis Sonntag am Ende der letzten Ferienwoche
+        monday = dt.date.fromisocalendar(year, week, 1)
+        days += [(monday + dt.timedelta(days=i), name) for i in range(-2, 7 * weeks)]
+    return days
+
+
+def calendar_days(years):
+    # Tagestabelle: Index = Datum, Spalten = Merkmale, Startstunde des Feiertags, Bezeichnung
+    index = pd.date_range(f"{min(years) - 1}-12-01", f"{max(years) + 1}-01-31", freq="D")
+    table = pd.DataFrame(0, index=index, columns=CALENDAR_COLUMNS, dtype=np.float32)
+    table["ab_stunde"] = 24
+    table["anlass"] = ""
+
+    def mark(day, column, name, hour=0):
+        ts = pd.Timestamp(day)
+        if ts in table.index:
+            table.loc[ts, column] = 1
+            names = [n for n in table.loc[ts, "anlass"].split(", ") if n]
+            if name not in names:
+                table.loc[ts, "anlass"] = ", ".join(names + [name])
+            if column == "feiertag":
+                table.loc[ts, "ab_stunde"] = min(table.loc[ts, "ab_stunde"], hour)
+
+    for year in range(min(years) - 1, max(years) + 2):
+        for day, name in _school_holidays(year):
+            mark(day, "schulferien", name)
+        for day, name, hour in _public_holidays(year):
+            mark(day, "feiertag", name, hour)
+        for day, name in _events(year):
+            mark(day, "event", name)
+    return table
+
+
+def _days_for(years):
+    return _days_for_range(min(years), max(years))
+
+
+@lru_cache(maxsize=8)
+def _days_for_range(first, last):
+    # Hängt nur vom Jahresbereich ab, nicht vom Datenstand
+    return calendar_days(range(first, last + 1))
+
+
+def hourly_calendar(datum):
+    # datum: Stunden (beliebige Reihenfolge, NaT erlaubt) → {Merkmal: float32-Array gleicher Länge}
+    datum = pd.DatetimeIndex(datum)
+    valid = ~datum.isna()
+    n = len(datum)
+    if not valid.any():
+        return {name: np.full(n, np.nan, dtype=np.float32) for name in CALENDAR_COLUMNS}
+
+    days = _days_for(datum[valid].year.unique())
+    pos = days.index.get_indexer(datum.normalize())
+    found = pos >= 0
+    hour = datum.hour.to_numpy()
+    values = days[CALENDAR_COLUMNS].to_numpy(dtype=np.float32)
+    start = days["ab_stunde"].to_numpy()
+
+    result = {}
+    for j, name in enumerate(CALENDAR_COLUMNS):
+        column = np.full(n, np.nan, dtype=np.float32)
+        column[found] = values[pos[found], j]
+        if name == "feiertag":
+            column[found] *= hour[found] >= start[pos[found]]
+        result[name] = column
+    return result
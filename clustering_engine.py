@@ -0,0 +1,139 @@
+# clustering_engine.py
+# Skalierbare Clustering-Verfahren für viele Stunden.
+# - KMeans: ab MINIBATCH_FROM Zeilen MiniBatchKMeans
+# - Hierarchisch: Fit auf einer Stichprobe, restliche Punkte → nächstes Clusterzentrum
+# - MeanShift: Bandbreite aus Stichprobe geschätzt, bin_seeding, Fit auf Stichprobe
+# Jede Methode liefert ein dict mit labels, k, Laufzeit und Stichprobengrösse.
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans, MeanShift, AgglomerativeClustering, estimate_bandwidth
+from sklearn.metrics import silhouette_score
+
+from model_registry import registry, model_key, cached_fit
+
+MINIBATCH_FROM = 20_000
+AGGLO_SAMPLE = 5_000
+MEANSHIFT_SAMPLE = 10_000
+BANDWIDTH_SAMPLE = 2_000
+ASSIGN_CHUNK = 65_536
+SILHOUETTE_SAMPLE = 5_000
+K_RANGE = range(2, 11)
+
+METHODS = ["KMeans", "Hierarchical (Bottom-Up)", "Hierarchical (Top-Down – simuliert)", "MeanShift"]
+
+
+def _sample(n, size, random_state):
+    if n <= size:
+        return np.arange(n)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n, size=size, replace=False))
+
+
+def assign_nearest(X, centers, chunk=ASSIGN_CHUNK):
+    # Nächstes Zentrum je Zeile, blockweise (Speicher O(chunk · k))
+    labels = np.empty(len(X), dtype=np.int32)
+    c_sq = (centers ** 2).sum(axis=1)
+    for start in range(0, len(X), chunk):
+        block = X[start:start + chunk]
+        dist = c_sq[None, :] - 2.0 * block @ centers.T
+        labels[start:start + chunk] = dist.argmin(axis=1)
+    return labels
+
+
+def kmeans(X, k, random_state=42):
+    if len(X) >= MINIBATCH_FROM:
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=4096, n_init=3)
+        variant = "MiniBatchKMeans"
+    else:
+        model = KMeans(n_clusters=k, random_state=random_state)
+        variant = "KMeans"
+    labels = model.fit_predict(X)
+    return {"labels": labels, "k": k, "variant": variant, "sample": len(X), "model": model}
+
+
+def agglomerative(X, k, random_state=42, sample_size=AGGLO_SAMPLE, reverse=False):
+    # O(n²)-Speicher nur auf der Stichprobe; danach Zuordnung über die Clusterzentren
+    idx = _sample(len(X), sample_size, random_state)
+    sample = X[idx]
+    if reverse:
+        # Simulierter "Top-Down-Effekt" wie bisher über die umgekehrte Reihenfolge
+        sample = sample[::-1]
+    sample_labels = AgglomerativeClustering(n_clusters=k).fit_predict(sample)
+    centers = np.vstack([sample[sample_labels == c].mean(axis=0) for c in range(k)])
+
+    if len(idx) == len(X) and not reverse:
+        labels = sample_labels
+    else:
+        labels = assign_nearest(X, centers)
+    return {"labels": labels, "k": k, "variant": "Agglomerative", "sample": len(idx), "centers": centers}
+
+
+def meanshift(X, random_state=42, quantile=0.3, sample_size=MEANSHIFT_SAMPLE, bandwidth_sample=BANDWIDTH_SAMPLE):
+    bandwidth = estimate_bandwidth(X, quantile=quantile, n_samples=min(bandwidth_sample, len(X)),
+                                   random_state=random_state)
+    if bandwidth <= 0:
+        bandwidth = None
+    idx = _sample(len(X), sample_size, random_state)
+    model = MeanShift(bandwidth=bandwidth, bin_seeding=True, n_jobs=-1)
+    model.fit(X[idx])
+    labels = model.labels_ if len(idx) == len(X) else model.predict(X)
+    return {"labels": labels, "k": len(model.cluster_centers_), "variant": "MeanShift",
+            "sample": len(idx), "bandwidth": bandwidth, "model": model}
+
+
+def run(method, X, k=4, random_state=42):
+    start = time.perf_counter()
+    if method == "KMeans":
+        result = kmeans(X, k, random_state)
+    elif method == "Hierarchical (Bottom-Up)":
+        result = agglomerative(X, k, random_state)
+    elif method == "Hierarchical (Top-Down – simuliert)":
+        result = agglomerative(X, k, random_state, reverse=True)
+    elif method == "MeanShift":
+        result = meanshift(X, random_state)
+    else:
+        raise ValueError(f"Unbekannte Methode: {method}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _sweep_one(X, k, random_state, silhouette_sample):
+    start = time.perf_counter()
+    result = kmeans(X, k, random_state)
+    result["seconds"] = time.perf_counter() - start
+    result["inertia"] = float(result["model"].inertia_)
+    # Silhouette ist O(n²) → nur auf einer begrenzten Zufallsstichprobe
+    result["silhouette"] = float(silhouette_score(
+        X, result["labels"], sample_size=min(silhouette_sample, len(X)), random_state=random_state
+    ))
+    return result
+
+
+def sweep_k(X, ks=K_RANGE, random_state=42, n_jobs=-1, silhouette_sample=SILHOUETTE_SAMPLE):
+    # Alle k parallel in eigenen Prozessen fitten (joblib legt X als Memmap ab)
+    return Parallel(n_jobs=n_jobs)(
+        delayed(_sweep_one)(X, k, random_state, silhouette_sample) for k in ks
+    )
+
+
+def cached_sweep(kind, version, features, X, extra_params=None, ks=K_RANGE, random_state=42):
+    # Sweep-Tabelle (k, inertia, silhouette, Sekunden) cachen und jedes einzelne k unter
+    # demselben Schlüssel ablegen, den die Seite für ein gewähltes k verwendet.
+    extra_params = dict(extra_params or {})
+
+    def fit():
+        results = sweep_k(X, ks, random_state)
+        for result in results:
+            params = {**extra_params, "k": result["k"], "random_state": random_state}
+            registry.put(model_key(kind, version, features, params), result)
+        return pd.DataFrame([
+            {"k": r["k"], "inertia": r["inertia"], "silhouette": r["silhouette"], "sekunden": r["seconds"]}
+            for r in results
+        ]).set_index("k")
+
+    params = {**extra_params, "ks": tuple(ks), "random_state": random_state}
+    table, _ = cached_fit(kind + "_sweep", version, features, params, fit)
+    return table
@@ -0,0 +1,105 @@
+# correlation.py
+# Korrelationsmatrizen mit NumPy statt DataFrame.corr() pro Seitenaufruf.
+# Paarweise vollständig wie pandas: für jedes Spaltenpaar zählen nur Zeilen, in denen
+# beide Werte vorhanden sind. Alle Paare zusammen sind wenige Matrixprodukte über die
+# Gültigkeitsmaske. Ergebnisse werden pro Datenstand, Spaltenauswahl und Verfahren
+# im Prozess zwischengespeichert (kleine k×k-Matrizen, kein Modell-Cache); die Farbstufen
+# werden für die ganze Matrix auf einmal berechnet (Styler.apply mit axis=None statt
+# einer Python-Funktion pro Zelle).
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+METHODS = {"pearson": "Pearson", "spearman": "Spearman (Rang)"}
+MAX_CACHED = 32
+
+# (Bedingung, Farbe) – gleiche Stufen wie bisher in highlight_corr
+COLOR_BINS = [
+    (lambda c: c >= 0.75, "background-color: lightgreen"),
+    (lambda c: c >= 0.5, "background-color: turquoise"),
+    (lambda c: c >= 0.25, "background-color: lightblue"),
+    (lambda c: c <= -0.75, "background-color: red"),
+    (lambda c: c <= -0.5, "background-color: orange"),
+    (lambda c: c <= -0.25, "background-color: yellow"),
+]
+
+
+def pairwise_corr(X, min_periods=2):
+    # X: (n, k) float, NaN = fehlend → (k, k) Pearson-Matrix über paarweise vollständige Zeilen
+    X = np.asarray(X, dtype=np.float64)
+    valid = ~np.isnan(X)
+    # Verschiebung um das Spaltenmittel für numerische Stabilität
+    count = valid.sum(axis=0)
+    center = np.divide(np.where(valid, X, 0.0).sum(axis=0), count, out=np.zeros(X.shape[1]), where=count > 0)
+    Z = np.where(valid, X - center, 0.0)
+    M = valid.astype(np.float64)
+
+    n = M.T @ M                  # n[i, j]: Zeilen, in denen i und j vorhanden sind
+    s = Z.T @ M                  # s[i, j]: Σ x_i über diese Zeilen
+    ss = (Z * Z).T @ M           # ss[i, j]: Σ x_i² über diese Zeilen
+    sxy = Z.T @ Z                # sxy[i, j]: Σ x_i·x_j
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - s * s.T / n
+        var = ss - s * s / n
+        corr = cov / np.sqrt(var * var.T)
+    corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    np.fill_diagonal(corr, np.where(np.diag(var) > 0, 1.0, np.nan))
+    return corr, n
+
+
+def rank_columns(X):
+    # Durchschnittsränge je Spalte (NaN bleiben NaN). Beim Rang-Verfahren wird jede Spalte
+    # einmal über ihre eigenen Werte rangiert – bei vollständigen Daten identisch mit
+    # pandas, bei Lücken eine schnelle Näherung an das paarweise Neu-Rangieren.
+    return pd.DataFrame(X).rank(method="average").to_numpy(dtype=np.float64)
+
+
+def correlation(frame, method="pearson"):
+    X = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    if method == "spearman":
+        X = rank_columns(X)
+    elif method != "pearson":
+        raise ValueError(f"Unbekanntes Korrelationsverfahren: {method}")
+    corr, n = pairwise_corr(X)
+    columns = list(frame.columns)
+    return {
+        "corr": pd.DataFrame(corr, index=columns, columns=columns),
+        "n": pd.DataFrame(n.astype(np.int64), index=columns, columns=columns),
+    }
+
+
+_lock = threading.Lock()
+_cached = OrderedDict()  # (Version, Spalten, Verfahren, params) → Korrelationsmatrix
+
+
+def cached_corr(version, columns, frame, method="pearson", **params):
+    # frame: DataFrame oder Funktion, die ihn erst bei einem Cache-Fehltreffer liefert.
+    # params: weitere Angaben, die die Zeilenauswahl bestimmen (z.B. Quelle, Zielgrösse)
+    key = (version, tuple(columns), method, tuple(sorted(params.items())))
+    with _lock:
+        if key in _cached:
+            _cached.move_to_end(key)
+            return _cached[key]
+
+    data = frame() if callable(frame) else frame
+    corr = correlation(data[list(columns)], method)["corr"]
+    with _lock:
+        _cached[key] = corr
+        while len(_cached) > MAX_CACHED:
+            _cached.popitem(last=False)
+    return corr
+
+
+def color_bins(corr):
+    values = corr.to_numpy(dtype=np.float64)
+    filled = np.nan_to_num(values, nan=0.0)
+    styles = np.select([cond(filled) for cond, _ in COLOR_BINS], [color for _, color in COLOR_BINS], default="")
+    return pd.DataFrame(styles, index=corr.index, columns=corr.columns)
+
+
+def style_corr(corr):
+    return corr.style.apply(color_bins, axis=None).format("{:.2f}")
@@ -0,0 +1,107 @@
+# cross_validation.py
+# Kreuzvalidierung für die MLR: K-Fold (gemischt) und expandierendes Zeitfenster.
+# Gemeinsame Vorarbeit für alle Folds: je Test-Block wird einmal die Gram-Matrix von
+# [1, X, y] berechnet. Die Trainings-Gram eines Folds ist dann eine Summe bzw. Differenz
+# dieser Blöcke; pro Fold bleibt nur ein kleines Gleichungssystem und eine
+# Vorhersage über die Testzeilen. Die Out-of-Fold-Vorhersagen ersetzen den früheren
+# einzelnen train_test_split für Streudiagramm und Residuenanalyse.
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import KFold, TimeSeriesSplit
+
+SCHEMES = {"K-Fold (gemischt)": "kfold", "Zeitreihen-Split (expandierend)": "timeseries"}
+
+
+def _splits(n, scheme, n_splits, random_state):
+    if scheme == "kfold":
+        splitter = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    elif scheme == "timeseries":
+        splitter = TimeSeriesSplit(n_splits=n_splits)
+    else:
+        raise ValueError(f"Unbekanntes CV-Schema: {scheme}")
+    return list(splitter.split(np.empty((n, 1))))
+
+
+def _design(X, y, shift):
+    A = np.empty((len(X), X.shape[1] + 2))
+    A[:, 0] = 1.0
+    A[:, 1:-1] = X - shift[:-1]
+    A[:, -1] = y - shift[-1]
+    return A
+
+
+def _gram(A):
+    return A.T @ A
+
+
+def _solve(G):
+    p = G.shape[0] - 1
+    return np.linalg.pinv(G[:p, :p]) @ G[:p, p]
+
+
+def _score(A_test, beta):
+    y = A_test[:, -1]
+    pred = A_test[:, :-1] @ beta
+    resid = y - pred
+    sse = resid @ resid
+    sst = ((y - y.mean()) ** 2).sum()
+    scores = {"r2": 1 - sse / sst if sst > 0 else np.nan, "rmse": np.sqrt(sse / len(y)), "n_test": len(y)}
+    return scores, pred
+
+
+def fold_grams(A, splits, scheme, n_jobs=-1):
+    # Gemeinsame Vorarbeit: Gram je Test-Block (und der erste Trainingsblock beim
+    # Zeitreihen-Split); Trainings-Gram je Fold als Summe/Differenz der Blöcke
+    test_grams = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_gram)(A[test]) for _, test in splits
+    )
+    if scheme == "kfold":
+        total = sum(test_grams)
+        train_grams = [total - G for G in test_grams]
+    else:
+        first_train = splits[0][0]
+        running = _gram(A[first_train])
+        train_grams = []
+        for G in test_grams:
+            train_grams.append(running)
+            running = running + G
+    return train_grams, test_grams
+
+
+def prepare(X, y, scheme="kfold", n_splits=5, random_state=42, n_jobs=-1):
+    # Verschobene Designmatrix [1, X, y], Splits und Fold-Grams für cross_validate
+    # und die Merkmalsauswahl
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    shift = np.concatenate([X.mean(axis=0), [y.mean()]])
+    A = _design(X, y, shift)
+    splits = _splits(len(A), scheme, n_splits, random_state)
+    train_grams, test_grams = fold_grams(A, splits, scheme, n_jobs)
+    return A, shift, splits, train_grams, test_grams
+
+
+def cross_validate(X, y, scheme="kfold", n_splits=5, random_state=42, n_jobs=-1):
+    # X: (n, k) ohne fehlende Werte, zeitlich sortiert (für "timeseries" nötig); y: (n,)
+    # Rückgabe: Tabelle je Fold, Mittelwert/Streuung und Out-of-Fold-Vorhersagen
+    # (NaN für Zeilen, die in keinem Test-Block liegen, z.B. der erste Zeitreihen-Block)
+    A, shift, splits, train_grams, _ = prepare(X, y, scheme, n_splits, random_state, n_jobs)
+
+    def run_fold(i):
+        _, test = splits[i]
+        beta = _solve(train_grams[i])
+        result, pred = _score(A[test], beta)
+        result["fold"] = i + 1
+        result["n_train"] = len(splits[i][0])
+        return result, pred
+
+    folds = Parallel(n_jobs=n_jobs, prefer="threads")(delayed(run_fold)(i) for i in range(len(splits)))
+    predictions = np.full(len(A), np.nan)
+    for (_, test), (_, pred) in zip(splits, folds):
+        predictions[test] = pred + shift[-1]
+    table = pd.DataFrame([result for result, _ in folds]).set_index("fold")[["n_train", "n_test", "r2", "rmse"]]
+    summary = {
+        "r2_mean": table["r2"].mean(), "r2_std": table["r2"].std(ddof=1),
+        "rmse_mean": table["rmse"].mean(), "rmse_std": table["rmse"].std(ddof=1),
+    }
+    return table, summary, predictions
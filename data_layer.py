@@ -0,0 +1,198 @@
+# data_layer.py
+# Prozessweiter Speicher für die geladenen Datensätze.
+# Streamlit führt app.py bei jeder Interaktion neu aus, Module bleiben aber importiert –
+# dadurch teilen sich alle Sessions und Reruns dieselben (read-only) DataFrames.
+import hashlib
+import os
+import threading
+import time
+
+from load_data import load_all_data, MOBILITY_FILES, WETTER_FILE, STANDORTE_FILE, COUNT_COLS
+from rollups import get_rollups
+from feature_store import get_feature_store
+from incremental import build_watermark, save_watermark, update_from_files, append_increment
+from summaries import FrameSummary, recorded_summary, load_summaries, save_summaries
+from profiling import span
+from memo import memo_by_identity  # noqa: F401 (Re-Export für abgeleitete Caches)
+
+SOURCE_FILES = MOBILITY_FILES + [WETTER_FILE, STANDORTE_FILE]
+
+# STADA_STREAMING_INGEST=1: Mobility-Dateien nur chunkweise aggregieren (für Historien > RAM)
+STREAMING_INGEST = os.environ.get("STADA_STREAMING_INGEST") == "1"
+
+_lock = threading.Lock()
+_state = {"signature": None, "version": None, "base": None, "data": None, "loaded_at": None,
+          "watermark": None, "increments": 0, "summaries": None}
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "incremental": 0}
+
+
+def source_signature():
+    # (Pfad, mtime, Grösse) je Quelldatei; fehlende Dateien zählen als eigener Zustand
+    signature = []
+    for path in SOURCE_FILES:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def dataset_version():
+    # Kurze, prozessübergreifend stabile Kennung des Datenstands (für abgeleitete Caches)
+    if _state["version"] is None:
+        get_data()
+    return _state["version"]
+
+
+def loaded_version():
+    # Wie dataset_version(), löst aber keinen Ladevorgang aus (None, solange nichts geladen ist)
+    return _state["version"]
+
+
+def lineage():
+    # (Version des letzten Voll-Loads, Anzahl Anhänge seither). Gleiche Basis und nicht weniger
+    # Anhänge heisst: der aktuelle Stand setzt einen früheren nur mit neuen Zeilen fort.
+    return _state["base"], _state["increments"]
+
+
+def _build_derived(data):
+    # Voraggregationen direkt beim Laden berechnen, nicht erst beim ersten Seitenaufruf
+    mobility_df, wetter_df, standorte_df, df, mobility_agg = data
+    if not df.empty:
+        # Merkmalsmatrix inkl. Kalendermerkmale (Feiertage, Ferien, Anlässe)
+        get_feature_store(df)
+    if not mobility_df.empty and not df.empty:
+        get_rollups(mobility_df, df)
+
+
+def _build_summaries(data):
+    # Kennzahlen je Datensatz; im Streaming-Modus stammen die Mobility-Kennzahlen aus den Chunks
+    mobility_df, wetter_df = data[0], data[1]
+    if mobility_df.empty:
+        mobility = recorded_summary("mobility_df") or FrameSummary()
+    else:
+        mobility = FrameSummary.from_frame(mobility_df, COUNT_COLS)
+    return {"mobility": mobility, "wetter": FrameSummary.from_frame(wetter_df)}
+
+
+def _merge_summaries(new):
+    if not new:
+        return
+    _state["summaries"] = {
+        name: summary.merge(new[name]) if name in new else summary
+        for name, summary in _state["summaries"].items()
+    }
+    save_summaries(_state["version"], _state["summaries"])
+
+
+def _set_data(data, signature):
+    _state["data"] = data
+    _state["signature"] = signature
+    key = repr((signature, _state["increments"]))
+    _state["version"] = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    _state["loaded_at"] = time.time()
+
+
+def _full_load(signature):
+    with span("load_all_data", "load", streaming=STREAMING_INGEST):
+        data = load_all_data(streaming=STREAMING_INGEST)
+    _state["increments"] = 0
+    _set_data(data, signature)
+    _state["base"] = _state["version"]
+    _state["watermark"] = build_watermark(data[0], data[1], data[4])
+    save_watermark(_state["watermark"])
+    _state["summaries"] = load_summaries(_state["version"])
+    if _state["summaries"] is None:
+        with span("summaries", "prep"):
+            _state["summaries"] = _build_summaries(data)
+        save_summaries(_state["version"], _state["summaries"])
+    _build_derived(data)
+
+
+def _try_incremental(signature):
+    # Nur Mobility-/Wetterdateien gewachsen → angehängte Zeilen nachladen
+    if _state["data"] is None or _state["watermark"] is None:
+        return False
+    if _state["signature"][-1] != signature[-1]:  # Standortdaten geändert
+        return False
+
+    with span("incremental_update", "load"):
+        result = update_from_files(_state["data"], _state["watermark"])
+    if result is None:
+        return False
+
+    data, watermark, info = result
+    _state["increments"] += 1
+    _state["watermark"] = watermark
+    save_watermark(watermark)
+    _set_data(data, signature)
+    _merge_summaries(info["summaries"])
+    _stats["incremental"] += 1
+    print(f"ℹ️ Inkrementell nachgeladen: {info['mobility_rows']} Mobility-, "
+          f"{info['wetter_rows']} Wetterzeilen ({info['hours']} Stunden)")
+    return True
+
+
+def get_data():
+    # Liefert (mobility_df, wetter_df, standorte_df, df, mobility_agg).
+    # Die Frames werden geteilt und dürfen von den Seiten nicht verändert werden.
+    signature = source_signature()
+    with _lock:
+        if _state["data"] is not None and _state["signature"] == signature:
+            _stats["hits"] += 1
+            return _state["data"]
+
+        if _state["data"] is not None:
+            _stats["invalidations"] += 1
+        _stats["misses"] += 1
+
+        if not _try_incremental(signature):
+            _full_load(signature)
+        return _state["data"]
+
+
+def append_data(new_mobility=None, new_wetter=None):
+    # Neue Zeilen direkt übergeben (z.B. aus einem API-Abruf statt aus den CSVs).
+    # Nur Zeilen nach dem Wasserstand werden übernommen.
+    get_data()
+    with _lock:
+        data, watermark, info = append_increment(
+            _state["data"], _state["watermark"], new_mobility, new_wetter
+        )
+        if info["hours"]:
+            _state["increments"] += 1
+            _state["watermark"] = watermark
+            save_watermark(_state["watermark"])
+            _set_data(data, _state["signature"])
+            _merge_summaries(info["summaries"])
+            _stats["incremental"] += 1
+        return info
+
+
+def get_summaries():
+    # {"mobility": FrameSummary, "wetter": FrameSummary} zum aktuellen Datenstand
+    get_data()
+    return _state["summaries"]
+
+
+def invalidate():
+    with _lock:
+        if _state["data"] is not None:
+            _stats["invalidations"] += 1
+        _state["data"] = None
+        _state["signature"] = None
+        _state["version"] = None
+        _state["base"] = None
+        _state["loaded_at"] = None
+        _state["watermark"] = None
+        _state["summaries"] = None
+
+
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["version"] = _state["version"]
+        stats["loaded_at"] = _state["loaded_at"]
+        stats["cached"] = _state["data"] is not None
+    return stats
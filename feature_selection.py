@@ -0,0 +1,130 @@
+# feature_selection.py
+# Automatische Merkmalsauswahl für die MLR: Vorwärts-/Rückwärts-Stepwise und
+# exhaustive Suche über alle Teilmengen.
+# Alle Kennzahlen kommen aus Gram-Matrizen, die einmal für alle Kandidaten berechnet
+# werden (cross_validation.prepare): Ein Kandidatenmodell ist nur ein Ausschnitt dieser
+# Matrizen plus ein kleines Gleichungssystem – auch der CV-RMSE, weil sich die
+# Fehlerquadratsumme eines Test-Blocks direkt aus seiner Gram-Matrix ergibt.
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from cross_validation import prepare
+
+METHODS = {
+    "Beste Teilmenge (alle Kombinationen)": "best_subset",
+    "Vorwärts (stepwise)": "forward",
+    "Rückwärts (stepwise)": "backward",
+}
+CRITERIA = ["BIC", "AIC", "CV-RMSE"]
+MAX_EXHAUSTIVE = 16
+BATCH = 256
+PARALLEL_FROM = 512  # darunter lohnt sich der Start der Worker-Prozesse nicht
+
+
+def _fit(G, idx, yi):
+    XtX = G[np.ix_(idx, idx)]
+    Xty = G[idx, yi]
+    beta = np.linalg.pinv(XtX) @ Xty
+    return beta, Xty, XtX
+
+
+def _sse(G, idx, yi, beta):
+    # Σ(y − Xβ)² = yᵀy − 2βᵀXᵀy + βᵀXᵀXβ, nur aus der Gram-Matrix
+    return max(G[yi, yi] - 2 * beta @ G[idx, yi] + beta @ G[np.ix_(idx, idx)] @ beta, 0.0)
+
+
+def _score_batch(full, train_grams, test_grams, subsets):
+    yi = full.shape[0] - 1
+    n = full[0, 0]
+    sst = full[yi, yi] - full[0, yi] ** 2 / n
+    rows = []
+    for subset in subsets:
+        idx = [0] + [1 + j for j in subset]
+        k = len(idx)
+        beta, Xty, _ = _fit(full, idx, yi)
+        sse = max(full[yi, yi] - beta @ Xty, 1e-12)
+        fold_rmse = []
+        for G_train, G_test in zip(train_grams, test_grams):
+            beta_f, _, _ = _fit(G_train, idx, yi)
+            fold_rmse.append(np.sqrt(_sse(G_test, idx, yi, beta_f) / G_test[0, 0]))
+        rows.append({
+            "subset": tuple(subset),
+            "Anzahl": len(subset),
+            "R²": 1 - sse / sst if sst > 0 else np.nan,
+            "AIC": n * np.log(sse / n) + 2 * k,
+            "BIC": n * np.log(sse / n) + k * np.log(n),
+            "CV-RMSE": float(np.mean(fold_rmse)),
+            "CV-RMSE Std": float(np.std(fold_rmse, ddof=1)) if len(fold_rmse) > 1 else np.nan,
+        })
+    return rows
+
+
+class _Scorer:
+    # Bewertet Teilmengen (Spaltenindizes) mit Zwischenspeicher; grosse Mengen parallel
+    def __init__(self, full, train_grams, test_grams, n_jobs):
+        self.args = (full, train_grams, test_grams)
+        self.n_jobs = n_jobs
+        self.results = {}
+
+    def __call__(self, subsets):
+        todo = [tuple(sorted(s)) for s in subsets if tuple(sorted(s)) not in self.results]
+        if len(todo) >= PARALLEL_FROM:
+            batches = [todo[i:i + BATCH] for i in range(0, len(todo), BATCH)]
+            parts = Parallel(n_jobs=self.n_jobs)(delayed(_score_batch)(*self.args, b) for b in batches)
+            rows = [row for part in parts for row in part]
+        else:
+            rows = _score_batch(*self.args, todo)
+        for row in rows:
+            self.results[row["subset"]] = row
+        return [self.results[tuple(sorted(s))] for s in subsets]
+
+
+def _stepwise(scorer, k, criterion, forward):
+    current = () if forward else tuple(range(k))
+    best = scorer([current])[0][criterion]
+    while True:
+        if forward:
+            candidates = [current + (j,) for j in range(k) if j not in current]
+        else:
+            candidates = [tuple(j for j in current if j != drop) for drop in current]
+        if not candidates:
+            break
+        rows = scorer(candidates)
+        step = min(rows, key=lambda r: r[criterion])
+        if step[criterion] >= best:
+            break
+        current, best = step["subset"], step[criterion]
+
+
+def search(X, y, names, method="best_subset", criterion="BIC", scheme="kfold", n_splits=5,
+           random_state=42, n_jobs=-1):
+    # X: (n, k) ohne fehlende Werte; names: Spaltennamen von X.
+    # Rückgabe: Rangliste aller bewerteten Modelle, bestes zuerst.
+    if criterion not in CRITERIA:
+        raise ValueError(f"Unbekanntes Kriterium: {criterion}")
+    names = list(names)
+    k = len(names)
+    _, _, _, train_grams, test_grams = prepare(X, y, scheme, n_splits, random_state, n_jobs)
+    # Der letzte Fold deckt zusammen (Training + Test) bei beiden Schemata alle Zeilen ab
+    full = train_grams[-1] + test_grams[-1]
+    scorer = _Scorer(full, train_grams, test_grams, n_jobs)
+
+    if method == "best_subset":
+        if k > MAX_EXHAUSTIVE:
+            raise ValueError(f"Exhaustive Suche nur bis {MAX_EXHAUSTIVE} Merkmale ({k} gewählt).")
+        scorer([s for size in range(1, k + 1) for s in combinations(range(k), size)])
+    elif method in ("forward", "backward"):
+        _stepwise(scorer, k, criterion, forward=method == "forward")
+    else:
+        raise ValueError(f"Unbekannte Suchmethode: {method}")
+
+    board = pd.DataFrame(list(scorer.results.values()))
+    board.insert(0, "Merkmale", [", ".join(names[j] for j in s) or "(nur Achsenabschnitt)" for s in board["subset"]])
+    board = board.sort_values(criterion, kind="stable").reset_index(drop=True)
+    board.index = board.index + 1
+    board.index.name = "Rang"
+    board["subset"] = [tuple(names[j] for j in s) for s in board["subset"]]
+    return board
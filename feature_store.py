@@ -0,0 +1,117 @@
+# feature_store.py
+# Gemeinsame Merkmalsmatrix für MLR, PCA und Clustering.
+# Wird einmal pro Datenstand aus dem gemergten df aufgebaut (Zeit- und Kalendermerkmale
+# inklusive) und als zusammenhängendes float32-Array mit Spaltenindex gehalten.
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from calendar_index import CALENDAR_COLUMNS, hourly_calendar
+from profiling import instrument
+from memo import memo_by_identity, current_version
+
+MOBILITY_FEATURES = ["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]
+WETTER_FEATURES = [
+    "temp", "humidity", "wind_speed", "clouds_all",
+    "dew_point", "feels_like", "pressure", "visibility"
+]
+TIME_FEATURES = {
+    "weekday": lambda datum: datum.dt.weekday,
+    "hour": lambda datum: datum.dt.hour,
+}
+# Feiertage, Schulferien, Grossanlässe (0/1) aus der lokal erzeugten Kalendertabelle
+CALENDAR_FEATURES = list(CALENDAR_COLUMNS)
+FEATURES = MOBILITY_FEATURES + WETTER_FEATURES + list(TIME_FEATURES) + CALENDAR_FEATURES
+
+
+class FeatureStore:
+    # raw/scaled sind spaltenweise (Fortran-Order) abgelegt: eine Spalte oder ein
+    # zusammenhängender Spaltenbereich ist damit ein View ohne Kopie.
+    def __init__(self, datum, raw, scaled, columns, version=None):
+        # Schlüssel für abgeleitete Caches: Datenstand + Spaltenliste, stabil über Neustarts.
+        # Ohne Datenstand (Benchmarks, Tests) ein Inhalts-Hash über die Spaltenpuffer (ohne Kopie).
+        h = hashlib.blake2b(repr(list(columns)).encode(), digest_size=8)
+        if version is not None:
+            h.update(version.encode())
+        else:
+            h.update(raw.T)
+        self.version = h.hexdigest()
+        self.datum = datum
+        self.raw = raw
+        self.scaled = scaled
+        self.columns = list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self._valid = ~np.isnan(raw)
+        # Geteilt zwischen allen Sessions → schreibgeschützt
+        self.raw.flags.writeable = False
+        self.scaled.flags.writeable = False
+
+    def __len__(self):
+        return self.raw.shape[0]
+
+    def positions(self, names):
+        missing = [n for n in names if n not in self.index]
+        if missing:
+            raise KeyError(f"Unbekannte Merkmale: {missing}")
+        return [self.index[n] for n in names]
+
+    def row_mask(self, names):
+        # Zeilen ohne fehlende Werte in den gewählten Spalten (wie df[names].dropna())
+        return self._valid[:, self.positions(names)].all(axis=1)
+
+    def column(self, name, scaled=False):
+        source = self.scaled if scaled else self.raw
+        return source[:, self.index[name]]
+
+    def matrix(self, names, scaled=True, dropna=True):
+        source = self.scaled if scaled else self.raw
+        pos = self.positions(names)
+        contiguous = pos == list(range(pos[0], pos[0] + len(pos)))
+        rows = self.row_mask(names) if dropna else None
+        all_rows = rows is None or rows.all()
+
+        if contiguous and all_rows:
+            return source[:, pos[0]:pos[0] + len(pos)]
+        if all_rows:
+            return source[:, pos]
+        return source[np.ix_(rows, pos)]
+
+    def frame(self, names, scaled=False, dropna=True):
+        # DataFrame-Sicht für Seiten, die mit Spaltennamen weiterarbeiten (z.B. MLR)
+        values = self.matrix(names, scaled=scaled, dropna=dropna)
+        datum = self.datum[self.row_mask(names)] if dropna else self.datum
+        return pd.DataFrame(values, columns=list(names), index=pd.Index(datum, name="DATUM"), copy=False)
+
+
+def build_feature_store(df, features=None, version=None):
+    features = list(features or FEATURES)
+    datum = pd.to_datetime(df["DATUM"])
+
+    calendar = hourly_calendar(datum) if set(features) & set(CALENDAR_FEATURES) else {}
+
+    raw = np.empty((len(df), len(features)), dtype=np.float32, order="F")
+    for j, name in enumerate(features):
+        if name in calendar:
+            raw[:, j] = calendar[name]
+        elif name in TIME_FEATURES:
+            raw[:, j] = TIME_FEATURES[name](datum).to_numpy()
+        else:
+            raw[:, j] = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+
+    # Standardisierung wie StandardScaler (ddof=0, Skala 1 bei konstanten Spalten),
+    # je Spalte über die vorhandenen Werte
+    mean = np.nanmean(raw, axis=0, dtype=np.float64)
+    std = np.nanstd(raw, axis=0, dtype=np.float64)
+    std[std == 0] = 1.0
+    scaled = np.asfortranarray(((raw - mean) / std).astype(np.float32))
+
+    return FeatureStore(datum.to_numpy(), raw, scaled, features, version)
+
+
+@memo_by_identity
+@instrument("feature_store", "prep")
+def get_feature_store(df):
+    # Ein Store pro Datenstand: solange data_layer dasselbe df-Objekt liefert,
+    # wird der Store wiederverwendet.
+    return build_feature_store(df, version=current_version())
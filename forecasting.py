@@ -0,0 +1,244 @@
+# forecasting.py
+# Stündliche Prognosen für VELO_*/FUSS_* mit Tages-/Wochensaison und Wetter-Regressoren.
+# Alle Zählstellen werden gemeinsam als Matrix (Stunden × Stationen) verarbeitet:
+# - Zerlegung im STL-Stil: Trend (gleitendes Mittel über eine Woche) und Wochenprofil
+#   (168 Stunden-Slots) abwechselnd geschätzt, NaN-tolerant, für alle Spalten zugleich
+# - Wettereinfluss auf den Rest: pro Station eigene Normalgleichungen, gemeinsam gelöst
+# - Gefittet wird auf log1p der Zählwerte: Profil und Wetter wirken multiplikativ, damit
+#   schwache Nachtstunden nicht um den absoluten Tagesausschlag überschätzt werden
+# - Prognose: expm1(Niveau der letzten Woche + Wochenprofil + Wettereffekt), für alle
+#   Horizonte und Stationen in einem Matrixprodukt
+# - Vergleichsbasis: Vorwoche (saisonal naiv); backtest() misst beide, Stationen, bei
+#   denen die Vorwoche gewinnt, werden in forecast_all() mit ihr prognostiziert
+# Gefittete Modelle werden pro Station im Modell-Cache abgelegt; bei vielen Stationen
+# werden Spaltenblöcke in Worker-Prozessen gefittet.
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from model_registry import registry, model_key
+
+PERIOD = 168                    # Stunden pro Woche
+TREND_WINDOW = PERIOD + 1
+LEVEL_WINDOW = PERIOD           # Niveau = Mittel der letzten Woche (saison- und wetterbereinigt)
+ITERATIONS = 2
+REGRESSORS = ["temp", "humidity", "wind_speed", "clouds_all"]
+CLIMATE_DAYS = 14               # Wetter für die Zukunft: Tagesprofil der letzten zwei Wochen
+RIDGE = 1e-6
+PARALLEL_FROM = 64              # ab so vielen Stationen Spaltenblöcke in Prozessen
+BLOCK = 32
+Z = 1.96
+
+
+def week_slots(index):
+    # Stunde der Woche (Montag 00:00 = 0)
+    index = pd.DatetimeIndex(index)
+    return (index.dayofweek * 24 + index.hour).to_numpy()
+
+
+def _moving_mean(Y, window):
+    # Zentriertes gleitendes Mittel je Spalte über vorhandene Werte (Rand: kürzeres Fenster)
+    T = len(Y)
+    valid = ~np.isnan(Y)
+    cs = np.zeros((T + 1,) + Y.shape[1:])
+    cn = np.zeros((T + 1,) + Y.shape[1:])
+    cs[1:] = np.cumsum(np.where(valid, Y, 0.0), axis=0)
+    cn[1:] = np.cumsum(valid, axis=0)
+    half = window // 2
+    t = np.arange(T)
+    lo, hi = np.clip(t - half, 0, T), np.clip(t + half + 1, 0, T)
+    count = cn[hi] - cn[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cs[hi] - cs[lo]) / count
+    mean[count < max(window // 4, 1)] = np.nan
+    return mean
+
+
+def _column_mean(D):
+    # Spaltenmittel über vorhandene Werte; Spalten ohne Werte → 0
+    valid = ~np.isnan(D)
+    count = valid.sum(axis=0)
+    return np.divide(np.where(valid, D, 0.0).sum(axis=0), count, out=np.zeros(D.shape[1]), where=count > 0)
+
+
+def _slot_means(D, slots, period=PERIOD):
+    # Mittel je Wochen-Slot und Spalte, um 0 zentriert
+    valid = ~np.isnan(D)
+    sums = np.zeros((period, D.shape[1]))
+    counts = np.zeros((period, D.shape[1]))
+    np.add.at(sums, slots, np.where(valid, D, 0.0))
+    np.add.at(counts, slots, valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profile = sums / counts
+    return np.nan_to_num(profile - _column_mean(profile))
+
+
+def decompose(Y, slots, iterations=ITERATIONS, period=PERIOD, trend_window=TREND_WINDOW):
+    # Y: (T, S) mit NaN → Trend (T, S), Wochenprofil (period, S), Rest (T, S)
+    Y = np.asarray(Y, dtype=np.float64)
+    trend = _moving_mean(Y, trend_window)
+    for _ in range(iterations):
+        profile = _slot_means(Y - trend, slots, period)
+        trend = _moving_mean(Y - profile[slots], trend_window)
+    residual = Y - trend - profile[slots]
+    return trend, profile, residual
+
+
+def _design(X):
+    return np.column_stack([np.ones(len(X)), X])
+
+
+def _fit_block(Y, slots, X):
+    # Modelle für alle Spalten von Y; X: standardisierte Regressoren (T, p), ohne NaN-Zeilen-Anspruch
+    T, S = Y.shape
+    trend, profile, residual = decompose(Y, slots)
+
+    X1 = _design(np.nan_to_num(X))
+    rows_ok = ~np.isnan(X).any(axis=1)
+    mask = (~np.isnan(residual) & rows_ok[:, None]).astype(np.float64)
+    R = np.where(mask > 0, residual, 0.0)
+    XtX = np.einsum("tp,ts,tq->spq", X1, mask, X1) + RIDGE * np.eye(X1.shape[1])
+    Xty = np.einsum("tp,ts->sp", X1, R)
+    beta = np.linalg.solve(XtX, Xty[..., None])[..., 0]            # (S, p+1)
+    weather = X1 @ beta.T                                         # (T, S)
+    weather[~rows_ok] = 0.0
+
+    adjusted = Y - profile[slots] - weather
+    level = _column_mean(adjusted[-LEVEL_WINDOW:])
+    fitted = trend + profile[slots] + weather
+    sigma = np.sqrt(_column_mean((Y - fitted) ** 2))
+    return {"profile": profile, "beta": beta, "level": level, "sigma": sigma,
+            "n": np.sum(~np.isnan(Y), axis=0)}
+
+
+def fit_models(Y, index, X, regressors, n_jobs=-1):
+    # Y: DataFrame (Stunden × Stationen). Gibt ein Modell-dict je Spalte zurück.
+    slots = week_slots(index)
+    x_mean = np.nanmean(X, axis=0)
+    x_std = np.nanstd(X, axis=0)
+    x_std[~(x_std > 0)] = 1.0
+    Xs = (X - x_mean) / x_std
+    values = np.log1p(np.clip(Y.to_numpy(dtype=np.float64), 0.0, None))
+
+    if values.shape[1] >= PARALLEL_FROM:
+        blocks = [slice(i, i + BLOCK) for i in range(0, values.shape[1], BLOCK)]
+        parts = Parallel(n_jobs=n_jobs)(delayed(_fit_block)(values[:, b], slots, Xs) for b in blocks)
+        fitted = {k: np.concatenate([p[k] for p in parts], axis=-1 if k == "profile" else 0) for k in parts[0]}
+    else:
+        fitted = _fit_block(values, slots, Xs)
+
+    end = pd.Timestamp(index[-1])
+    return {
+        column: {
+            "profile": fitted["profile"][:, j],
+            "beta": fitted["beta"][j],
+            "level": float(fitted["level"][j]),
+            "sigma": float(fitted["sigma"][j]),
+            "n": int(fitted["n"][j]),
+            "x_mean": x_mean,
+            "x_std": x_std,
+            "regressors": list(regressors),
+            "end": end,
+        }
+        for j, column in enumerate(Y.columns)
+    }
+
+
+def future_regressors(weather, end, horizon, regressors=REGRESSORS, days=CLIMATE_DAYS):
+    # Bekanntes Wetter nach `end` übernehmen, sonst Tagesprofil (Stunde) der letzten Tage
+    future = pd.date_range(end + pd.Timedelta(hours=1), periods=horizon, freq="h")
+    weather = weather[list(regressors)]
+    recent = weather.loc[end - pd.Timedelta(days=days):end]
+    profile = recent.groupby(recent.index.hour).mean().reindex(range(24))
+    profile = profile.fillna(weather.mean())
+    known = weather.reindex(future)
+    climate = profile.loc[future.hour].set_axis(future)
+    return future, known.fillna(climate).to_numpy(dtype=np.float64)
+
+
+def predict(models, future, X_future):
+    # Alle Stationen und Horizonte auf einmal → DataFrames Prognose / untere / obere Grenze
+    columns = list(models)
+    first = models[columns[0]]
+    slots = week_slots(future)
+    X1 = _design((X_future - first["x_mean"]) / first["x_std"])
+    profile = np.column_stack([models[c]["profile"] for c in columns])
+    beta = np.vstack([models[c]["beta"] for c in columns])
+    level = np.array([models[c]["level"] for c in columns])
+    sigma = np.array([models[c]["sigma"] for c in columns])
+
+    log_forecast = level + profile[slots] + X1 @ beta.T
+    forecast = np.clip(np.expm1(log_forecast), 0.0, None)
+    lower = np.clip(np.expm1(log_forecast - Z * sigma), 0.0, None)
+    upper = np.expm1(log_forecast + Z * sigma)
+    frame = lambda values: pd.DataFrame(values, index=pd.Index(future, name="DATUM"), columns=columns)
+    return frame(forecast), frame(lower), frame(upper)
+
+
+def seasonal_naive(Y, horizon, period=PERIOD):
+    # Vorwoche als Prognose: Wert derselben Wochenstunde der letzten gemessenen Woche;
+    # Band aus der Streuung der Wochendifferenzen
+    end = pd.Timestamp(Y.index[-1])
+    future = pd.date_range(end + pd.Timedelta(hours=1), periods=horizon, freq="h")
+    lag = period * (np.arange(horizon) // period + 1)
+    source = Y.reindex(future - pd.to_timedelta(lag, unit="h"))
+    forecast = pd.DataFrame(source.to_numpy(dtype=np.float64), index=pd.Index(future, name="DATUM"),
+                            columns=Y.columns)
+    diff = Y.to_numpy(dtype=np.float64)[period:] - Y.to_numpy(dtype=np.float64)[:-period]
+    sigma = np.sqrt(_column_mean(diff ** 2))
+    return forecast, (forecast - Z * sigma).clip(lower=0.0), forecast + Z * sigma
+
+
+def backtest(Y, weather, horizon, regressors=REGRESSORS):
+    # Fit ohne die letzten `horizon` Stunden, Prognose dafür → MAE je Station
+    # (Zeilen) für das Modell und die Vorwoche
+    train, test = Y.iloc[:-horizon], Y.iloc[-horizon:]
+    models = fit_models(train, train.index, weather.reindex(train.index)[regressors].to_numpy(), regressors)
+    future, X_future = future_regressors(weather, train.index[-1], horizon, regressors)
+    forecast, _, _ = predict(models, future, X_future)
+    naive, _, _ = seasonal_naive(train, horizon)
+    actual = test.set_axis(future)
+    return pd.DataFrame({"modell": (forecast - actual).abs().mean(),
+                         "vorwoche": (naive - actual).abs().mean()})
+
+
+def naive_wins(scores):
+    # Stationen, bei denen die Vorwoche im Rückblick-Test besser ist als das Modell
+    return list(scores.index[scores["vorwoche"] < scores["modell"]])
+
+
+def cached_models(version, target, Y, weather, regressors=REGRESSORS):
+    # Modelle pro Station aus dem Cache; fehlende Stationen werden gemeinsam gefittet
+    regressors = [r for r in regressors if r in weather.columns]
+    params = {"target": target, "regressors": tuple(regressors), "end": str(Y.index[-1])}
+    keys = {column: model_key("forecast", version, [column], params) for column in Y.columns}
+    models = {column: registry.get(key) for column, key in keys.items()}
+    missing = [column for column, model in models.items() if model is None]
+
+    start = time.perf_counter()
+    if missing:
+        X = weather.reindex(Y.index)[regressors].to_numpy(dtype=np.float64)
+        fitted = fit_models(Y[missing], Y.index, X, regressors)
+        for column, model in fitted.items():
+            registry.put(keys[column], model)
+            models[column] = model
+    return models, {"fitted": len(missing), "cached": len(Y.columns) - len(missing),
+                    "seconds": time.perf_counter() - start}
+
+
+def forecast_all(version, target, Y, weather, horizon, regressors=REGRESSORS, naive_columns=()):
+    # Komfortfunktion für die Seite: Modelle (gecacht) + Prognose für alle Spalten von Y;
+    # Spalten in naive_columns (siehe naive_wins) werden mit der Vorwoche prognostiziert,
+    # Stunden ohne Vorwochenwert behalten die Modellprognose
+    models, info = cached_models(version, target, Y, weather, regressors)
+    first = next(iter(models.values()))
+    future, X_future = future_regressors(weather, first["end"], horizon, first["regressors"])
+    forecast, lower, upper = predict(models, future, X_future)
+    naive_columns = [c for c in naive_columns if c in forecast.columns]
+    if naive_columns:
+        for frame, fallback in zip((forecast, lower, upper), seasonal_naive(Y[naive_columns], horizon)):
+            frame[naive_columns] = fallback.fillna(frame[naive_columns]).to_numpy()
+    info["naive"] = len(naive_columns)
+    return forecast, lower, upper, info
@@ -0,0 +1,216 @@
+# incremental.py
+# Inkrementelles Nachladen neuer Stunden- und Wetterzeilen.
+# Die Quelldateien werden als "append-only" behandelt: gelesen wird nur der Teil hinter
+# dem gespeicherten Byte-Offset, übernommen werden nur Zeilen nach dem Wasserstand
+# (pro Zählstelle letzter ungerundeter Zeitstempel, beim Wetter letztes dt). Restliche
+# 15-Minuten-Zeilen einer bereits geladenen Stunde werden deshalb noch übernommen und in
+# die Stundensumme eingerechnet.
+# Vor dem Nachladen wird per Inhalts-Hash geprüft, dass die bisherigen Bytes unverändert sind.
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+from ingest_cache import CACHE_DIR
+from join_engine import wetter_hours
+from load_data import (
+    MOBILITY_FILES, WETTER_FILE, COUNT_COLS, STATION_KEY, ALL_STATIONS, WETTER_TOLERANCE,
+    prepare_mobility, prepare_wetter, merge_mobility_wetter, merge_last
+)
+from schema import concat_frames
+from summaries import FrameSummary
+
+WATERMARK_FILE = os.path.join(CACHE_DIR, "watermark.json")
+HASH_BLOCK = 1 << 20
+
+
+def _file_state(path, previous=None):
+    # {"offset": Grösse, "hash": Inhalts-Hash der ganzen Datei (wie ingest_cache.content_hash)}.
+    # Mit `previous` wird im selben Lesedurchlauf geprüft, ob die ersten previous["offset"]
+    # Bytes unverändert sind (reines Anhängen); sonst None. Damit fällt jede Änderung der
+    # bisherigen Zeilen auf, dafür wird bei jeder Prüfung die ganze Datei gelesen (nicht geparst).
+    h = hashlib.blake2b(digest_size=16)
+    offset = previous["offset"] if previous is not None else None
+    size = 0
+    with open(path, "rb") as f:
+        if offset is not None:
+            while size < offset:
+                block = f.read(min(HASH_BLOCK, offset - size))
+                if not block:
+                    return None
+                h.update(block)
+                size += len(block)
+            if h.hexdigest() != previous.get("hash"):
+                return None
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+            size += len(block)
+    return {"offset": size, "hash": h.hexdigest()}
+
+
+def build_watermark(mobility_df, wetter_df, mobility_agg):
+    # Rohzeitstempel aus dem Laden (attrs["last_raw"]); ohne sie die gerundete Stunde
+    if mobility_df.attrs.get("last_raw"):
+        mobility = dict(mobility_df.attrs["last_raw"])
+    elif mobility_agg.attrs.get("last_raw"):
+        mobility = dict(mobility_agg.attrs["last_raw"])
+    elif not mobility_df.empty and STATION_KEY in mobility_df.columns:
+        last = mobility_df.groupby(STATION_KEY, observed=True)["DATUM"].max()
+        mobility = {str(k): v.isoformat() for k, v in last.items()}
+    elif not mobility_agg.empty:
+        mobility = {ALL_STATIONS: mobility_agg["DATUM"].max().isoformat()}
+    else:
+        mobility = {}
+
+    files = {}
+    for path in MOBILITY_FILES + [WETTER_FILE]:
+        if os.path.exists(path):
+            files[path] = _file_state(path)
+
+    return {
+        "mobility": mobility,
+        "wetter": int(wetter_df["dt"].max()) if not wetter_df.empty else None,
+        "files": files,
+    }
+
+
+def load_watermark(path=WATERMARK_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_watermark(watermark, path=WATERMARK_FILE):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(watermark, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print("⚠️ Wasserstand konnte nicht gespeichert werden:", e)
+
+
+def read_tail(path, offset):
+    # Nur die Bytes ab `offset` parsen; die Kopfzeile wird vorangestellt
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        tail = f.read()
+    if not tail.strip():
+        return None
+    return pd.read_csv(io.BytesIO(header + tail))
+
+
+def _new_mobility_rows(rows, watermark):
+    # rows: roh eingelesen (DATUM noch ungerundet) → Zeilen nach dem Wasserstand.
+    # Verglichen werden Rohzeitstempel, damit spät gelieferte Viertelstunden der letzten
+    # geladenen Stunde nicht verloren gehen.
+    marks = watermark.get("mobility", {})
+    datum = pd.to_datetime(rows["DATUM"], errors="coerce")
+    if ALL_STATIONS in marks:
+        return rows[(datum > pd.Timestamp(marks[ALL_STATIONS])).to_numpy()]
+
+    last = pd.to_datetime(rows[STATION_KEY].astype(str).map(marks))
+    newer = last.isna() | (datum > last)
+    return rows[newer.to_numpy()]
+
+
+def append_increment(data, watermark, new_mobility=None, new_wetter=None):
+    # new_mobility / new_wetter: roh eingelesene Zeilen (wie in der CSV).
+    # Gibt (data, watermark, info) zurück; die Frames werden nur um die neuen
+    # Stunden ergänzt, bestehende Stunden werden in mobility_agg aufaddiert.
+    mobility_df, wetter_df, standorte_df, df, mobility_agg = data
+    watermark = {**watermark, "mobility": dict(watermark.get("mobility", {}))}
+    # info["summaries"]: Kennzahlen nur der neuen Zeilen, zum Zusammenführen mit dem Bestand
+    info = {"mobility_rows": 0, "wetter_rows": 0, "hours": 0, "summaries": {}}
+    touched = pd.DatetimeIndex([])
+
+    if new_mobility is not None and not new_mobility.empty:
+        rows = _new_mobility_rows(new_mobility, watermark)
+        rows = prepare_mobility(rows.copy()) if not rows.empty else rows
+        if not rows.empty:
+            info["mobility_rows"] = len(rows)
+            info["summaries"]["mobility"] = FrameSummary.from_frame(rows, COUNT_COLS)
+            sums = rows.groupby("DATUM")[COUNT_COLS].sum().astype("float64")
+
+            agg = mobility_agg.set_index("DATUM")
+            overlap = sums.index.intersection(agg.index)
+            if len(overlap):
+                agg.loc[overlap, COUNT_COLS] += sums.loc[overlap, COUNT_COLS]
+            fresh = sums.loc[sums.index.difference(agg.index)]
+            agg = pd.concat([agg, fresh])
+            if not agg.index.is_monotonic_increasing:
+                agg = agg.sort_index()
+            mobility_agg = agg.reset_index()
+
+            if not mobility_df.empty:
+                mobility_df = concat_frames([mobility_df, rows])
+            last_raw = rows.attrs["last_raw"]
+            if ALL_STATIONS in watermark["mobility"]:
+                last_raw = {ALL_STATIONS: max(last_raw.values(), key=pd.Timestamp)}
+            watermark["mobility"] = merge_last(watermark["mobility"], last_raw)
+            touched = touched.union(sums.index)
+
+    if new_wetter is not None and not new_wetter.empty:
+        rows = prepare_wetter(new_wetter)
+        if watermark.get("wetter") is not None:
+            rows = rows[rows["dt"] > watermark["wetter"]]
+        if not rows.empty:
+            info["wetter_rows"] = len(rows)
+            info["summaries"]["wetter"] = FrameSummary.from_frame(rows)
+            wetter_df = concat_frames([wetter_df, rows])
+            watermark["wetter"] = int(wetter_df["dt"].max())
+            # Stunden, denen der Join die neuen Wetterzeilen zuordnet (bei Toleranz nicht dt_iso)
+            touched = touched.union(pd.DatetimeIndex(wetter_hours(rows, WETTER_TOLERANCE).dropna().unique()))
+
+    # Merge nur für betroffene Stunden neu berechnen
+    if len(touched):
+        agg_part = mobility_agg[mobility_agg["DATUM"].isin(touched)]
+        wetter_part = wetter_df[wetter_hours(wetter_df, WETTER_TOLERANCE).isin(touched).to_numpy()]
+        merged = merge_mobility_wetter(agg_part, wetter_part)
+        keep = df[~df["DATUM"].isin(touched)] if not df.empty else df
+        df = pd.concat([keep, merged], ignore_index=True)
+        if not df["DATUM"].is_monotonic_increasing:
+            df = df.sort_values("DATUM", ignore_index=True)
+        info["hours"] = len(touched)
+
+    return (mobility_df, wetter_df, standorte_df, df, mobility_agg), watermark, info
+
+
+def update_from_files(data, watermark):
+    # Liest angehängte Zeilen aller Quelldateien. Gibt None zurück, wenn eine Datei
+    # nicht nur gewachsen ist (gekürzt, ersetzt, neu) – dann ist ein Voll-Load nötig.
+    files = watermark.get("files", {})
+    new_mobility, new_wetter = [], None
+    states = {}
+
+    for path in MOBILITY_FILES + [WETTER_FILE]:
+        if not os.path.exists(path):
+            if path in files:
+                return None
+            continue
+        state = files.get(path)
+        if state is None or os.path.getsize(path) < state["offset"]:
+            return None
+        states[path] = _file_state(path, state)
+        if states[path] is None:
+            return None
+
+        tail = read_tail(path, state["offset"])
+        if tail is None:
+            continue
+        if path == WETTER_FILE:
+            new_wetter = tail
+        else:
+            new_mobility.append(tail)
+
+    new_mobility = pd.concat(new_mobility, ignore_index=True) if new_mobility else None
+    data, watermark, info = append_increment(data, watermark, new_mobility, new_wetter)
+
+    watermark["files"] = states
+    return data, watermark, info
@@ -0,0 +1,113 @@
+# ingest_cache.py
+# Spaltenbasierter Cache (Arrow/Feather) für die CSV-Quellen.
+# Ein Cache-Eintrag gilt, solange mtime und Grösse der Quelldatei gleich bleiben.
+# Ändern sich nur die Metadaten (z.B. Datei neu kopiert), entscheidet der Inhalts-Hash.
+# df.attrs (JSON-serialisierbar) wird in den Metadaten mitgespeichert.
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+except ImportError:
+    pyarrow = None
+
+CACHE_DIR = os.path.join("data", "cache")
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def content_hash(path, block_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_paths(path, key, cache_dir):
+    name = os.path.basename(path)
+    base = os.path.join(cache_dir, f"{name}.{key}")
+    return base + ".feather", base + ".json"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def _read_feather(feather_path, meta):
+    # to_pandas() kopiert die Spalten ohnehin in NumPy-Blöcke, daher ohne Memory-Map lesen.
+    # split_blocks/self_destruct geben jede Arrow-Spalte nach der Umwandlung frei, so liegt
+    # der Datensatz beim Laden nicht zweimal vollständig im Speicher.
+    table = feather.read_table(feather_path)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+    df.attrs.update(meta.get("attrs", {}))
+    return df
+
+
+def read_csv_cached(path, prepare=None, key="raw", cache_dir=CACHE_DIR, **read_kwargs):
+    # Liest eine CSV-Datei, bevorzugt aus dem Feather-Cache.
+    # `prepare` wird nur beim Neuaufbau auf das frisch geparste DataFrame angewendet;
+    # `key` muss sich ändern, wenn sich `prepare` oder `read_kwargs` ändern.
+    if pyarrow is None:
+        df = pd.read_csv(path, **read_kwargs)
+        return prepare(df) if prepare is not None else df
+
+    feather_path, meta_path = _cache_paths(path, key, cache_dir)
+    signature = file_signature(path)
+    meta = _read_meta(meta_path)
+    digest = None
+
+    if meta is not None and os.path.exists(feather_path):
+        if meta["mtime_ns"] == signature["mtime_ns"] and meta["size"] == signature["size"]:
+            return _read_feather(feather_path, meta)
+
+        # Metadaten geändert → Inhalt prüfen, bevor neu geparst wird
+        if meta["size"] == signature["size"]:
+            digest = content_hash(path)
+            if digest == meta["hash"]:
+                meta = {**meta, **signature, "hash": digest}
+                _write_meta(meta_path, meta)
+                return _read_feather(feather_path, meta)
+
+    df = pd.read_csv(path, **read_kwargs)
+    if prepare is not None:
+        df = prepare(df)
+    df = df.reset_index(drop=True)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = feather_path + ".tmp"
+        df.to_feather(tmp, compression="uncompressed")
+        os.replace(tmp, feather_path)
+        _write_meta(meta_path, {**signature, "hash": digest or content_hash(path), "attrs": df.attrs})
+    except Exception as e:
+        print(f"⚠️ Cache für {path} konnte nicht geschrieben werden:", e)
+
+    return df
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith((".feather", ".json", ".tmp")):
+            os.remove(os.path.join(cache_dir, name))
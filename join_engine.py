@@ -0,0 +1,81 @@
+# join_engine.py
+# Zeitliche Zuordnung Mobility ↔ Wetter.
+# Beide Seiten werden nach Zeit sortiert und in einem linearen Durchlauf (merge_asof)
+# zusammengeführt. Ohne Toleranz entspricht das dem bisherigen inneren Merge auf die
+# volle Stunde; mit Toleranz werden auch leicht verschobene Wetterzeitstempel
+# (z.B. 10:58 statt 11:00) der nächsten Stunde zugeordnet (höchstens eine Stunde je
+# Wetterzeile, Toleranzen über 30 Minuten wirken daher wie 30 Minuten).
+import pandas as pd
+
+from memo import memo_by_identity
+
+_MATCH = "_wetter_match"
+
+
+def _as_ns(series):
+    return pd.to_datetime(series).astype("datetime64[ns]")
+
+
+_SNAP = {"nearest": "round", "backward": "ceil", "forward": "floor"}
+
+
+def wetter_hours(wetter_df, tolerance=None, direction="nearest"):
+    # Stunde, der align_mobility_wetter jede Wetterzeile zuordnet (NaT = keine). Ohne Toleranz
+    # dt_iso (auf die Stunde abgerundet); mit Toleranz der ungerundete Unix-Zeitstempel dt auf
+    # die nächste (bzw. vorige/folgende) volle Stunde, sofern höchstens `tolerance` entfernt.
+    # Jede Wetterzeile gehört damit zu genau einer Stunde; dieselbe Zuordnung verwendet
+    # incremental.append_increment, um die betroffenen Wetterzeilen zu wählen.
+    if tolerance is None:
+        return _as_ns(wetter_df["dt_iso"])
+    raw = pd.to_datetime(wetter_df["dt"], unit="s").astype("datetime64[ns]")
+    hours = getattr(raw.dt, _SNAP[direction])("h")
+    return hours.where((raw - hours).abs() <= pd.Timedelta(tolerance))
+
+
+def align_mobility_wetter(mobility_agg, wetter_df, tolerance=None, direction="nearest"):
+    # Rückgabe wie pd.merge(..., left_on="DATUM", right_on="dt_iso", how="inner"),
+    # aber sortiert nach DATUM und mit höchstens einer Wetterzeile pro Stunde.
+    # dt_iso im Ergebnis ist die zugeordnete Stunde (= DATUM).
+    left = mobility_agg.assign(DATUM=_as_ns(mobility_agg["DATUM"]))
+    if not left["DATUM"].is_monotonic_increasing:
+        left = left.sort_values("DATUM", kind="stable")
+
+    hours = wetter_hours(wetter_df, tolerance, direction)
+    right = wetter_df.assign(dt_iso=hours, **{_MATCH: True})
+    right = right.loc[hours.notna().to_numpy()]
+    if tolerance is not None:
+        # Bei mehreren Kandidaten zuerst die zeitlich nächste Zeile
+        distance = (pd.to_datetime(right["dt"], unit="s") - right["dt_iso"]).abs()
+        right = right.iloc[distance.to_numpy().argsort(kind="stable")[::-1]]
+    right = right.sort_values("dt_iso", kind="stable")
+
+    # Der frühere innere Merge hätte bei mehreren Wetterzeilen pro Stunde Mobility-Zeilen
+    # verdoppelt, merge_asof würde stillschweigend eine davon nehmen → explizit die nächste
+    # bzw. (bei gleichem Abstand) die zuletzt gelieferte behalten
+    duplicated = right["dt_iso"].duplicated(keep="last")
+    if duplicated.any():
+        print(f"⚠️ {int(duplicated.sum())} Wetterzeilen für bereits belegte Stunden verworfen "
+              "(je Stunde die nächstgelegene bzw. zuletzt gelieferte behalten)")
+        right = right.loc[~duplicated.to_numpy()]
+
+    merged = pd.merge_asof(
+        left, right,
+        left_on="DATUM", right_on="dt_iso",
+        tolerance=pd.Timedelta(0), direction="nearest"
+    )
+    matched = merged[_MATCH].notna().to_numpy()
+    out = merged.loc[matched].drop(columns=[_MATCH]).reset_index(drop=True)
+    # Nicht getroffene Stunden machen Ganzzahlspalten zu float → Typen der Wetterseite zurück
+    dtypes = {c: right[c].dtype for c in right.columns
+              if c in out.columns and c != _MATCH and out[c].dtype != right[c].dtype}
+    return out.astype(dtypes) if dtypes else out
+
+
+@memo_by_identity
+def aligned_index(df):
+    # Sortierter DatetimeIndex der gemeinsamen Stunden, einmal pro df berechnet
+    index = pd.DatetimeIndex(df["DATUM"])
+    if not index.is_monotonic_increasing:
+        index = index.sort_values()
+    return index.unique()
+
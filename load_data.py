@@ -1,61 +1,208 @@
 # load_data.py
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from ingest_cache import read_csv_cached
+from join_engine import align_mobility_wetter
+from summaries import FrameSummary, merge_all, record_summary
+from schema import (
+    MOBILITY_SCHEMA, WETTER_SCHEMA, STANDORTE_SCHEMA, STANDORTE_DATE_FORMAT,
+    apply_schema, schema_key, record_memory, print_memory_report, concat_frames
+)
+
+MOBILITY_FILES = [
+    "data/zurich_mobility_1.csv",
+    "data/zurich_mobility_2.csv",
+    "data/zurich_mobility_3.csv"
+]
+WETTER_FILE = "data/zurich_wetter.csv"
+STANDORTE_FILE = "data/zurich_standorte.csv"
+COUNT_COLS = ["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]
+
+# Maximale Abweichung Wetter-Zeitstempel ↔ Stunde (z.B. "30min"); None = exakt auf die Stunde
+WETTER_TOLERANCE = os.environ.get("STADA_WETTER_TOLERANCE") or None
+
+STATION_KEY = "FK_ZAEHLER"
+# Alle Stationen zusammen (Streaming-Modus ohne Stationsspalte)
+ALL_STATIONS = "*"
+
+
+def last_timestamps(df, datum):
+    # Letzter ungerundeter Zeitstempel je Zählstelle (bzw. ALL_STATIONS) als ISO-Text;
+    # Grundlage des Wasserstands fürs inkrementelle Nachladen
+    valid = datum.notna().to_numpy()
+    if not valid.any():
+        return {}
+    if STATION_KEY not in df.columns:
+        return {ALL_STATIONS: datum[valid].max().isoformat()}
+    last = datum[valid].groupby(df.loc[valid, STATION_KEY].astype(str).to_numpy()).max()
+    return {str(k): v.isoformat() for k, v in last.items()}
+
+
+def merge_last(*marks):
+    merged = {}
+    for mark in marks:
+        for key, ts in (mark or {}).items():
+            merged[key] = max(merged.get(key, ts), ts, key=pd.Timestamp)
+    return merged
+
+
+def _prepare_mobility(df):
+    raw = pd.to_datetime(df["DATUM"], errors="coerce")
+    # DATUM wird auf die Stunde gerundet; die Rohzeitstempel bleiben nur als Wasserstand erhalten
+    last_raw = last_timestamps(df, raw)
+    df["DATUM"] = raw.dt.floor("h")
+    df = df.dropna(subset=["DATUM"]).reset_index(drop=True)
+    df.attrs["last_raw"] = last_raw
+    return df
+
+
+def _prepare_wetter(df):
+    # Verwende Unix-Zeitstempel für robustes Parsing
+    df["dt_iso"] = pd.to_datetime(df["dt"], unit="s").dt.floor("h")
+
+    # Entferne Zeilen mit ungültigen Zeitstempeln
+    return df.dropna(subset=["dt_iso"]).reset_index(drop=True)
+
+
+def _with_schema(prepare, schema, date_format=None):
+    # Schema direkt beim Cache-Aufbau anwenden; die Speicherersparnis wird in
+    # df.attrs abgelegt und vom Cache mitgespeichert.
+    def wrapped(df):
+        if prepare is not None:
+            df = prepare(df)
+        df, report = apply_schema(df, schema, date_format=date_format)
+        df.attrs["memory"] = report
+        return df
+    return wrapped
+
+
+prepare_mobility = _with_schema(_prepare_mobility, MOBILITY_SCHEMA)
+# v2: Rohzeitstempel je Zählstelle in df.attrs["last_raw"]
+MOBILITY_CACHE_KEY = "mobility-" + schema_key(MOBILITY_SCHEMA) + "-v2"
+prepare_wetter = _with_schema(_prepare_wetter, WETTER_SCHEMA)
 
-def load_all_data():
-    # === Mobility-Daten laden ===
-    mobility_files = [
-        "data/zurich_mobility_1.csv",
-        "data/zurich_mobility_2.csv",
-        "data/zurich_mobility_3.csv"
-    ]
 
+def merge_mobility_wetter(mobility_agg, wetter_df):
+    return align_mobility_wetter(mobility_agg, wetter_df, tolerance=WETTER_TOLERANCE)
+
+
+def _sum_reports(frames):
+    reports = [f.attrs.get("memory") for f in frames if f.attrs.get("memory")]
+    if not reports:
+        return None
+    return {k: sum(r[k] for r in reports) for k in ("before", "after", "saved")}
+
+
+def _aggregate_file_chunked(path, chunksize, compact_every=16):
+    # Liest eine Mobility-Datei stückweise und faltet jeden Chunk in Stundensummen.
+    # Im Speicher liegen nur der aktuelle Chunk und die bisherigen Teilaggregate.
+    # Nebenbei werden die Kennzahlen je Chunk zusammengefasst und zusammengeführt.
+    pieces = []
+    summary = FrameSummary()
+    last_raw = {}
+    reader = pd.read_csv(
+        path,
+        usecols=["DATUM"] + COUNT_COLS,
+        dtype={c: "float32" for c in COUNT_COLS},
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        chunk = _prepare_mobility(chunk)
+        last_raw = merge_last(last_raw, chunk.attrs["last_raw"])
+        summary = summary.merge(FrameSummary.from_frame(chunk, COUNT_COLS))
+        pieces.append(chunk.groupby("DATUM")[COUNT_COLS].sum().astype("float64"))
+        if len(pieces) >= compact_every:
+            pieces = [pd.concat(pieces).groupby(level=0).sum()]
+
+    if not pieces:
+        return pd.DataFrame(columns=COUNT_COLS, dtype="float64"), summary, last_raw
+    return pd.concat(pieces).groupby(level=0).sum(), summary, last_raw
+
+
+def stream_mobility_agg(files=None, chunksize=500_000, n_jobs=3):
+    # Streaming-Variante der Stundenaggregation: ergibt dasselbe wie
+    # mobility_df.groupby("DATUM")[COUNT_COLS].sum(), ohne mobility_df aufzubauen.
+    # Die Kennzahlen der Rohzeilen werden unter "mobility_df" vermerkt (summaries).
+    files = [f for f in (files or MOBILITY_FILES) if os.path.exists(f)]
+    if not files:
+        return pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(n_jobs, len(files)))) as pool:
+        results = list(pool.map(lambda f: _aggregate_file_chunked(f, chunksize), files))
+
+    partials = [agg for agg, _, _ in results]
+    record_summary("mobility_df", merge_all(summary for _, summary, _ in results))
+    agg = pd.concat(partials).groupby(level=0).sum().sort_index()
+    agg.index.name = "DATUM"
+    agg = agg.reset_index()
+    agg.attrs["last_raw"] = merge_last(*(last for _, _, last in results))
+    return agg
+
+
+def load_all_data(streaming=False, chunksize=500_000, n_jobs=3):
+    # === Mobility-Daten laden ===
+    # streaming=True: nur mobility_agg wird aufgebaut, mobility_df bleibt leer
     mobility_dfs = []
-    for file in mobility_files:
-        if os.path.exists(file):
-            df = pd.read_csv(file)
-            mobility_dfs.append(df)
-        else:
+    for file in MOBILITY_FILES:
+        if not os.path.exists(file):
             print(f"❌ Datei nicht gefunden: {file}")
+        elif not streaming:
+            df = read_csv_cached(
+                file,
+                prepare=prepare_mobility,
+                key=MOBILITY_CACHE_KEY
+            )
+            mobility_dfs.append(df)
 
     if mobility_dfs:
-        mobility_df = pd.concat(mobility_dfs, ignore_index=True)
-        mobility_df["DATUM"] = pd.to_datetime(mobility_df["DATUM"], errors="coerce").dt.floor("h")
-        mobility_df = mobility_df.dropna(subset=["DATUM"])
+        mobility_df = concat_frames(mobility_dfs)
+        mobility_df.attrs.clear()
+        mobility_df.attrs["last_raw"] = merge_last(*(f.attrs.get("last_raw") for f in mobility_dfs))
+        record_memory("mobility_df", _sum_reports(mobility_dfs))
     else:
         mobility_df = pd.DataFrame()
-        print("⚠️ Keine Mobility-Daten gefunden.")
+        if not streaming:
+            print("⚠️ Keine Mobility-Daten gefunden.")
 
     # === Wetterdaten laden (über Unix-Timestamp dt) ===
     try:
-        wetter_df = pd.read_csv("data/zurich_wetter.csv")
-
-        # Verwende Unix-Zeitstempel für robustes Parsing
-        wetter_df["dt_iso"] = pd.to_datetime(wetter_df["dt"], unit="s").dt.floor("h")
-
-        # Entferne Zeilen mit ungültigen Zeitstempeln
-        wetter_df = wetter_df.dropna(subset=["dt_iso"])
-
+        wetter_df = read_csv_cached(
+            WETTER_FILE,
+            prepare=prepare_wetter,
+            key="wetter-" + schema_key(WETTER_SCHEMA)
+        )
+        record_memory("wetter_df", wetter_df.attrs.get("memory"))
     except Exception as e:
         print("❌ Fehler beim Laden der Wetterdaten:", e)
         wetter_df = pd.DataFrame()
 
     # === Standortdaten laden ===
     try:
-        standorte_df = pd.read_csv("data/zurich_standorte.csv")
+        standorte_df = read_csv_cached(
+            STANDORTE_FILE,
+            prepare=_with_schema(None, STANDORTE_SCHEMA, STANDORTE_DATE_FORMAT),
+            key="standorte-" + schema_key(STANDORTE_SCHEMA)
+        )
+        record_memory("standorte_df", standorte_df.attrs.get("memory"))
     except Exception as e:
         print("❌ Fehler beim Laden der Standortdaten:", e)
         standorte_df = pd.DataFrame()
 
+    print_memory_report()
+
     # === Aggregation der Bewegungsdaten ===
-    if not mobility_df.empty:
-        mobility_agg = mobility_df.groupby("DATUM")[["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]].sum().reset_index()
+    if streaming:
+        mobility_agg = stream_mobility_agg(MOBILITY_FILES, chunksize=chunksize, n_jobs=n_jobs)
+    elif not mobility_df.empty:
+        mobility_agg = mobility_df.groupby("DATUM")[COUNT_COLS].sum().astype("float64").reset_index()
     else:
         mobility_agg = pd.DataFrame()
 
     # === Merge Mobility + Wetter ===
     if not mobility_agg.empty and not wetter_df.empty:
-        df = pd.merge(mobility_agg, wetter_df, left_on="DATUM", right_on="dt_iso", how="inner")
+        df = merge_mobility_wetter(mobility_agg, wetter_df)
     else:
         df = pd.DataFrame()
         print("⚠️ Kein gemeinsamer Datensatz für Analyse verfügbar (leerer Merge).")
@@ -0,0 +1,43 @@
+# memo.py
+# Ein-Eintrag-Memo für abgeleitete Strukturen (Indizes, Voraggregationen, Statistiken).
+# Schlüssel: der Datenstand aus data_layer.dataset_version() und die Identität der Argumente.
+# Die Argumente werden nur schwach referenziert, damit alte DataFrames nach einem Neuladen
+# nicht über den Cache am Leben bleiben; bei neuem Datenstand wird der Eintrag ersetzt.
+# Ausserhalb der App (Benchmarks, Tests) ist nichts geladen, dann zählt nur die Identität.
+import sys
+import threading
+import weakref
+from functools import wraps
+
+
+def current_version():
+    # data_layer.dataset_version(), ohne einen Ladevorgang auszulösen (None ausserhalb der App);
+    # data_layer wird nur gefragt, wenn es schon importiert ist
+    data_layer = sys.modules.get("data_layer")
+    return data_layer.loaded_version() if data_layer is not None else None
+
+
+def memo_by_identity(fn):
+    lock = threading.Lock()
+    entry = {"version": None, "refs": None, "value": None}
+
+    @wraps(fn)
+    def wrapper(*args):
+        version = current_version()
+        with lock:
+            refs = entry["refs"]
+            if (refs is not None and entry["version"] == version and len(refs) == len(args)
+                    and all(ref() is arg for ref, arg in zip(refs, args))):
+                return entry["value"]
+            value = fn(*args)
+            entry["version"] = version
+            entry["refs"] = tuple(weakref.ref(arg) for arg in args)
+            entry["value"] = value
+            return value
+
+    def cache_clear():
+        with lock:
+            entry.update(version=None, refs=None, value=None)
+
+    wrapper.cache_clear = cache_clear
+    return wrapper
@@ -0,0 +1,131 @@
+# mlr_engine.py
+# Geschlossene MLR-Lösung über suffiziente Statistiken (XᵀX, Xᵀy).
+# Die Gram-Matrix über [1, alle Kandidaten-Merkmale, alle Zielgrössen] wird in einem
+# Durchlauf chunkweise aufsummiert; jede Merkmalsauswahl und jede Zielgrösse ist danach
+# nur noch ein Ausschnitt dieser Matrix plus ein kleines Gleichungssystem.
+#
+# Fehlende Werte: Zeilen werden nach ihrem NaN-Muster gruppiert und pro Muster eine
+# eigene Gram-Matrix geführt. Für eine Auswahl werden genau die Muster summiert, die in
+# den gewählten Spalten vollständig sind – das entspricht df[auswahl].dropna().
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from feature_store import MOBILITY_FEATURES, WETTER_FEATURES, TIME_FEATURES, CALENDAR_FEATURES
+from memo import memo_by_identity
+
+CANDIDATES = WETTER_FEATURES + list(TIME_FEATURES) + CALENDAR_FEATURES
+TARGETS = MOBILITY_FEATURES
+CONST = "const"
+CHUNK = 65_536
+
+
+class SufficientStats:
+    def __init__(self, columns, shift=None):
+        self.columns = [CONST] + list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        # Verschiebung je Spalte (Mittel des ersten Chunks) für numerische Stabilität
+        self.shift = None if shift is None else np.asarray(shift, dtype=np.float64)
+        self.groups = {}  # NaN-Muster (Bitmaske) → [n, G]
+
+    @property
+    def n(self):
+        return sum(n for n, _ in self.groups.values())
+
+    def update(self, X):
+        # X: Zeilen in der Reihenfolge von columns (ohne const); beliebig oft aufrufbar
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return self
+        if self.shift is None:
+            shift = np.nanmean(X, axis=0)
+            self.shift = np.where(np.isnan(shift), 0.0, shift)
+
+        A = np.empty((len(X), len(self.columns)))
+        A[:, 0] = 1.0
+        A[:, 1:] = X - self.shift
+        missing = np.isnan(A)
+        bits = np.left_shift(1, np.arange(len(self.columns), dtype=np.int64))
+        patterns = missing.astype(np.int64) @ bits
+
+        for pattern in np.unique(patterns):
+            rows = A[patterns == pattern]
+            rows = np.where(np.isnan(rows), 0.0, rows)
+            entry = self.groups.setdefault(int(pattern), [0, np.zeros((len(self.columns),) * 2)])
+            entry[0] += len(rows)
+            entry[1] += rows.T @ rows
+        return self
+
+    def gram(self, names):
+        # Gram-Matrix und Zeilenzahl über alle vollständigen Zeilen der Auswahl
+        idx = [self.index[name] for name in names]
+        mask = sum(1 << i for i in idx)
+        n, G = 0, np.zeros((len(idx), len(idx)))
+        for pattern, (count, full) in self.groups.items():
+            if pattern & mask == 0:
+                n += count
+                G += full[np.ix_(idx, idx)]
+        return n, G
+
+    def solve(self, target, features):
+        features = list(features)
+        names = [CONST] + features + [target]
+        n, G = self.gram(names)
+        p = len(features) + 1
+        XtX, Xty, yty = G[:p, :p], G[:p, p], G[p, p]
+        if n <= p:
+            raise ValueError("Zu wenige vollständige Zeilen für diese Auswahl.")
+
+        XtX_inv = np.linalg.pinv(XtX)
+        beta = XtX_inv @ Xty
+        sse = max(yty - beta @ Xty, 0.0)
+        dof = n - p
+        sigma2 = sse / dof
+        cov = sigma2 * XtX_inv
+
+        # Zurück auf die unverschobene Skala: nur der Achsenabschnitt ändert sich
+        shift_x = self.shift[[self.index[f] - 1 for f in features]]
+        shift_y = self.shift[self.index[target] - 1]
+        c = np.concatenate([[1.0], -shift_x])
+        intercept = c @ beta + shift_y
+        intercept_se = np.sqrt(max(c @ cov @ c, 0.0))
+
+        y_mean = Xty[0] / n
+        sst = yty - n * y_mean ** 2
+        se = np.sqrt(np.clip(np.diag(cov)[1:], 0.0, None))
+        coef = beta[1:]
+        t_values = np.divide(coef, se, out=np.full_like(coef, np.nan), where=se > 0)
+        t_intercept = intercept / intercept_se if intercept_se > 0 else np.nan
+
+        table = pd.DataFrame({
+            "Merkmal": ["Achsenabschnitt"] + features,
+            "Koeffizient": np.concatenate([[intercept], coef]),
+            "Std.-Fehler": np.concatenate([[intercept_se], se]),
+            "t-Wert": np.concatenate([[t_intercept], t_values]),
+        })
+        table["p-Wert"] = 2 * stats.t.sf(np.abs(table["t-Wert"]), dof)
+        return {
+            "table": table,
+            "intercept": intercept,
+            "coef": coef,
+            "n": n,
+            "r2": 1 - sse / sst if sst > 0 else np.nan,
+            "rmse": np.sqrt(sse / n),
+            "sigma": np.sqrt(sigma2),
+            "dof": dof,
+        }
+
+
+def build_sufficient_stats(matrix, columns, chunk=CHUNK):
+    # Ein Durchlauf über die Zeilen, chunkweise
+    suff = SufficientStats(columns)
+    for start in range(0, len(matrix), chunk):
+        suff.update(matrix[start:start + chunk])
+    return suff
+
+
+@memo_by_identity
+def get_sufficient_stats(store):
+    # Einmal pro Feature-Store über alle Kandidaten und Zielgrössen
+    columns = CANDIDATES + TARGETS
+    return build_sufficient_stats(store.matrix(columns, scaled=False, dropna=False), columns)
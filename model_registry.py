@@ -0,0 +1,145 @@
+# model_registry.py
+# Cache für gefittete Modelle und ihre abgeleiteten Ergebnisse (Labels, Komponenten,
+# Koeffizienten, Vorhersagen). Schlüssel: Formatversion + Datenstand + Modellart +
+# Merkmalsauswahl + Hyperparameter (inkl. random_state). Im Speicher LRU mit Obergrenze in Bytes,
+# zusätzlich als Pickle unter data/cache/models für Neustarts.
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from profiling import span
+
+MODEL_DIR = os.path.join("data", "cache", "models")
+MAX_MEMORY_BYTES = 256 * 1024 ** 2
+MAX_DISK_BYTES = 1024 ** 3
+# Erhöhen, wenn sich Aufbau oder Algorithmus eines gecachten Ergebnisses ändert
+# (clustering_engine, pca_engine, forecasting, mlr_engine, cross_validation, feature_selection);
+# sonst würden alte Pickles aus data/cache/models als aktuell ausgeliefert
+FORMAT_VERSION = 2
+
+
+def model_key(kind, version, features, params):
+    payload = repr((FORMAT_VERSION, kind, version, tuple(features), sorted(params.items())))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, max_bytes=MAX_MEMORY_BYTES, cache_dir=MODEL_DIR, max_disk_bytes=MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key → (value, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def _remember(self, key, value, size):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self.stats["evictions"] += 1
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        try:
+            value = pickle.loads(blob)
+        except Exception as e:
+            # Jede Datei, die sich nicht laden lässt, zählt als Fehltreffer (wird neu gefittet)
+            print(f"⚠️ Gecachtes Modell {key} nicht lesbar, wird neu berechnet:", e)
+            return None
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return value, len(blob)
+
+    def _store(self, key, blob):
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, self._path(key))
+            self._prune_disk()
+        except OSError as e:
+            print("⚠️ Modell konnte nicht gespeichert werden:", e)
+
+    def _prune_disk(self):
+        # Älteste (zuletzt nicht benutzte) Dateien löschen, bis die Obergrenze passt
+        files = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith(".pkl")]
+        files = sorted(files, key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        while files and total > self.max_disk_bytes:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key][0]
+        loaded = self._load(key)
+        if loaded is None:
+            return None
+        value, size = loaded
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, value, size)
+        return value
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, value, len(blob))
+        self._store(key, blob)
+
+    def get_or_fit(self, kind, version, features, params, fit):
+        # Gibt (Ergebnis, aus_cache) zurück; fit() wird nur bei einem Fehltreffer aufgerufen
+        key = model_key(kind, version, features, params)
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        with self._lock:
+            self.stats["misses"] += 1
+        with span(kind, "fit"):
+            value = fit()
+        self.put(key, value)
+        return value, False
+
+    def memory_bytes(self):
+        return self._bytes
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith((".pkl", ".tmp")):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+registry = ModelRegistry()
+
+
+def cached_fit(kind, version, features, params, fit):
+    return registry.get_or_fit(kind, version, features, params, fit)
@@ -0,0 +1,149 @@
+# pca_engine.py
+# PCA-Backend: die vollständige Zerlegung wird einmal pro Datenstand und Auswahl
+# berechnet; jede Anzahl Hauptkomponenten ist danach nur noch ein Ausschnitt davon.
+# Verfahren:
+# - "covariance": exakt über die Kovarianzmatrix (ein chunkweiser Durchlauf, d×d-Eigenzerlegung)
+# - "randomized": randomisierte SVD der zentrierten Matrix, nur für die gewünschten Komponenten
+# - "incremental": IncrementalPCA über Chunks, für Historien, die nicht in den Speicher passen
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+from sklearn.utils.extmath import randomized_svd
+
+from model_registry import cached_fit
+
+SOLVERS = {
+    "auto": "Automatisch",
+    "covariance": "Exakt (Kovarianz)",
+    "randomized": "Randomisierte SVD",
+    "incremental": "Inkrementell (Chunks)",
+}
+CHUNK = 65_536
+MAX_COMPONENTS = 10  # höchste wählbare Anzahl Hauptkomponenten (Rang der randomisierten SVD)
+
+
+def iter_chunks(X, chunk=CHUNK):
+    for start in range(0, len(X), chunk):
+        yield X[start:start + chunk]
+
+
+def _flip_signs(components):
+    # Vorzeichen wie sklearn: grösster Betrag je Komponente positiv
+    rows = np.arange(len(components))
+    signs = np.sign(components[rows, np.abs(components).argmax(axis=1)])
+    signs[signs == 0] = 1.0
+    return components * signs[:, None]
+
+
+class PCADecomposition:
+    def __init__(self, mean, components, explained_variance, total_variance, n_samples, solver):
+        self.mean = mean
+        self.components = _flip_signs(components)
+        self.explained_variance = explained_variance
+        self.explained_variance_ratio = explained_variance / total_variance if total_variance > 0 else \
+            np.zeros_like(explained_variance)
+        self.n_samples = n_samples
+        self.solver = solver
+
+    @property
+    def n_components(self):
+        return len(self.components)
+
+    def loadings(self, n=None):
+        return self.components[:n]
+
+    def explained(self, n=None):
+        return self.explained_variance_ratio[:n]
+
+    def transform(self, X, n=None, chunk=CHUNK):
+        W = self.components[:n].T
+        out = np.empty((len(X), W.shape[1]), dtype=np.float32)
+        for start in range(0, len(X), chunk):
+            block = np.asarray(X[start:start + chunk], dtype=np.float64)
+            out[start:start + chunk] = (block - self.mean) @ W
+        return out
+
+
+def _fit_covariance(chunks):
+    # Verschobene Summen (Mittel des ersten Chunks) für numerische Stabilität
+    n, shift, s, S = 0, None, None, None
+    for block in chunks:
+        block = np.asarray(block, dtype=np.float64)
+        if shift is None:
+            shift = block.mean(axis=0)
+            s = np.zeros(block.shape[1])
+            S = np.zeros((block.shape[1],) * 2)
+        centered = block - shift
+        n += len(block)
+        s += centered.sum(axis=0)
+        S += centered.T @ centered
+    delta = s / n
+    cov = (S - n * np.outer(delta, delta)) / (n - 1)
+    values, vectors = np.linalg.eigh(cov)
+    order = np.argsort(values)[::-1]
+    values = np.clip(values[order], 0.0, None)
+    return PCADecomposition(shift + delta, vectors[:, order].T, values, np.trace(cov), n, "covariance")
+
+
+def _fit_randomized(X, n_components, random_state):
+    X = np.asarray(X, dtype=np.float64)
+    mean = X.mean(axis=0)
+    centered = X - mean
+    _, sigma, Vt = randomized_svd(centered, n_components, n_iter=7, random_state=random_state)
+    n = len(X)
+    total = centered.var(axis=0, ddof=1).sum()
+    return PCADecomposition(mean, Vt, sigma ** 2 / (n - 1), total, n, "randomized")
+
+
+def _fit_incremental(chunks, n_components):
+    model = IncrementalPCA(n_components=n_components)
+    buffer = None
+    for block in chunks:
+        block = np.asarray(block, dtype=np.float64)
+        # partial_fit braucht mindestens n_components Zeilen pro Aufruf → kleine Chunks anhängen
+        if buffer is not None and len(buffer) >= n_components and len(block) >= n_components:
+            model.partial_fit(buffer)
+            buffer = block
+        else:
+            buffer = block if buffer is None else np.vstack([buffer, block])
+    if buffer is not None:
+        model.partial_fit(buffer)
+    total = model.var_.sum() * model.n_samples_seen_ / (model.n_samples_seen_ - 1)
+    return PCADecomposition(model.mean_, model.components_, model.explained_variance_, total,
+                            model.n_samples_seen_, "incremental")
+
+
+def fit_pca(X, solver="auto", n_components=None, random_state=42, chunk=CHUNK):
+    # X: Array (n, d) oder – nur für "covariance"/"incremental" – eine Funktion, die
+    # bei jedem Aufruf einen frischen Iterator über Chunks liefert.
+    # Ohne n_components wird die vollständige Zerlegung (alle d Komponenten) berechnet,
+    # bei "randomized" höchstens MAX_COMPONENTS – die SVD lohnt sich nur mit kleinem Rang.
+    chunks = X if callable(X) else (lambda: iter_chunks(X, chunk))
+    if solver == "auto":
+        solver = "covariance"
+    if solver == "covariance":
+        return _fit_covariance(chunks())
+    if solver == "randomized":
+        if callable(X):
+            raise ValueError("Randomisierte SVD braucht die ganze Matrix im Speicher.")
+        return _fit_randomized(X, min(n_components or MAX_COMPONENTS, X.shape[1]), random_state)
+    if n_components is None:
+        n_components = next(iter(chunks())).shape[1]
+    if solver == "incremental":
+        return _fit_incremental(chunks(), n_components)
+    raise ValueError(f"Unbekanntes PCA-Verfahren: {solver}")
+
+
+def cached_pca(version, features, X, solver="auto", n_components=None):
+    # Zerlegung und Scores, gemeinsam genutzt von PCA- und Clustering-Seite. Exakte Verfahren
+    # liefern alle Komponenten (n_components schneidet nur ab); die randomisierte SVD rechnet
+    # nur n_components und wird pro Anzahl gecacht.
+    params = {"solver": solver}
+    if solver == "randomized":
+        params["n_components"] = n_components
+
+    def fit():
+        decomposition = fit_pca(X, solver, params.get("n_components"))
+        return {"decomposition": decomposition, "scores": decomposition.transform(X)}
+
+    fitted, _ = cached_fit("pca_full", version, features, params, fit)
+    return fitted["decomposition"], fitted["scores"]
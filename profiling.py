@@ -0,0 +1,174 @@
+# profiling.py
+# Messpunkte (Spans) für Laden, Merkmalsaufbereitung, Modell-Fits und Darstellung.
+# Je Span: Wandzeit, CPU-Zeit des Threads (Streamlit rechnet jede Session in einem eigenen
+# Thread) und Speicheränderung (RSS aus /proc, mit STADA_PROFILE_MEMORY=1 zusätzlich die über
+# tracemalloc gezählten Allokationen). Spans können verschachtelt sein; der Pfad zeigt, in
+# welcher Seite bzw. welchem Ladeschritt ein Fit lief.
+# Arten: load (Laden), prep (Merkmale/Voraggregation), fit (Modelle), render (Ausgabe), page (Seite).
+# Die letzten MAX_SPANS Spans liegen prozessweit in einem Ringpuffer; mit STADA_PROFILE_LOG=<Datei>
+# wird jeder abgeschlossene Span zusätzlich als JSON-Zeile angehängt (Produktion).
+# Das Debug-Panel in der Sidebar erscheint mit STADA_DEBUG=1 oder ?debug=1 in der URL.
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+MAX_SPANS = int(os.environ.get("STADA_PROFILE_SPANS", "5000"))
+LOG_FILE = os.environ.get("STADA_PROFILE_LOG") or None
+DEBUG = os.environ.get("STADA_DEBUG") == "1"
+
+if os.environ.get("STADA_PROFILE_MEMORY") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_lock = threading.Lock()
+_spans = deque(maxlen=MAX_SPANS)
+_local = threading.local()
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss():
+    # Aktueller Resident Set Size in Bytes (nur Linux; sonst None)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_size
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _record(entry):
+    with _lock:
+        _spans.append(entry)
+        if LOG_FILE:
+            try:
+                with open(LOG_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            except OSError as e:
+                print("⚠️ Profiling-Log konnte nicht geschrieben werden:", e)
+
+
+@contextmanager
+def span(name, kind, **attrs):
+    stack = _stack()
+    path = "/".join(stack + [name])
+    stack.append(name)
+    rss = _rss()
+    traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    wall, cpu = time.perf_counter(), time.thread_time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+        stack.pop()
+        rss_after = _rss()
+        entry = {
+            "ts": time.time(),
+            "name": name,
+            "kind": kind,
+            "path": path,
+            "depth": len(stack),
+            "thread": threading.get_ident(),
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rss_delta_mb": None if rss is None or rss_after is None else (rss_after - rss) / 1024 ** 2,
+            "alloc_mb": None if traced is None or not tracemalloc.is_tracing()
+            else (tracemalloc.get_traced_memory()[0] - traced) / 1024 ** 2,
+            "error": error,
+            **attrs,
+        }
+        _record(entry)
+
+
+def instrument(name, kind):
+    # Decorator-Variante von span() für Funktionen, die als Ganzes gemessen werden;
+    # unter @memo_by_identity gesetzt misst der Span nur echte Neuberechnungen
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profiled_chart(draw, *args, **kwargs):
+    # Diagramm- oder Tabellenausgabe (Serialisierung zum Browser) als render-Span messen,
+    # z.B. profiled_chart(st.plotly_chart, fig, use_container_width=True)
+    with span(f"st.{draw.__name__}", "render"):
+        return draw(*args, **kwargs)
+
+
+def spans(last=None):
+    with _lock:
+        rows = list(_spans)
+    if last:
+        rows = rows[-last:]
+    return pd.DataFrame(rows, columns=None if rows else ["ts", "name", "kind", "path", "wall_s", "cpu_s"])
+
+
+def summary(frame=None):
+    # Je Pfad: Anzahl, Mittel, 95%-Quantil und Maximum der Wandzeit, Summe CPU-Zeit
+    frame = spans() if frame is None else frame
+    if frame.empty:
+        return pd.DataFrame()
+    grouped = frame.groupby(["path", "kind"])
+    table = pd.DataFrame({
+        "anzahl": grouped.size(),
+        "mittel_s": grouped["wall_s"].mean(),
+        "p95_s": grouped["wall_s"].quantile(0.95),
+        "max_s": grouped["wall_s"].max(),
+        "cpu_s": grouped["cpu_s"].sum(),
+    })
+    return table.sort_values("max_s", ascending=False)
+
+
+def to_jsonl(frame=None):
+    frame = spans() if frame is None else frame
+    return "".join(json.dumps(row, default=str) + "\n" for row in frame.to_dict(orient="records"))
+
+
+def export_jsonl(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(to_jsonl())
+    return path
+
+
+def clear():
+    with _lock:
+        _spans.clear()
+
+
+def sidebar_panel(st, run_started):
+    # Debug-Panel: Spans des aktuellen Seitenaufrufs dieser Session, Übersicht und Export
+    if not (DEBUG or st.query_params.get("debug") == "1"):
+        return
+    frame = spans()
+    with st.sidebar.expander("⏱️ Profiling", expanded=False):
+        if frame.empty:
+            st.write("Noch keine Messungen.")
+            return
+        current = frame[(frame["ts"] >= run_started) & (frame["thread"] == threading.get_ident())]
+        st.write("**Dieser Seitenaufruf**")
+        st.dataframe(current[["path", "kind", "wall_s", "cpu_s", "rss_delta_mb"]]
+                     .sort_values("wall_s", ascending=False)
+                     .style.format({"wall_s": "{:.3f}", "cpu_s": "{:.3f}", "rss_delta_mb": "{:+.1f}"}, na_rep="–"),
+                     hide_index=True)
+        st.write(f"**Alle Spans** ({len(frame)} von max. {MAX_SPANS})")
+        st.dataframe(summary(frame).style.format("{:.3f}", subset=["mittel_s", "p95_s", "max_s", "cpu_s"]))
+        st.download_button("Spans als JSON Lines", to_jsonl(frame), file_name="spans.jsonl",
+                           mime="application/jsonl")
@@ -0,0 +1,169 @@
+# rendering.py
+# Darstellungsschicht für grosse Diagramme: begrenzt die Punkte, die pro Diagramm an den
+# Browser gehen (MAX_POINTS, über STADA_MAX_POINTS änderbar).
+# - Zeitreihen-Linien: LTTB (Largest-Triangle-Three-Buckets), erhält die Form der Kurve
+# - Zeitreihen-Punkte: Min/Max je Bucket, erhält Spitzen und Einbrüche
+# - Punktwolken: Ausdünnung nach Dichte auf einem Raster, dünn besetzte Bereiche und
+#   Ausreisser bleiben vollständig; gezeichnet mit Scattergl (WebGL)
+# - Kerzen: Zusammenfassen benachbarter Kerzen zu gröberen OHLC-Kerzen
+# Über time_window wird ein Zeitausschnitt gewählt; passt er unter MAX_POINTS, wird er in
+# voller Auflösung gezeichnet.
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+MAX_POINTS = int(os.environ.get("STADA_MAX_POINTS", "5000"))
+DENSITY_GRID = 128
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    # Indizes der LTTB-Auswahl; x aufsteigend, ohne NaN
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _numeric(x), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_out):
+    # Je Bucket der kleinste und der grösste Wert (zwei Punkte pro Bucket)
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    buckets = max((n_out - 2) // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((np.asarray(y, dtype=np.float64), bucket))
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket[order]) != 0])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+
+
+def density_indices(x, y, max_points, grid=DENSITY_GRID, random_state=0):
+    # Höchstens `cap` zufällige Punkte pro Rasterzelle; cap so gross wie möglich
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    x, y = _numeric(x), np.asarray(y, dtype=np.float64)
+
+    def cells(v):
+        span = np.nanmax(v) - np.nanmin(v)
+        scaled = (v - np.nanmin(v)) / span if span > 0 else np.zeros_like(v)
+        return np.clip(np.nan_to_num(scaled) * (grid - 1), 0, grid - 1).astype(np.int64)
+
+    cell = cells(x) * grid + cells(y)
+    rng = np.random.default_rng(random_state)
+    perm = rng.permutation(n)
+    order = perm[np.argsort(cell[perm], kind="stable")]
+    _, starts, counts = np.unique(cell[order], return_index=True, return_counts=True)
+    rank = np.arange(n) - np.repeat(starts, counts)
+
+    # Grösstes cap mit Σ min(count, cap) ≤ max_points
+    counts_sorted = np.sort(counts)
+    lo, hi = 0, int(counts_sorted[-1])
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if np.minimum(counts_sorted, mid).sum() <= max_points:
+            lo = mid
+        else:
+            hi = mid - 1
+    if lo == 0:
+        # Mehr belegte Zellen als erlaubte Punkte → einfache Zufallsstichprobe
+        return np.sort(rng.choice(n, size=max_points, replace=False))
+    return np.sort(order[rank < lo])
+
+
+def series_indices(x, y, max_points=None, method="lttb"):
+    max_points = max_points or MAX_POINTS
+    if method == "lttb":
+        return lttb_indices(x, y, max_points)
+    if method == "minmax":
+        return minmax_indices(y, max_points)
+    raise ValueError(f"Unbekanntes Verfahren: {method}")
+
+
+def line_trace(x, y, max_points=None, method="lttb", **kwargs):
+    # Zeitreihe als WebGL-Trace, NaN werden vor der Auswahl entfernt
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    idx = series_indices(x, y, max_points, method)
+    kwargs.setdefault("mode", "lines")
+    return go.Scattergl(x=x[idx], y=y[idx], **kwargs)
+
+
+def decimate_ohlc(frame, max_points=None, overlays=()):
+    # Benachbarte Kerzen zusammenfassen: open=erste, high=max, low=min, close=letzte.
+    # Overlay-Spalten (z.B. gleitendes Mittel, Bänder) nehmen wie close den letzten Wert
+    # des Buckets, damit sie auf denselben x-Positionen liegen wie die Kerzen.
+    max_points = max_points or MAX_POINTS
+    if len(frame) <= max_points:
+        return frame
+    bucket = np.arange(len(frame)) * max_points // len(frame)
+    grouped = frame.groupby(bucket)
+    out = pd.DataFrame({
+        "open": grouped["open"].first(),
+        "high": grouped["high"].max(),
+        "low": grouped["low"].min(),
+        "close": grouped["close"].last(),
+        **{name: grouped[name].last() for name in overlays},
+    })
+    out.index = frame.index[np.flatnonzero(np.r_[True, np.diff(bucket) != 0])]
+    return out
+
+
+def scatter_figure(frame, x, y, color=None, max_points=None, marker_size=4, title=None):
+    # Punktwolke mit Scattergl; Ausdünnung nach Dichte über alle Gruppen gemeinsam
+    max_points = max_points or MAX_POINTS
+    frame = frame.dropna(subset=[x, y])
+    idx = density_indices(frame[x].to_numpy(), frame[y].to_numpy(), max_points)
+    shown = frame.iloc[idx]
+
+    fig = go.Figure()
+    groups = [(None, shown)] if color is None else sorted(shown.groupby(color, observed=True), key=lambda g: str(g[0]))
+    for name, group in groups:
+        fig.add_trace(go.Scattergl(
+            x=group[x], y=group[y], mode="markers", name=y if name is None else f"{color} {name}",
+            marker=dict(size=marker_size, opacity=0.6),
+        ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y, height=500,
+                      margin=dict(l=40, r=40, t=40 if title else 20, b=40))
+    return fig, len(shown), len(frame)
+
+
+def time_window(datum, key, label="Zeitraum"):
+    # Zeitausschnitt wählen; kleine Ausschnitte werden in voller Auflösung gezeichnet
+    datum = pd.to_datetime(pd.Series(datum)).dropna()
+    if datum.empty:
+        return None, None
+    start, end = datum.min().to_pydatetime(), datum.max().to_pydatetime()
+    if start == end:
+        return pd.Timestamp(start), pd.Timestamp(end)
+    lo, hi = st.slider(label, min_value=start, max_value=end, value=(start, end), format="DD.MM.YYYY", key=key)
+    return pd.Timestamp(lo), pd.Timestamp(hi)
+
+
+def caption(shown, total, method, hint="für volle Auflösung den Zeitraum verkleinern"):
+    if shown < total:
+        text = f"Darstellung: {shown:,} von {total:,} Punkten ({method})".replace(",", "'")
+        st.caption(f"{text}; {hint}." if hint else f"{text}.")
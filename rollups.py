@@ -0,0 +1,125 @@
+# rollups.py
+# Voraggregierte Zeitreihen für die Zeitreihen-Seite.
+# Stadtweit (Mittel über alle Standorte je Stunde) werden für jede Auflösung OHLC, Mittelwert
+# und Anzahl einmalig berechnet. Pro Zählstelle wird nur die stündliche Tabelle (Stundensumme,
+# float32) gehalten; gröbere Auflösungen entstehen bei Bedarf für die gewählte Zählstelle.
+# OHLC-Kerzen enthalten wie bisher nur Stunden mit Wert der gewählten Vergleichsvariable.
+import pandas as pd
+
+from join_engine import aligned_index
+from profiling import instrument
+from memo import memo_by_identity
+
+COUNT_COLS = ["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]
+WETTER_COLS = ["temp", "humidity", "wind_speed", "clouds_all", "feels_like", "visibility"]
+
+# Auswahl auf der Seite → pandas-Resampling-Regel
+RESOLUTIONS = {"H": "h", "H4": "4h", "D": "D", "W": "W"}
+STATS = ["first", "max", "min", "last", "mean", "count"]
+
+
+def _rollup(frame, rule):
+    # Ein Resampling-Durchlauf je Kennzahl, vektorisiert über alle Spalten
+    resampler = frame.resample(rule)
+    parts = {stat: getattr(resampler, stat)() for stat in STATS}
+    return pd.concat(parts, axis=1)
+
+
+def _series_rollup(series, rule):
+    # Wie _rollup für eine einzelne Reihe: Spalten = STATS
+    resampler = series.resample(rule)
+    return pd.DataFrame({stat: getattr(resampler, stat)() for stat in STATS})
+
+
+def _station_key(mobility_df):
+    for key in ("FK_ZAEHLER", "FK_STANDORT"):
+        if key in mobility_df.columns:
+            return key
+    return None
+
+
+class RollupStore:
+    def __init__(self, city, station_hourly, weather, station_ids):
+        self.city = city
+        # Lückenloses Stundenraster × (Merkmal, Station), float32; None ohne Stationsschlüssel
+        self.station_hourly = station_hourly
+        self.weather = weather
+        self.station_ids = station_ids
+        # Stadtweite OHLC-Tabellen je (Vergleichsvariable, Auflösung), bei Bedarf berechnet
+        self._city_by_compare = {}
+
+    def _with_compare(self, hourly, compare):
+        # Nur Stunden, in denen alle Zählwerte und der Vergleichswert vorhanden sind – wie früher
+        # der innere Merge mit dem Wetter samt dropna() vor dem Resampling
+        weather = self.weather["H"][compare].reindex(hourly.index)
+        keep = (weather.notna() & hourly.notna().all(axis=1)).to_numpy()
+        return hourly[keep], weather[keep]
+
+    def ohlc(self, target, compare, interval, station=None):
+        # Spalten open/high/low/close/compare wie bisher auf der Seite berechnet
+        rule = RESOLUTIONS[interval]
+        if station is None:
+            key = (compare, interval)
+            if key not in self._city_by_compare:
+                hourly, weather = self._with_compare(self.city["H"]["last"], compare)
+                self._city_by_compare[key] = (_rollup(hourly, rule), weather.resample(rule).mean())
+            table, weather = self._city_by_compare[key]
+            table = table.xs(target, axis=1, level=1)
+        else:
+            hourly, weather = self._with_compare(
+                self.station_hourly[[(target, station)]].astype("float64"), compare)
+            table = _series_rollup(hourly.iloc[:, 0], rule)
+            weather = weather.resample(rule).mean()
+
+        out = table[["first", "max", "min", "last"]].astype("float64")
+        out.columns = ["open", "high", "low", "close"]
+        out["compare"] = weather
+        return out.dropna()
+
+    def hourly(self, target, stations=False):
+        # Stündliche Werte auf lückenlosem Stundenraster (fehlende Stunden = NaN):
+        # stadtweites Mittel als Series oder mit stations=True alle Zählstellen als Spalten
+        if not stations:
+            return self.city["H"]["last"][target].astype("float64")
+        return self.station_hourly[target].astype("float64")
+
+
+def build_rollups(mobility_df, df):
+    hours = aligned_index(df)
+    counts = mobility_df[["DATUM"] + COUNT_COLS].astype({c: "float64" for c in COUNT_COLS})
+
+    # Stadtweit: Mittel über alle Standorte pro Stunde, nur Stunden mit Wetterdaten
+    city_hourly = counts.groupby("DATUM")[COUNT_COLS].mean()
+    city_hourly = city_hourly[city_hourly.index.isin(hours)]
+
+    # Pro Zählstelle: Stundensumme, breit (Spalten = (Merkmal, Station))
+    key = _station_key(mobility_df)
+    station_hourly = None
+    station_ids = []
+    if key is not None:
+        per_station = (
+            counts.assign(station=mobility_df[key].astype(str))
+            .groupby(["DATUM", "station"])[COUNT_COLS]
+            .sum(min_count=1)
+        )
+        station_hourly = per_station.unstack("station").sort_index()
+        station_hourly = station_hourly[station_hourly.index.isin(hours)]
+        station_hourly = station_hourly.asfreq("h").astype("float32")
+        station_ids = sorted(station_hourly.columns.get_level_values("station").unique())
+
+    weather_cols = [c for c in WETTER_COLS if c in df.columns]
+    weather_hourly = df.set_index("DATUM")[weather_cols].astype("float64").sort_index()
+
+    city, weather = {}, {}
+    for interval, rule in RESOLUTIONS.items():
+        city[interval] = _rollup(city_hourly, rule)
+        weather[interval] = weather_hourly.resample(rule).mean()
+
+    return RollupStore(city, station_hourly, weather, station_ids)
+
+
+@memo_by_identity
+@instrument("rollups", "prep")
+def get_rollups(mobility_df, df):
+    # Wiederverwendung, solange data_layer dieselben Frames liefert
+    return build_rollups(mobility_df, df)
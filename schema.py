@@ -0,0 +1,152 @@
+# schema.py
+# Explizite, kompakte Datentypen für Mobility-, Wetter- und Standortdaten.
+# Zählwerte → nullable UInt16, wiederholte Strings → category, Messwerte → float32.
+import hashlib
+
+import pandas as pd
+
+DATETIME = "datetime"
+COUNT = "UInt16"
+
+MOBILITY_SCHEMA = {
+    "FK_ZAEHLER": "category",
+    "FK_STANDORT": "Int32",
+    "DATUM": DATETIME,
+    "VELO_IN": COUNT,
+    "VELO_OUT": COUNT,
+    "FUSS_IN": COUNT,
+    "FUSS_OUT": COUNT,
+    "OST": "Int32",
+    "NORD": "Int32",
+}
+
+WETTER_SCHEMA = {
+    "dt": "int64",
+    "dt_iso": DATETIME,
+    "timezone": "Int32",
+    "city_name": "category",
+    "lat": "float32",
+    "lon": "float32",
+    "temp": "float32",
+    "visibility": "float32",
+    "dew_point": "float32",
+    "feels_like": "float32",
+    "temp_min": "float32",
+    "temp_max": "float32",
+    "pressure": "Int16",
+    "sea_level": "float32",
+    "grnd_level": "float32",
+    "humidity": "Int16",
+    "wind_speed": "float32",
+    "wind_deg": "Int16",
+    "wind_gust": "float32",
+    "rain_1h": "float32",
+    "rain_3h": "float32",
+    "snow_1h": "float32",
+    "snow_3h": "float32",
+    "clouds_all": "Int16",
+    "weather_id": "Int16",
+    "weather_main": "category",
+    "weather_description": "category",
+    "weather_icon": "category",
+}
+
+STANDORTE_SCHEMA = {
+    "abkuerzung": "category",
+    "bezeichnung": "category",
+    "bis": DATETIME,
+    "fk_zaehler": "category",
+    "id1": "Int32",
+    "richtung_in": "category",
+    "richtung_out": "category",
+    "von": DATETIME,
+    "objectid": "Int32",
+    "korrekturfaktor": "float32",
+}
+
+# Format der von/bis-Spalten in zurich_standorte.csv (z.B. 20101130000000)
+STANDORTE_DATE_FORMAT = "%Y%m%d%H%M%S"
+
+# Zuletzt gemessene Speicherersparnis je Frame (siehe memory_report)
+_memory_report = {}
+
+
+def schema_key(schema):
+    # Kurzer Hash, damit Caches bei geänderten Schemas neu aufgebaut werden
+    return hashlib.blake2b(repr(sorted(schema.items())).encode(), digest_size=4).hexdigest()
+
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _to_datetime(series, date_format=None):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if date_format is not None:
+        # von/bis liegen teils als float vor (NaN bei offenen Zeitfenstern)
+        as_text = series.astype("Int64").astype("string")
+        return pd.to_datetime(as_text, format=date_format, errors="coerce")
+    return pd.to_datetime(series, errors="coerce")
+
+
+def apply_schema(df, schema, name=None, date_format=None):
+    # Wandelt alle im Schema bekannten Spalten um; unbekannte Spalten bleiben unverändert.
+    # Gibt (df, report) zurück; report enthält Speicher vorher/nachher in Bytes.
+    before = frame_memory(df)
+
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        try:
+            if dtype == DATETIME:
+                df[col] = _to_datetime(df[col], date_format)
+            elif dtype == COUNT or dtype.startswith(("Int", "UInt")):
+                df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+            else:
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError, OverflowError) as e:
+            print(f"⚠️ Spalte {col} konnte nicht nach {dtype} umgewandelt werden:", e)
+
+    after = frame_memory(df)
+    report = {"before": before, "after": after, "saved": before - after}
+    if name is not None:
+        _memory_report[name] = report
+    return df, report
+
+
+def record_memory(name, report):
+    # Für Frames aus dem Cache: zuvor gemessene Werte übernehmen
+    if report:
+        _memory_report[name] = report
+
+
+def memory_report():
+    return {name: dict(report) for name, report in _memory_report.items()}
+
+
+def print_memory_report():
+    for name, report in _memory_report.items():
+        mb = {k: v / 1e6 for k, v in report.items()}
+        print(f"ℹ️ Speicher {name}: {mb['before']:.1f} MB → {mb['after']:.1f} MB (−{mb['saved']:.1f} MB)")
+
+
+def concat_frames(frames):
+    # pd.concat fällt bei unterschiedlichen Kategorien auf object zurück;
+    # daher vorher die Kategorien aller Teile vereinigen.
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    cat_cols = [c for c in frames[0].columns if isinstance(frames[0][c].dtype, pd.CategoricalDtype)]
+    for col in cat_cols:
+        union = pd.api.types.union_categoricals(
+            [f[col] for f in frames if col in f.columns], ignore_order=True
+        ).categories
+        frames = [
+            f.assign(**{col: f[col].cat.set_categories(union)}) if col in f.columns else f
+            for f in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
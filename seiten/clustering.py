@@ -2,10 +2,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans, MeanShift, AgglomerativeClustering
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
+from feature_store import get_feature_store, FEATURES, CALENDAR_FEATURES
+from clustering_engine import run, cached_sweep, METHODS, SILHOUETTE_SAMPLE
+from model_registry import cached_fit
+from pca_engine import cached_pca
+from rendering import scatter_figure, caption
+from profiling import profiled_chart
 
 def show(df):
     st.title("🔀 Clustering – Vergleich von Methoden")
@@ -27,73 +29,64 @@ def show(df):
     """)
 
 
-    # Zeitliche Features
-    df = df.copy()
-    df["weekday"] = df["DATUM"].dt.weekday
-    df["hour"] = df["DATUM"].dt.hour
+    # Standardisierte Merkmale (inkl. Wochentag/Stunde und Kalender) aus dem gemeinsamen Feature-Store
+    store = get_feature_store(df)
 
-    # Auswahl an Variablen
-    features = [
-        "VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT",
-        "temp", "humidity", "wind_speed", "clouds_all",
-        "dew_point", "feels_like", "pressure", "visibility",
-        "weekday", "hour"
-    ]
+    # Auswahl an Variablen; Kalendermerkmale (0/1) wählbar, aber nicht vorausgewählt
+    features = FEATURES
 
-    selected = st.multiselect("Variablen fürs Clustering", features, default=features)
+    selected = st.multiselect("Variablen fürs Clustering", features,
+                              default=[f for f in features if f not in CALENDAR_FEATURES])
 
     if len(selected) < 2:
         st.warning("Bitte mindestens zwei Variablen auswählen.")
         return
 
-    df_cluster = df[selected].dropna()
-    X_scaled = StandardScaler().fit_transform(df_cluster)
+    X_scaled = store.matrix(selected)
 
     st.subheader("🔧 Cluster-Methode wählen")
-    method = st.selectbox("Clustering-Methode", ["KMeans", "Hierarchical (Bottom-Up)", "Hierarchical (Top-Down – simuliert)", "MeanShift"])
-
-    if method == "KMeans":
-        k = st.slider("Anzahl Cluster (k)", 2, 10, 4)
-        model = KMeans(n_clusters=k, random_state=42)
-        labels = model.fit_predict(X_scaled)
-
-    elif method == "Hierarchical (Bottom-Up)":
+    method = st.selectbox("Clustering-Methode", METHODS)
+
+    if method == "KMeans" and st.checkbox("k-Sweep anzeigen (Elbow & Silhouette für k = 2..10)"):
+        # Alle k parallel fitten; danach ist jede Wahl am Slider ein Cache-Treffer
+        sweep = cached_sweep("cluster", store.version, selected, X_scaled, {"method": "KMeans"})
+        col1, col2 = st.columns(2)
+        col1.write("Inertia (Elbow)")
+        col1.line_chart(sweep["inertia"])
+        col2.write(f"Silhouette (Stichprobe ≤ {SILHOUETTE_SAMPLE})")
+        col2.line_chart(sweep["silhouette"])
+
+    if method == "MeanShift":
+        k = None
+    else:
         k = st.slider("Anzahl Cluster (k)", 2, 10, 4)
-        model = AgglomerativeClustering(n_clusters=k)
-        labels = model.fit_predict(X_scaled)
 
-    elif method == "Hierarchical (Top-Down – simuliert)":
-        # Simuliere durch invertiertes Agglomerative Clustering (nicht perfekt)
-        k = st.slider("Anzahl Cluster (k)", 2, 10, 4)
-        model = AgglomerativeClustering(n_clusters=k)
-        labels = model.fit_predict(X_scaled[::-1])  # Reverse für simulierten "Top-Down-Effekt"
+    params = {"method": method, "k": k, "random_state": 42}
+    result, aus_cache = cached_fit("cluster", store.version, selected, params,
+                                   lambda: run(method, X_scaled, k=k))
+    labels = result["labels"]
+    k = result["k"]
 
-    elif method == "MeanShift":
-        model = MeanShift()
-        labels = model.fit_predict(X_scaled)
-        k = len(np.unique(labels))
+    if method == "MeanShift":
         st.write(f"→ Anzahl automatisch erkannter Cluster: {k}")
-
-    else:
-        st.error("Unbekannte Methode.")
-        return
+    info = f"⏱ {result['variant']}: {result['seconds']:.2f} s"
+    if result["sample"] < len(X_scaled):
+        info += f" (Fit auf Stichprobe von {result['sample']} aus {len(X_scaled)} Stunden, Rest über nächstes Zentrum)"
+    if aus_cache:
+        info += " – aus dem Modell-Cache"
+    st.caption(info)
 
     # PCA zur Darstellung
-    components = PCA(n_components=2).fit_transform(X_scaled)
+    _, scores = cached_pca(store.version, selected, X_scaled)
+    components = scores[:, :2]
     pca_df = pd.DataFrame(components, columns=["PC1", "PC2"])
     pca_df["Cluster"] = labels.astype(str)
 
     st.subheader(f"📍 Cluster Visualisierung ({method})")
-    fig, ax = plt.subplots(figsize=(6, 6))
-    for cluster in sorted(pca_df["Cluster"].unique()):
-        cluster_data = pca_df[pca_df["Cluster"] == cluster]
-        ax.scatter(cluster_data["PC1"], cluster_data["PC2"], label=f"Cluster {cluster}", alpha=0.6)
-
-    ax.set_xlabel("PC1")
-    ax.set_ylabel("PC2")
-    ax.set_title("Cluster in PCA-2D-Projektion")
-    ax.legend()
-    st.pyplot(fig)
+    fig, shown, total = scatter_figure(pca_df, "PC1", "PC2", color="Cluster",
+                                       title="Cluster in PCA-2D-Projektion")
+    profiled_chart(st.plotly_chart, fig, use_container_width=True)
+    caption(shown, total, "Ausdünnung nach Dichte", hint=None)
 
     st.write("""
     **Interpretation:**  
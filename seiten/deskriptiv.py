@@ -1,25 +1,13 @@
 # seiten/deskriptiv.py
 import streamlit as st
 import pandas as pd
+from rendering import line_trace, time_window, caption
+from correlation import METHODS, cached_corr, style_corr
+from data_layer import dataset_version, get_summaries
+from profiling import profiled_chart
 
-def highlight_corr(val):
-    try:
-        if val >= 0.75:
-            return "background-color: lightgreen"
-        elif val >= 0.5:
-            return "background-color: turquoise"
-        elif val >= 0.25:
-            return "background-color: lightblue"
-        elif val <= -0.75:
-            return "background-color: red"
-        elif val <= -0.5:
-            return "background-color: orange"
-        elif val <= -0.25:
-            return "background-color: yellow"
-        else:
-            return ""
-    except:
-        return ""
+def corr_method(key):
+    return st.radio("Korrelationsmass", list(METHODS), format_func=METHODS.get, horizontal=True, key=key)
 
 def show(mobility_df, wetter_df, df):
     st.title("📊 Deskriptive Statistik")
@@ -44,12 +32,12 @@ def show(mobility_df, wetter_df, df):
         st.subheader("Grundstatistik – Mobility")
         cols = ["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]
 
-        # Nur Zeilen, in denen mindestens eine Zielvariable gültig ist
-        mobility_valid = mobility_df.dropna(subset=cols, how="all")
+        # Kennzahlen werden beim Laden einmal pro Datenstand berechnet (auch im Streaming-Modus)
+        summary = get_summaries()["mobility"]
 
-        st.write(f"Anzahl gültiger Zeitpunkte: {len(mobility_valid)} von {len(mobility_df)}")
+        st.write(f"Anzahl gültiger Zeitpunkte: {summary.rows_any} von {summary.rows}")
 
-        st.dataframe(mobility_valid[cols].describe())
+        profiled_chart(st.dataframe, summary.describe(cols))
 
         st.write("""
         **Interpretation:**  
@@ -59,7 +47,7 @@ def show(mobility_df, wetter_df, df):
         """)
 
         st.subheader("Fehlende Werte")
-        st.dataframe(mobility_df[cols].isnull().sum().to_frame("Fehlend"))
+        profiled_chart(st.dataframe, summary.nulls(cols).to_frame("Fehlend"))
 
         st.write("""
         **Interpretation:**  
@@ -70,7 +58,7 @@ def show(mobility_df, wetter_df, df):
 
         st.subheader("Histogramm")
         selected = st.selectbox("Spalte wählen", cols)
-        st.bar_chart(mobility_valid[selected].dropna().value_counts().sort_index())
+        st.bar_chart(summary.histogram(selected))
 
         st.write("""
         **Interpretation:**  
@@ -79,8 +67,14 @@ def show(mobility_df, wetter_df, df):
         """)
 
         st.subheader("Korrelationen")
-        corr = mobility_valid[cols].corr()
-        st.dataframe(corr.style.applymap(highlight_corr).format("{:.2f}"))
+        if mobility_df.empty:
+            st.info("Rohdaten sind im Streaming-Modus nicht geladen (nur Stundenaggregate).")
+            return
+
+        # Paarweise vollständige Zeilen; reine NaN-Zeilen ändern daran nichts → Rohdaten direkt
+        method = corr_method("corr_mobility")
+        corr = cached_corr(dataset_version(), cols, mobility_df, method, source="mobility")
+        profiled_chart(st.dataframe, style_corr(corr))
 
         st.write("""
         **Interpretation:**  
@@ -90,8 +84,9 @@ def show(mobility_df, wetter_df, df):
 
     elif section == "🌦 Wetterdaten":
         st.subheader("Grundstatistik – Wetter")
-        numeric = wetter_df.select_dtypes(include="number").columns
-        st.dataframe(wetter_df[numeric].describe())
+        summary = get_summaries()["wetter"]
+        numeric = list(summary.columns)
+        profiled_chart(st.dataframe, summary.describe())
 
         st.write("""
         **Interpretation:**  
@@ -100,15 +95,16 @@ def show(mobility_df, wetter_df, df):
         """)
 
         st.subheader("Fehlende Werte")
-        st.dataframe(wetter_df[numeric].isnull().sum().to_frame("Fehlend"))
+        profiled_chart(st.dataframe, summary.nulls().to_frame("Fehlend"))
 
         st.subheader("Histogramm")
-        selected = st.selectbox("Wetterspalte wählen", list(numeric))
-        st.bar_chart(wetter_df[selected].dropna().value_counts().sort_index())
+        selected = st.selectbox("Wetterspalte wählen", numeric)
+        st.bar_chart(summary.histogram(selected))
 
         st.subheader("Korrelationen")
-        corr = wetter_df[numeric].corr()
-        st.dataframe(corr.style.applymap(highlight_corr).format("{:.2f}"))
+        method = corr_method("corr_wetter")
+        corr = cached_corr(dataset_version(), numeric, wetter_df, method, source="wetter")
+        profiled_chart(st.dataframe, style_corr(corr))
 
         st.write("""
         **Interpretation:**  
@@ -124,11 +120,12 @@ def show(mobility_df, wetter_df, df):
             "dew_point", "feels_like", "pressure", "visibility"
         ]
 
-        kombi_df = df[mobility_cols + wetter_cols].dropna(how="any")
-        corr = kombi_df.corr()
+        method = corr_method("corr_kombi")
+        corr = cached_corr(dataset_version(), mobility_cols + wetter_cols,
+                           lambda: df[mobility_cols + wetter_cols].dropna(how="any"), method, source="kombi")
 
         st.write("🔢 Farblich formatierte Korrelationsmatrix")
-        st.dataframe(corr.style.applymap(highlight_corr).format("{:.2f}"))
+        profiled_chart(st.dataframe, style_corr(corr))
 
         st.write("""
         **Interpretation:**  
@@ -143,23 +140,25 @@ def show(mobility_df, wetter_df, df):
         y_var = st.selectbox("Bewegungsvariable (als Punkte)", mobility_cols, key="bewegungspunkte")
 
         df_plot = df[["DATUM", x_var, y_var]].dropna()
+        lo, hi = time_window(df_plot["DATUM"], key="kombi_zeitraum")
+        if lo is not None:
+            df_plot = df_plot[(df_plot["DATUM"] >= lo) & (df_plot["DATUM"] <= hi)]
 
         fig = go.Figure()
 
-        # Bewegungspunkte
-        fig.add_trace(go.Scatter(
-            x=df_plot["DATUM"],
-            y=df_plot[y_var],
+        # Bewegungspunkte (Min/Max je Bucket, damit Spitzen sichtbar bleiben)
+        points = line_trace(
+            df_plot["DATUM"], df_plot[y_var], method="minmax",
             mode="markers",
             name=y_var,
             marker=dict(color="blue", size=4),
             yaxis="y1"
-        ))
+        )
+        fig.add_trace(points)
 
         # Wetterlinie (eigene Achse rechts)
-        fig.add_trace(go.Scatter(
-            x=df_plot["DATUM"],
-            y=df_plot[x_var],
+        fig.add_trace(line_trace(
+            df_plot["DATUM"], df_plot[x_var],
             mode="lines",
             name=x_var,
             line=dict(color="orange", width=2),
@@ -176,7 +175,8 @@ def show(mobility_df, wetter_df, df):
             margin=dict(l=40, r=40, t=40, b=40)
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        profiled_chart(st.plotly_chart, fig, use_container_width=True)
+        caption(len(points.x), len(df_plot), "Min/Max je Zeitabschnitt")
 
         st.write(f"""
               **Interpretation:**  
@@ -2,14 +2,22 @@
 # seiten/mlr.py
 import streamlit as st
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_squared_error
 import matplotlib.pyplot as plt
 import numpy as np
 import scipy.stats as stats
-
-def show(df):
+from feature_store import get_feature_store, WETTER_FEATURES, TIME_FEATURES, CALENDAR_FEATURES
+from stations import get_station_index
+from model_registry import cached_fit
+from mlr_engine import get_sufficient_stats, build_sufficient_stats
+from cross_validation import SCHEMES, cross_validate
+from feature_selection import METHODS, CRITERIA, search
+from rendering import scatter_figure, caption
+from correlation import cached_corr, style_corr
+from rollups import get_rollups
+from anomalies import get_anomalies, flagged_hours
+from profiling import profiled_chart
+
+def show(df, mobility_df=None, standorte_df=None):
     st.title("📈 Multiple Lineare Regression (MLR)")
 
     st.subheader("Theorie")
@@ -22,17 +30,40 @@ def show(df):
     # Zielvariable
     target = st.selectbox("Zielvariable wählen", ["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"])
 
-    # Zusatzfeatures erzeugen: Wochentag & Stunde
-    df = df.copy()
-    df["weekday"] = df["DATUM"].dt.weekday
-    df["hour"] = df["DATUM"].dt.hour
+    # Optional: nur ausgewählte Zählstellen (mit Korrekturfaktor) statt Stadtsumme
+    stationen = []
+    if mobility_df is not None and not mobility_df.empty and standorte_df is not None:
+        station_index = get_station_index(mobility_df, standorte_df)
+        meta = station_index.stations
+
+        def station_label(key):
+            if "abkuerzung" in meta.columns and pd.notna(meta.at[key, "abkuerzung"]):
+                return f"{meta.at[key, 'abkuerzung']} – {meta.at[key, 'bezeichnung']} ({key})"
+            return key
+
+        stationen = st.multiselect("Zählstellen (leer = ganze Stadt)", list(meta.index), format_func=station_label)
+
+    # Auffällige Stunden (Feste, Ausfälle) aus dem Anomalie-Detektor ausschliessen
+    ausreisser = pd.DatetimeIndex([])
+    if mobility_df is not None and not mobility_df.empty:
+        if st.checkbox("Auffällige Stunden ausschliessen (Feste, Feiertage, Ausfälle)"):
+            flags = get_anomalies(get_rollups(mobility_df, df)).flagged()
+            ausreisser = flagged_hours(flags, target, stationen)
+            st.caption(f"{len(ausreisser)} auffällige Stunden für {target} werden nicht verwendet.")
+    maskiert = len(ausreisser) > 0
+
+    # Zusatzfeatures (Wochentag & Stunde) liegen bereits im Feature-Store
+    store = get_feature_store(df)
 
     add_time = st.checkbox("Wochentag und Uhrzeit als Features einbeziehen", value=True)
+    # Feiertage, Schulferien und Grossanlässe (beim Laden aus dem Kalender übernommen)
+    add_calendar = st.checkbox("Feiertage, Schulferien und Anlässe als Features einbeziehen", value=True)
     # Wettermerkmale
-    wetter_vars = ["temp", "humidity", "wind_speed", "clouds_all",
-                   "dew_point", "feels_like", "pressure", "visibility"]
+    wetter_vars = list(WETTER_FEATURES)
     if add_time:
-        wetter_vars += ["weekday", "hour"]
+        wetter_vars += list(TIME_FEATURES)
+    if add_calendar:
+        wetter_vars += CALENDAR_FEATURES
 
     # Auswahl
     features = st.multiselect("Wähle Variablen aus", wetter_vars, default=wetter_vars)
@@ -43,7 +74,17 @@ def show(df):
         return
 
     # Daten vorbereiten
-    df_ml = df[[target] + features].dropna()
+    def model_frame(columns):
+        frame = store.frame([target] + columns)
+        if stationen:
+            # Zielgrösse durch korrigierte Stundensumme der gewählten Zählstellen ersetzen
+            y_station = station_index.hourly(stationen)[target]
+            frame = frame.drop(columns=[target]).assign(**{target: y_station.reindex(frame.index)}).dropna()
+        if maskiert:
+            frame = frame[~frame.index.isin(ausreisser)]
+        return frame
+
+    df_ml = model_frame(features)
     X = df_ml[features]
     y = df_ml[target]
 
@@ -51,25 +92,9 @@ def show(df):
     st.subheader("🧮 Korrelation der unabhängigen Variablen")
 
     if len(features) >= 2:
-        corr = X.corr()
-
-        def highlight_corr(val):
-            if val >= 0.75:
-                return "background-color: lightgreen"
-            elif val >= 0.5:
-                return "background-color: turquoise"
-            elif val >= 0.25:
-                return "background-color: lightblue"
-            elif val <= -0.75:
-                return "background-color: red"
-            elif val <= -0.5:
-                return "background-color: orange"
-            elif val <= -0.25:
-                return "background-color: yellow"
-            else:
-                return ""
-
-        st.dataframe(corr.style.applymap(highlight_corr).format("{:.2f}"))
+        corr = cached_corr(store.version, features, X, target=target, stations=tuple(stationen), masked=maskiert,
+                           source="mlr")
+        profiled_chart(st.dataframe, style_corr(corr))
 
         st.write("""
         **Hinweis:**  
@@ -80,45 +105,99 @@ def show(df):
         st.info("Mindestens 2 Variablen auswählen, um Korrelationen zu sehen.")
 
     # -------------------
-    # Modelltraining
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
+    # Kreuzvalidierung statt eines einzelnen Zufalls-Splits (Ergebnis wird pro Datenstand,
+    # Ziel, Auswahl und Schema gecacht)
+    st.subheader("📊 Modellgüte (Kreuzvalidierung)")
+    col1, col2 = st.columns(2)
+    schema_label = col1.selectbox("Validierungsschema", list(SCHEMES), index=1)
+    n_splits = col2.slider("Anzahl Folds", 3, 10, 5)
+    scheme = SCHEMES[schema_label]
+
+    def fit():
+        table, summary, predictions = cross_validate(X.to_numpy(), y.to_numpy(), scheme, n_splits, random_state=42)
+        return {"table": table, "summary": summary, "predictions": predictions}
+
+    params = {"target": target, "stations": tuple(stationen), "masked": maskiert, "scheme": scheme,
+              "n_splits": n_splits, "random_state": 42}
+    cv, _ = cached_fit("mlr_cv", store.version, features, params, fit)
+    summary = cv["summary"]
+    tested = ~np.isnan(cv["predictions"])
+    y_test = y[tested]
+    y_pred = cv["predictions"][tested]
     residuen = y_test - y_pred
 
-    # -------------------
-    st.subheader("📊 Modellgüte")
-    st.write(f"**R²:** {r2_score(y_test, y_pred):.3f}")
-    st.write(f"**RMSE:** {np.sqrt(mean_squared_error(y_test, y_pred)):.2f}")
+    st.write(f"**R²:** {summary['r2_mean']:.3f} ± {summary['r2_std']:.3f}")
+    st.write(f"**RMSE:** {summary['rmse_mean']:.2f} ± {summary['rmse_std']:.2f}")
+    profiled_chart(st.dataframe, cv["table"].rename(columns={"n_train": "Training", "n_test": "Test", "r2": "R²", "rmse": "RMSE"})
+                 .style.format({"R²": "{:.3f}", "RMSE": "{:.2f}"}))
+    if scheme == "timeseries":
+        st.caption("Expandierendes Zeitfenster: jeder Fold trainiert nur auf Stunden vor seinem Testblock.")
+    else:
+        st.caption("K-Fold mit zufälliger Zuteilung der Stunden; bei Zeitreihen eher optimistisch.")
 
     st.write("""
     **Interpretation:** 
     eine Korrelation zwischen Wetter und Anzahl FunssgängerInnen und Fahrradfahrenden ist vorhanden,
     ein Teil der Varianz kann durch das Wetter erklärt werden.
     Sie hängt aber auch sehr stark von anderen Faktoren wie Uhrzeit, Wochentag, Feiertage usw ab.
+    (feiertag, schulferien und event sind 0/1-Merkmale aus dem Zürcher Kalender.)
     """)
 
 
     # -------------------
     st.subheader("📉 Koeffizienten")
-    coeff_df = pd.DataFrame({
-        "Merkmal": features,
-        "Koeffizient": model.coef_
-    })
-    st.dataframe(coeff_df)
+    # Geschlossene OLS-Lösung aus der vorberechneten Gram-Matrix (kein Durchlauf über die Zeilen)
+    if stationen or maskiert:
+        suff, _ = cached_fit("mlr_stats", store.version, features,
+                             {"target": target, "stations": tuple(stationen), "masked": maskiert},
+                             lambda: build_sufficient_stats(df_ml[features + [target]].to_numpy(), features + [target]))
+    else:
+        suff = get_sufficient_stats(store)
+    ols = suff.solve(target, features)
+    profiled_chart(st.dataframe, ols["table"].style.format({
+        "Koeffizient": "{:.4f}", "Std.-Fehler": "{:.4f}", "t-Wert": "{:.2f}", "p-Wert": "{:.3g}"
+    }))
+    st.caption(f"OLS auf allen {ols['n']} vollständigen Stunden (R² = {ols['r2']:.3f}).")
 
     st.write("""
     **Interpretation:**  
     Ein positiver Koeffizient bedeutet: Wenn die Variable steigt, nimmt die Zielgrösse im Modell zu.  
     Ein negativer Koeffizient bedeutet: Wenn die Variable steigt, sinkt die Zielgrösse.  
-    Die Höhe des Wertes zeigt die *Stärke* des Einflusses bei gleichbleibender Skala.
+    Die Höhe des Wertes zeigt die *Stärke* des Einflusses bei gleichbleibender Skala.  
+    Der t-Wert (Koeffizient / Standardfehler) zeigt, ob ein Einfluss von 0 unterscheidbar ist;  
+    Faustregel: |t| > 2 bzw. p-Wert < 0.05.
     """)
 
+    # -------------------
+    st.subheader("🔎 Automatische Merkmalsauswahl")
+    if st.checkbox("Beste Merkmalskombination suchen"):
+        col1, col2 = st.columns(2)
+        method_label = col1.selectbox("Suchverfahren", list(METHODS))
+        criterion = col2.selectbox("Kriterium", CRITERIA)
+        method = METHODS[method_label]
+        # Alle angebotenen Merkmale sind Kandidaten; gemeinsame Zeilenbasis für alle Modelle
+        df_sel = model_frame(wetter_vars)
+
+        def fit_search():
+            return search(df_sel[wetter_vars].to_numpy(), df_sel[target].to_numpy(), wetter_vars,
+                          method, criterion, scheme, n_splits, random_state=42)
+
+        params = {"target": target, "stations": tuple(stationen), "masked": maskiert, "method": method,
+                  "criterion": criterion, "scheme": scheme, "n_splits": n_splits, "random_state": 42}
+        board, _ = cached_fit("mlr_search", store.version, wetter_vars, params, fit_search)
+        st.caption(f"{len(board)} Modelle bewertet, sortiert nach {criterion} (kleiner ist besser).")
+        profiled_chart(st.dataframe, board.drop(columns=["subset"]).head(20).style.format({
+            "R²": "{:.3f}", "AIC": "{:.1f}", "BIC": "{:.1f}", "CV-RMSE": "{:.2f}", "CV-RMSE Std": "{:.2f}"
+        }))
+        st.write(f"**Beste Auswahl:** {board.iloc[0]['Merkmale']}")
+
     # -------------------
     st.subheader("📈 Vorhersage vs. Echtdaten")
+    # Out-of-Fold-Vorhersagen: jede Stunde wird von einem Modell ohne diese Stunde vorhergesagt
     scatter_df = pd.DataFrame({"Echt": y_test, "Vorhersage": y_pred})
-    st.scatter_chart(scatter_df)
+    fig_scatter, shown, total = scatter_figure(scatter_df, "Echt", "Vorhersage")
+    profiled_chart(st.plotly_chart, fig_scatter, use_container_width=True)
+    caption(shown, total, "Ausdünnung nach Dichte", hint=None)
 
     # -------------------
     st.subheader("🔍 Residuenanalyse")
@@ -131,7 +210,7 @@ def show(df):
     ax.plot(x, p, "k", linewidth=2, label="Normalverteilung")
     ax.set_title("Histogramm der Residuen")
     ax.legend()
-    st.pyplot(fig)
+    profiled_chart(st.pyplot, fig)
 
     st.write("""
     **Was bedeutet das?**  
@@ -143,6 +222,8 @@ def show(df):
     - ungefähr normalverteilt
     - rechte Schiefe (langer rechter „Tail“) bedeutet grössere positive Fehler. 
         (z.B. Feste wie das Zürichfest oder Neujahr verziehen hier stark, weil dann deutlich mehr Menschen aktiv sind als sonst.)
+    
+    Mit «Auffällige Stunden ausschliessen» werden solche Stunden aus Training und Validierung entfernt.
     """)
 
     # -------------------
@@ -150,7 +231,7 @@ def show(df):
     fig2, ax2 = plt.subplots()
     stats.probplot(residuen, dist="norm", plot=ax2)
     ax2.set_title("Q-Q-Plot")
-    st.pyplot(fig2)
+    profiled_chart(st.pyplot, fig2)
     st.write("""
     **interpretation**
     Gerade Linie (45°) → Die Residuen sind normalverteilt.
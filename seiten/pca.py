@@ -3,9 +3,12 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from feature_store import get_feature_store, FEATURES, CALENDAR_FEATURES
+from model_registry import cached_fit
+from clustering_engine import kmeans, cached_sweep, SILHOUETTE_SAMPLE
+from pca_engine import SOLVERS, MAX_COMPONENTS, cached_pca
+from rendering import scatter_figure, caption
+from profiling import profiled_chart
 
 def show(df):
     st.title("🧮 PCA – Hauptkomponentenanalyse")
@@ -17,35 +20,33 @@ def show(df):
     Ziel: Muster erkennen, Dimension reduzieren, Visualisierung verbessern.
     """)
 
-    # Zeitliche Zusatzfeatures
-    df = df.copy()
-    df["weekday"] = df["DATUM"].dt.weekday
-    df["hour"] = df["DATUM"].dt.hour
+    # Standardisierte Merkmale (inkl. Wochentag/Stunde und Kalender) aus dem gemeinsamen Feature-Store
+    store = get_feature_store(df)
 
-    default_features = [
-        "VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT",
-        "temp", "humidity", "wind_speed", "clouds_all",
-        "dew_point", "feels_like", "pressure", "visibility",
-        "weekday", "hour"
-    ]
+    # Kalendermerkmale (0/1) sind wählbar, aber nicht vorausgewählt
+    default_features = [f for f in FEATURES if f not in CALENDAR_FEATURES]
 
     st.subheader("📌 Variablenauswahl")
-    selected = st.multiselect("Variablen für PCA", default_features, default=default_features)
+    selected = st.multiselect("Variablen für PCA", FEATURES, default=default_features)
 
     if len(selected) < 2:
         st.warning("Bitte mindestens zwei Variablen auswählen.")
         return
 
-    df_pca = df[selected].dropna()
-    X_scaled = StandardScaler().fit_transform(df_pca)
+    X_scaled = store.matrix(selected)
 
     st.subheader("⚙️ Anzahl Hauptkomponenten")
-    n_components = st.slider("Anzahl Hauptkomponenten", 2, min(len(selected), 10), value=2)
+    n_components = st.slider("Anzahl Hauptkomponenten", 2, min(len(selected), MAX_COMPONENTS), value=2)
+    solver = st.selectbox("PCA-Verfahren", list(SOLVERS), format_func=SOLVERS.get)
 
-    pca = PCA(n_components=n_components)
-    components = pca.fit_transform(X_scaled)
+    # Vollständige Zerlegung und alle Scores einmal pro Datenstand, Auswahl und Verfahren;
+    # der Slider schneidet nur noch ab (randomisierte SVD: nur die gewählten Komponenten).
+    decomposition, scores = cached_pca(store.version, selected, X_scaled, solver, n_components)
+    pca_key = {"solver": solver, "n_components": n_components if solver == "randomized" else None}
+    components = scores[:, :n_components]
+    loadings = decomposition.loadings(n_components)
 
-    explained_var = pca.explained_variance_ratio_
+    explained_var = decomposition.explained(n_components)
     pc_names = [f"PC{i+1}" for i in range(n_components)]
     pca_df = pd.DataFrame(components, columns=pc_names)
 
@@ -53,15 +54,28 @@ def show(df):
     st.subheader("🔵 2D PCA Scatterplot")
 
     if st.checkbox("K-Means-Clustering aktivieren"):
+        X_2d = components[:, :2]
+        if st.checkbox("k-Sweep anzeigen (Elbow & Silhouette für k = 2..10)"):
+            sweep = cached_sweep("pca_kmeans", store.version, selected, X_2d, pca_key)
+            col1, col2 = st.columns(2)
+            col1.write("Inertia (Elbow)")
+            col1.line_chart(sweep["inertia"])
+            col2.write(f"Silhouette (Stichprobe ≤ {SILHOUETTE_SAMPLE})")
+            col2.line_chart(sweep["silhouette"])
+
         k = st.slider("Anzahl Cluster", 2, 10, 4)
-        kmeans = KMeans(n_clusters=k, random_state=42)
-        cluster_labels = kmeans.fit_predict(pca_df[["PC1", "PC2"]])
+        # PC1/PC2 hängen bei exakten Verfahren nicht von der Anzahl Komponenten ab
+        params = {**pca_key, "k": k, "random_state": 42}
+        result, _ = cached_fit("pca_kmeans", store.version, selected, params, lambda: kmeans(X_2d, k))
+        cluster_labels = result["labels"]
         pca_df["Cluster"] = cluster_labels.astype(str)
 
         st.write("Cluster werden farblich dargestellt.")
-        st.scatter_chart(pca_df, x="PC1", y="PC2", color="Cluster")
+        fig_scatter, shown, total = scatter_figure(pca_df, "PC1", "PC2", color="Cluster")
     else:
-        st.scatter_chart(pca_df[["PC1", "PC2"]])
+        fig_scatter, shown, total = scatter_figure(pca_df, "PC1", "PC2")
+    profiled_chart(st.plotly_chart, fig_scatter, use_container_width=True)
+    caption(shown, total, "Ausdünnung nach Dichte", hint=None)
 
     # -------------------
     st.subheader("📈 Erklärte Varianz")
@@ -79,11 +93,11 @@ def show(df):
     fig, ax = plt.subplots(figsize=(6, 6))
     for i, feature in enumerate(selected):
         ax.arrow(0, 0,
-                 pca.components_[0, i],
-                 pca.components_[1, i],
+                 loadings[0, i],
+                 loadings[1, i],
                  head_width=0.05, head_length=0.05, fc='blue', ec='blue')
-        ax.text(pca.components_[0, i]*1.1,
-                pca.components_[1, i]*1.1,
+        ax.text(loadings[0, i]*1.1,
+                loadings[1, i]*1.1,
                 feature,
                 color='black', ha='center', va='center')
 
@@ -95,7 +109,7 @@ def show(df):
     ax.axvline(0, color='grey', lw=1)
     ax.set_xlim(-1, 1)
     ax.set_ylim(-1, 1)
-    st.pyplot(fig)
+    profiled_chart(st.pyplot, fig)
 
     st.write("""
     **Wie liest man die Pfeilgrafik?**
@@ -1,5 +1,6 @@
 # seiten/start.py
 import streamlit as st
+from profiling import profiled_chart
 
 def show(mobility_df, wetter_df):
     st.title("Statistische Auswertung – Zürich Mobility & Wetter")
@@ -16,7 +17,7 @@ def show(mobility_df, wetter_df):
     """)
 
     st.subheader("🚲 Mobility-Daten (Auszug)")
-    st.dataframe(mobility_df.head(100))
+    profiled_chart(st.dataframe, mobility_df.head(100))
 
     st.subheader("🌦 Wetterdaten (Auszug)")
-    st.dataframe(wetter_df.head(100))
+    profiled_chart(st.dataframe, wetter_df.head(100))
@@ -2,6 +2,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+from rollups import get_rollups, RESOLUTIONS
+from rendering import line_trace, decimate_ohlc, time_window, caption
+from forecasting import forecast_all, backtest, naive_wins
+from model_registry import cached_fit
+from data_layer import dataset_version
+from anomalies import get_anomalies, CITY, THRESHOLD
+from profiling import profiled_chart
 
 def show(mobility_df, df):
 
@@ -31,26 +38,29 @@ def show(mobility_df, df):
 
 
     # Zeitintervall wählen
-    interval = st.selectbox("Intervall", ["H4", "D", "W"], index=0)
-    rule_map = {"H4": "4H", "D": "D", "W": "W"}
-    rule = rule_map[interval]
+    interval = st.selectbox("Intervall", list(RESOLUTIONS), index=1)
 
-    # Durchschnitt über alle Standorte pro Stunde berechnen
-    avg = mobility_df.copy()
-    avg["DATUM"] = pd.to_datetime(avg["DATUM"])
-    avg = avg.groupby("DATUM")[["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]].mean().reset_index()
+    if mobility_df.empty:
+        st.info("Rohdaten sind im Streaming-Modus nicht geladen (nur Stundenaggregate).")
+        return
 
-    # Merge mit Wetterdaten
-    df_plot = pd.merge(avg, df[["DATUM", compare_var]], on="DATUM", how="inner").dropna()
-    df_plot = df_plot.set_index("DATUM")
+    # OHLC-Tabellen aller Auflösungen werden beim Laden einmalig berechnet
+    rollups = get_rollups(mobility_df, df)
 
-    # OHLC-Resampling
-    resampled = df_plot.resample(rule).agg({
-        target_var: ["first", "max", "min", "last"],
-        compare_var: "mean"
-    })
-    resampled.columns = ["open", "high", "low", "close", "compare"]
-    resampled = resampled.dropna()
+    alle = "Alle Standorte (Durchschnitt)"
+    station = st.selectbox("Zählstelle", [alle] + rollups.station_ids)
+    station = None if station == alle else station
+
+    # Stündliche Reihe der Auswahl (vor dem Zeitausschnitt) für die Prognose
+    if station is None:
+        hourly = rollups.hourly(target_var).to_frame(alle)
+    else:
+        hourly = rollups.hourly(target_var, stations=True)[[station]]
+
+    resampled = rollups.ohlc(target_var, compare_var, interval, station=station)
+    lo, hi = time_window(resampled.index, key="zeitreihe_zeitraum")
+    if lo is not None:
+        resampled = resampled.loc[lo:hi].copy()
 
 
     # -------- Vergleichsplot (Ziel + Einflussvariable) ----------
@@ -61,12 +71,12 @@ def show(mobility_df, df):
     """)
 
     fig2 = go.Figure()
-    fig2.add_trace(go.Scatter(
-        x=resampled.index, y=resampled["compare"],
+    fig2.add_trace(line_trace(
+        resampled.index, resampled["compare"],
         name=compare_var, line=dict(color="orange")
     ))
-    fig2.add_trace(go.Scatter(
-        x=resampled.index, y=resampled["close"],
+    fig2.add_trace(line_trace(
+        resampled.index, resampled["close"],
         name=target_var, line=dict(color="royalblue")
     ))
 
@@ -76,13 +86,15 @@ def show(mobility_df, df):
         title=f"{target_var} & {compare_var} im Zeitvergleich ({interval})",
         margin=dict(t=30, b=20)
     )
-    st.plotly_chart(fig2, use_container_width=True)
+    profiled_chart(st.plotly_chart, fig2, use_container_width=True)
+    caption(len(fig2.data[1].x), int(resampled["close"].notna().sum()), "LTTB")
 
     # -------- Interpretation --------
     st.subheader("📘 Interpretation")
     st.write(f"""
     - **Kerzenchart**: Gibt dir sofort ein Gefühl für die Dynamik von {target_var} im Tages- oder Wochenverlauf.  
     - **Bollinger-Bänder**: Wenn {target_var} ausserhalb der Bänder liegt, könnte es ein "besonderer" Zeitpunkt sein (z.B. Event, Wetterextrem).
+    - **Auffällige Stunden**: Solche Zeitpunkte werden unten automatisch markiert (Vergleich mit der üblichen Stunde der Woche).
     - **Linienvergleich**: Wenn sich {target_var} und {compare_var} synchron verhalten, kann ein Wettereffekt angenommen werden.
     """)
 
@@ -90,13 +102,15 @@ def show(mobility_df, df):
     st.write("""
         Diese Ansicht zeigt geglättete Zeitreihen als Kerzencharts (OHLC) und Bollinger-Bänder.  
         Grundlage sind die **durchschnittlichen Bewegungswerte über alle Standorte je Stunde
+        (bzw. die Stundensumme einer einzelnen Zählstelle)
         Leider haben die Daten eine extrem hohe Varianz was die Darstellung unschön macht**.
         """)
 
-    # Bollinger-Bänder berechnen
-    resampled["sma20"] = resampled["close"].rolling(20).mean()
-    resampled["upper"] = resampled["sma20"] + 2 * resampled["close"].rolling(20).std()
-    resampled["lower"] = resampled["sma20"] - 2 * resampled["close"].rolling(20).std()
+    # Bollinger-Bänder berechnen (ein Rolling-Durchlauf für Mittel und Streuung)
+    bands = resampled["close"].rolling(20).agg(["mean", "std"])
+    resampled["sma20"] = bands["mean"]
+    resampled["upper"] = bands["mean"] + 2 * bands["std"]
+    resampled["lower"] = bands["mean"] - 2 * bands["std"]
 
     # -------- Candlestick Chart ----------
     st.subheader("📊 Kerzenchart mit Bollinger-Bändern")
@@ -105,7 +119,7 @@ def show(mobility_df, df):
         nicht gut geeignet aber für sonstige Zeitreihen wie FX Charts können
         diese sehr nützlich sein.
         
-        Jede Kerze zeigt 4/24/168 Stunden Bewegung:
+        Jede Kerze zeigt 1/4/24/168 Stunden Bewegung:
         - Open: Beginnwert des Zeitraums  
         - High/Low: Max/Min im Zeitraum  
         - Close: Endwert  
@@ -115,25 +129,28 @@ def show(mobility_df, df):
 
     fig = go.Figure()
 
+    # Zu viele Kerzen → benachbarte Kerzen zu gröberen OHLC-Kerzen zusammenfassen;
+    # SMA und Bänder über dieselben Buckets, damit alle Linien auf den Kerzen liegen
+    candles = decimate_ohlc(resampled, overlays=["sma20", "upper", "lower"])
     fig.add_trace(go.Candlestick(
-        x=resampled.index,
-        open=resampled["open"],
-        high=resampled["high"],
-        low=resampled["low"],
-        close=resampled["close"],
+        x=candles.index,
+        open=candles["open"],
+        high=candles["high"],
+        low=candles["low"],
+        close=candles["close"],
         name=target_var
     ))
 
-    fig.add_trace(go.Scatter(
-        x=resampled.index, y=resampled["sma20"],
+    fig.add_trace(go.Scattergl(
+        x=candles.index, y=candles["sma20"],
         mode="lines", line=dict(color="blue", width=1), name="SMA 20"
     ))
-    fig.add_trace(go.Scatter(
-        x=resampled.index, y=resampled["upper"],
+    fig.add_trace(go.Scattergl(
+        x=candles.index, y=candles["upper"],
         mode="lines", line=dict(color="lightgrey", width=1), name="Upper BB", opacity=0.5
     ))
-    fig.add_trace(go.Scatter(
-        x=resampled.index, y=resampled["lower"],
+    fig.add_trace(go.Scattergl(
+        x=candles.index, y=candles["lower"],
         mode="lines", line=dict(color="lightgrey", width=1), name="Lower BB", opacity=0.5
     ))
 
@@ -143,5 +160,95 @@ def show(mobility_df, df):
         template="plotly_dark",
         title=f"{target_var} – {interval}-Chart"
     )
-    st.plotly_chart(fig, use_container_width=True)
+    profiled_chart(st.plotly_chart, fig, use_container_width=True)
+    caption(len(candles), len(resampled), "zusammengefasste Kerzen")
 
+    # -------- Auffällige Stunden ----------
+    st.subheader("🚨 Auffällige Stunden")
+    st.write(f"""
+        Statt Kerzen ausserhalb der Bänder von Auge zu suchen, wird jede Stunde mit der üblichen
+        Stunde der Woche verglichen (laufend nachgeführtes Mittel und Streuung der letzten Wochen).  
+        Markiert werden Stunden mit |z| ≥ {THRESHOLD:g}, z.B. Feste, Feiertage oder Ausfälle einer Zählstelle.
+        """)
+    flags = get_anomalies(rollups).flagged()
+    series = CITY if station is None else station
+    flags = flags[(flags["Merkmal"] == target_var) & (flags["Zählstelle"] == series)]
+    if lo is not None:
+        flags = flags[(flags["DATUM"] >= lo) & (flags["DATUM"] <= hi)]
+
+    if flags.empty:
+        st.info("Keine auffälligen Stunden im gewählten Zeitraum.")
+    else:
+        fig4 = go.Figure()
+        fig4.add_trace(line_trace(hourly.index, hourly[hourly.columns[0]], name=target_var,
+                                  line=dict(color="royalblue", width=1)))
+        fig4.add_trace(go.Scattergl(x=flags["DATUM"], y=flags["Wert"], mode="markers", name="auffällig",
+                                    marker=dict(color="red", size=7)))
+        if lo is not None:
+            fig4.update_xaxes(range=[lo, hi])
+        fig4.update_layout(height=350, template="plotly_white", margin=dict(t=30, b=20),
+                           title=f"{target_var}: {len(flags)} auffällige Stunden")
+        profiled_chart(st.plotly_chart, fig4, use_container_width=True)
+        profiled_chart(st.dataframe, flags.drop(columns=["Merkmal", "Zählstelle"]).sort_values("z", key=abs, ascending=False)
+                     .head(50).style.format({"Wert": "{:.0f}", "Erwartet": "{:.1f}", "z": "{:.1f}"}),
+                     hide_index=True)
+
+    # -------- Prognose ----------
+    st.subheader("🔮 Stündliche Prognose")
+    st.write("""
+        Die Reihe wird in Trend, Wochenprofil (168 Stunden: Tages- und Wochenrhythmus) und Rest zerlegt.  
+        Der Rest wird mit Wettermerkmalen (Temperatur, Luftfeuchtigkeit, Wind, Bewölkung) erklärt.  
+        Gerechnet wird auf logarithmierten Zählwerten, Wochenprofil und Wetter wirken also als Faktoren.  
+        Prognose = Niveau der letzten Woche × Wochenprofil × Wettereffekt; für zukünftige Stunden ohne
+        Wetterdaten wird das Tagesprofil des Wetters der letzten zwei Wochen verwendet.  
+        Ist im Rückblick-Test die Vorwoche (gleiche Stunde eine Woche zuvor) genauer, wird sie als Prognose verwendet.
+        """)
+    horizon = st.slider("Prognosehorizont (Stunden)", 24, 168, 48, step=24)
+    version = dataset_version()
+    weather_hourly = rollups.weather["H"]
+
+    column = hourly.columns[0]
+
+    # Rückblickender Test: Fit ohne die letzten `horizon` Stunden (mit gemessenem Wetter),
+    # verglichen mit der Vorwoche als Prognose
+    scores, _ = cached_fit("forecast_backtest", version, [column], {"target": target_var, "horizon": horizon},
+                           lambda: backtest(hourly, weather_hourly, horizon))
+    forecast, lower, upper, info = forecast_all(version, target_var, hourly, weather_hourly, horizon,
+                                                naive_columns=naive_wins(scores))
+    history = hourly[column].iloc[-14 * 24:]
+
+    fig3 = go.Figure()
+    fig3.add_trace(go.Scatter(x=history.index, y=history, mode="lines", name="Gemessen",
+                              line=dict(color="royalblue")))
+    fig3.add_trace(go.Scatter(x=upper.index, y=upper[column], mode="lines", line=dict(width=0),
+                              showlegend=False, hoverinfo="skip"))
+    fig3.add_trace(go.Scatter(x=lower.index, y=lower[column], mode="lines", line=dict(width=0),
+                              fill="tonexty", fillcolor="rgba(255,165,0,0.25)", name="95%-Band"))
+    fig3.add_trace(go.Scatter(x=forecast.index, y=forecast[column], mode="lines", name="Prognose",
+                              line=dict(color="orange")))
+    fig3.update_layout(height=400, template="plotly_white", margin=dict(t=30, b=20),
+                       title=f"{target_var}: letzte 14 Tage und Prognose für {horizon} Stunden")
+    profiled_chart(st.plotly_chart, fig3, use_container_width=True)
+
+    st.write(f"**MAE im Rückblick-Test (letzte {horizon} h):** Modell {scores.loc[column, 'modell']:.2f}, "
+             f"Vorwoche {scores.loc[column, 'vorwoche']:.2f}")
+    status = "aus dem Modell-Cache" if not info["fitted"] else f"gefittet in {info['seconds']:.2f} s"
+    used = "Vorwoche (genauer im Rückblick-Test)" if info["naive"] else "Modell"
+    st.caption(f"Modell {status}. Angezeigte Prognose: {used}.")
+
+    if st.checkbox("Prognose für alle Zählstellen berechnen"):
+        all_hourly = rollups.hourly(target_var, stations=True)
+        all_scores, _ = cached_fit("forecast_backtest", version, list(all_hourly.columns),
+                                   {"target": target_var, "horizon": horizon},
+                                   lambda: backtest(all_hourly, weather_hourly, horizon))
+        forecast, _, _, info = forecast_all(version, target_var, all_hourly, weather_hourly, horizon,
+                                            naive_columns=naive_wins(all_scores))
+        table = pd.DataFrame({
+            f"Summe nächste {horizon} h": forecast.sum(),
+            "Spitze": forecast.max(),
+            "Spitzenstunde": forecast.idxmax(),
+        }).sort_values(f"Summe nächste {horizon} h", ascending=False)
+        profiled_chart(st.dataframe, table.style.format({f"Summe nächste {horizon} h": "{:.0f}", "Spitze": "{:.1f}"}))
+        st.caption(f"{len(all_hourly.columns)} Zählstellen: {info['fitted']} gefittet "
+                   f"({info['seconds']:.2f} s), {info['cached']} aus dem Modell-Cache; "
+                   f"{info['naive']} mit der Vorwoche prognostiziert (im Rückblick-Test genauer).")
@@ -0,0 +1,80 @@
+# spatial.py
+# Räumlicher Index über die Zählstellen (LV95-Koordinaten aus der geometry-Spalte).
+# Die POINT-Strings werden einmal geparst und in einem KD-Baum abgelegt; Umkreis- und
+# Rechteckabfragen liefern fk_zaehler-Schlüssel, die sich mit stations.StationIndex
+# direkt zu Stundensummen aggregieren lassen.
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from memo import memo_by_identity
+
+POINT_PATTERN = r"POINT\s*\(\s*([-+0-9.eE]+)\s+([-+0-9.eE]+)\s*\)"
+
+
+def parse_points(geometry):
+    # "POINT (2681857 1251990.9)" → [[2681857.0, 1251990.9]]; ungültige Einträge → NaN
+    xy = geometry.astype(str).str.extract(POINT_PATTERN)
+    return xy.astype("float64").to_numpy()
+
+
+class SpatialIndex:
+    def __init__(self, keys, points, meta):
+        self.keys = np.asarray(keys, dtype=object)
+        self.points = points
+        self.meta = meta
+        self.tree = cKDTree(points)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def within_radius(self, x, y, r):
+        # Alle Zählstellen im Umkreis von r Metern um (x, y); negativer Radius → leer
+        if r < 0:
+            return []
+        hits = self.tree.query_ball_point([x, y], r)
+        return list(self.keys[sorted(hits)])
+
+    def within_bbox(self, xmin, ymin, xmax, ymax):
+        # Kandidaten über den umschliessenden Kreis, danach exakt auf das Rechteck filtern
+        center = [(xmin + xmax) / 2, (ymin + ymax) / 2]
+        radius = np.hypot(xmax - xmin, ymax - ymin) / 2
+        hits = np.asarray(sorted(self.tree.query_ball_point(center, radius)), dtype=int)
+        if not len(hits):
+            return []
+        px, py = self.points[hits, 0], self.points[hits, 1]
+        inside = (px >= xmin) & (px <= xmax) & (py >= ymin) & (py <= ymax)
+        return list(self.keys[hits[inside]])
+
+    def nearest(self, x, y, k=1):
+        k = min(k, len(self.keys))
+        dist, idx = self.tree.query([x, y], k=k)
+        dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+        return pd.DataFrame({"fk_zaehler": self.keys[idx], "distanz_m": dist})
+
+
+def build_spatial_index(standorte_df):
+    # Pro Zähler gilt der Standort des jüngsten Gültigkeitsfensters
+    stations = standorte_df.copy()
+    stations["fk_zaehler"] = stations["fk_zaehler"].astype(str)
+    if "von" in stations.columns:
+        stations = stations.sort_values("von")
+    stations = stations.drop_duplicates("fk_zaehler", keep="last")
+
+    points = parse_points(stations["geometry"])
+    valid = ~np.isnan(points).any(axis=1)
+    stations = stations.loc[valid]
+    meta_cols = [c for c in ("abkuerzung", "bezeichnung", "korrekturfaktor") if c in stations.columns]
+    meta = stations.set_index("fk_zaehler")[meta_cols]
+    return SpatialIndex(stations["fk_zaehler"].to_numpy(), points[valid], meta)
+
+
+def aggregate_area(station_index, keys, corrected=True):
+    # Stundensummen aller gefundenen Zählstellen, die auch Messdaten haben
+    keys = [k for k in keys if k in station_index.offsets]
+    return station_index.hourly(keys, corrected=corrected)
+
+
+@memo_by_identity
+def get_spatial_index(standorte_df):
+    return build_spatial_index(standorte_df)
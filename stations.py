@@ -0,0 +1,129 @@
+# stations.py
+# Stationsdimension für Auswertungen pro Zählstelle.
+# mobility_df wird einmal nach (Zählstelle, DATUM) sortiert und als zusammenhängende
+# Arrays abgelegt; jede Zählstelle ist damit ein Bereich [start, stop) und das
+# Filtern auf eine oder wenige Stationen ein Slice statt einer Maske über alle Zeilen.
+# Der korrekturfaktor aus zurich_standorte.csv wird je Gültigkeitsfenster (von/bis)
+# angewendet; Zeilen ausserhalb aller Fenster einer bekannten Station entfallen.
+import numpy as np
+import pandas as pd
+
+from memo import memo_by_identity
+
+COUNT_COLS = ["VELO_IN", "VELO_OUT", "FUSS_IN", "FUSS_OUT"]
+STATION_KEY = "FK_ZAEHLER"
+
+
+class StationIndex:
+    def __init__(self, stations, offsets, datum, counts, raw_counts):
+        # stations: Metadaten je fk_zaehler (Index), offsets: fk_zaehler → (start, stop)
+        self.stations = stations
+        self.offsets = offsets
+        self.datum = datum
+        self.counts = counts
+        self.raw_counts = raw_counts
+        self._by_abbreviation = (
+            stations.reset_index().groupby("abkuerzung", observed=True)["fk_zaehler"].apply(list).to_dict()
+            if "abkuerzung" in stations.columns else {}
+        )
+
+    def ids(self, keys):
+        # Akzeptiert fk_zaehler oder abkuerzung (eine Abkürzung kann mehrere Zähler haben)
+        if isinstance(keys, str):
+            keys = [keys]
+        result = []
+        for key in keys:
+            if key in self.offsets:
+                result.append(key)
+            elif key in self._by_abbreviation:
+                result.extend(k for k in self._by_abbreviation[key] if k in self.offsets)
+            else:
+                raise KeyError(f"Unbekannte Zählstelle: {key}")
+        return list(dict.fromkeys(result))
+
+    def slice(self, station, corrected=True):
+        start, stop = self.offsets[station]
+        values = self.counts if corrected else self.raw_counts
+        return pd.DataFrame(
+            values[start:stop], columns=COUNT_COLS,
+            index=pd.Index(self.datum[start:stop], name="DATUM"), copy=False
+        )
+
+    def hourly(self, keys, corrected=True):
+        # Stundensummen über die gewählten Zählstellen
+        parts = [self.slice(station, corrected) for station in self.ids(keys)]
+        if not parts:
+            return pd.DataFrame(columns=COUNT_COLS)
+        return pd.concat(parts).groupby(level=0).sum(min_count=1)
+
+
+def _station_meta(standorte_df):
+    if standorte_df.empty or "fk_zaehler" not in standorte_df.columns:
+        return pd.DataFrame(), {}
+
+    windows = standorte_df.copy()
+    windows["fk_zaehler"] = windows["fk_zaehler"].astype(str)
+    windows["von"] = pd.to_datetime(windows["von"])
+    # bis gilt inklusive des letzten Tages; fehlendes bis = noch in Betrieb
+    windows["bis_excl"] = pd.to_datetime(windows["bis"]) + pd.Timedelta(days=1)
+
+    meta = (
+        windows.sort_values("von")
+        .groupby("fk_zaehler")
+        .agg(abkuerzung=("abkuerzung", "last"), bezeichnung=("bezeichnung", "last"),
+             korrekturfaktor=("korrekturfaktor", "last"), von=("von", "min"), bis=("bis", "max"))
+    )
+    per_station = {
+        key: list(zip(g["von"], g["bis_excl"], g["korrekturfaktor"].astype("float64")))
+        for key, g in windows.groupby("fk_zaehler")
+    }
+    return meta, per_station
+
+
+def build_station_index(mobility_df, standorte_df):
+    keys = mobility_df[STATION_KEY].astype(str).astype("category")
+    codes = keys.cat.codes.to_numpy()
+    datum = mobility_df["DATUM"].to_numpy()
+
+    # Einmalig nach (Station, DATUM) sortieren
+    order = np.lexsort((datum, codes))
+    codes = codes[order]
+    datum = datum[order]
+    raw = np.column_stack([
+        mobility_df[c].to_numpy(dtype=np.float32, na_value=np.nan)[order] for c in COUNT_COLS
+    ])
+
+    bounds = np.searchsorted(codes, np.arange(len(keys.cat.categories) + 1))
+    offsets = {
+        station: (int(bounds[i]), int(bounds[i + 1]))
+        for i, station in enumerate(keys.cat.categories)
+    }
+
+    meta, windows = _station_meta(standorte_df)
+    factor = np.ones(len(datum), dtype=np.float32)
+    keep = np.ones(len(datum), dtype=bool)
+    for station, (start, stop) in offsets.items():
+        if station not in windows:
+            continue
+        # Pro Fenster zwei binäre Suchen im (sortierten) Stations-Slice
+        keep[start:stop] = False
+        station_datum = datum[start:stop]
+        for von, bis_excl, k in windows[station]:
+            lo = start + np.searchsorted(station_datum, np.datetime64(von), side="left")
+            hi = stop if pd.isna(bis_excl) else start + np.searchsorted(station_datum, np.datetime64(bis_excl), side="left")
+            keep[lo:hi] = True
+            factor[lo:hi] = k
+
+    counts = raw * factor[:, None]
+    counts[~keep] = np.nan
+
+    stations = meta.reindex(list(offsets)) if not meta.empty else pd.DataFrame(index=list(offsets))
+    stations.index.name = "fk_zaehler"
+    stations["rows"] = [stop - start for start, stop in offsets.values()]
+    stations["rows_valid"] = [int(keep[start:stop].sum()) for start, stop in offsets.values()]
+    return StationIndex(stations, offsets, datum, counts, raw)
+
+
+@memo_by_identity
+def get_station_index(mobility_df, standorte_df):
+    return build_station_index(mobility_df, standorte_df)
@@ -0,0 +1,205 @@
+# summaries.py
+# Kennzahlen je Spalte (describe, Fehlende, Histogramm), einmal pro Datenstand berechnet.
+# Alle Zusammenfassungen sind mergebar: Teilzusammenfassungen aus Chunks (Streaming-Ingest)
+# oder aus angehängten Zeilen (inkrementelles Nachladen) ergeben zusammengeführt dasselbe
+# wie eine Berechnung über alle Zeilen.
+# - Lage/Streuung: Anzahl, Mittel, M2 (Chan et al.), Min, Max
+# - Histogramm: exakte Häufigkeiten je Wert, solange es höchstens MAX_DISTINCT Werte gibt;
+#   sonst HIST_BINS gleich breite Klassen (Quantile dann interpoliert)
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from schema import MOBILITY_SCHEMA, WETTER_SCHEMA, schema_key
+
+SUMMARY_DIR = os.path.join("data", "cache", "summaries")
+# Erhöhen, wenn sich Aufbau oder Bedeutung von ColumnSummary/FrameSummary ändern
+FORMAT_VERSION = 1
+MAX_DISTINCT = 20_000
+HIST_BINS = 200
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class ColumnSummary:
+    def __init__(self, count=0, nulls=0, mean=0.0, m2=0.0, min=np.nan, max=np.nan, values=None, bins=None):
+        self.count = count
+        self.nulls = nulls
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+        self.values = values if values is not None or bins is not None else pd.Series(dtype="int64")
+        self.bins = bins  # (Kanten, Häufigkeiten) sobald in Klassen zusammengefasst
+
+    @classmethod
+    def from_values(cls, series):
+        x = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = x[~np.isnan(x)]
+        if not len(valid):
+            return cls(nulls=len(x))
+        mean = valid.mean()
+        values = pd.Series(valid).value_counts().sort_index()
+        summary = cls(len(valid), len(x) - len(valid), mean, ((valid - mean) ** 2).sum(),
+                      valid.min(), valid.max(), values=values)
+        return summary._compact()
+
+    def _compact(self):
+        if self.values is not None and len(self.values) > MAX_DISTINCT:
+            self.bins = _to_bins(self.values.index.to_numpy(), self.values.to_numpy(), self.min, self.max)
+            self.values = None
+        return self
+
+    def merge(self, other):
+        if not other.count:
+            return ColumnSummary(self.count, self.nulls + other.nulls, self.mean, self.m2, self.min, self.max,
+                                 self.values, self.bins)
+        if not self.count:
+            return ColumnSummary(other.count, self.nulls + other.nulls, other.mean, other.m2, other.min, other.max,
+                                 other.values, other.bins)
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        lo, hi = min(self.min, other.min), max(self.max, other.max)
+        merged = ColumnSummary(
+            n, self.nulls + other.nulls,
+            self.mean + delta * other.count / n,
+            self.m2 + other.m2 + delta ** 2 * self.count * other.count / n,
+            lo, hi,
+        )
+        if self.values is not None and other.values is not None:
+            merged.values = self.values.add(other.values, fill_value=0).astype("int64").sort_index()
+            merged.bins = None
+            return merged._compact()
+        # Mindestens eine Seite in Klassen: beide auf die gemeinsame Spannweite umlegen
+        centers, weights = zip(*(s._points() for s in (self, other)))
+        merged.bins = _to_bins(np.concatenate(centers), np.concatenate(weights), lo, hi)
+        merged.values = None
+        return merged
+
+    def _points(self):
+        if self.values is not None:
+            return self.values.index.to_numpy(dtype=np.float64), self.values.to_numpy()
+        edges, counts = self.bins
+        return (edges[:-1] + edges[1:]) / 2, counts
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def quantile(self, q):
+        # Exakt wie pandas (lineare Interpolation) bei Werthäufigkeiten, sonst innerhalb der Klasse
+        if not self.count:
+            return np.nan
+        if self.values is not None:
+            cum = np.cumsum(self.values.to_numpy())
+            pos = q * (self.count - 1)
+            lower = self.values.index[np.searchsorted(cum, np.floor(pos) + 1)]
+            upper = self.values.index[np.searchsorted(cum, np.ceil(pos) + 1)]
+            return lower + (upper - lower) * (pos - np.floor(pos))
+        edges, counts = self.bins
+        cum = np.concatenate([[0], np.cumsum(counts)])
+        return float(np.interp(q * self.count, cum, edges))
+
+    def describe(self):
+        row = {"count": float(self.count), "mean": self.mean if self.count else np.nan, "std": self.std,
+               "min": self.min}
+        for q in QUANTILES:
+            row[f"{q:.0%}"] = self.quantile(q)
+        row["max"] = self.max
+        return pd.Series(row, dtype="float64")
+
+    def histogram(self):
+        # Wie series.value_counts().sort_index(); bei Klassen: Klassenmitte → Häufigkeit
+        if self.values is not None:
+            return self.values
+        centers, counts = self._points()
+        return pd.Series(counts, index=pd.Index(centers, name="Klassenmitte"))
+
+
+def _to_bins(points, weights, lo, hi):
+    edges = np.linspace(lo, hi, HIST_BINS + 1) if hi > lo else np.array([lo, lo + 1.0])
+    counts, _ = np.histogram(points, bins=edges, weights=weights)
+    return edges, counts.astype(np.int64)
+
+
+class FrameSummary:
+    def __init__(self, rows=0, rows_any=0, columns=None):
+        self.rows = rows
+        self.rows_any = rows_any  # Zeilen mit mindestens einem Wert in den zusammengefassten Spalten
+        self.columns = columns or {}
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        columns = list(columns if columns is not None else df.select_dtypes(include="number").columns)
+        if not columns or df.empty:
+            return cls(len(df), 0, {c: ColumnSummary(nulls=len(df)) for c in columns})
+        rows_any = int(df[columns].notna().any(axis=1).sum())
+        return cls(len(df), rows_any, {c: ColumnSummary.from_values(df[c]) for c in columns})
+
+    def merge(self, other):
+        names = list(self.columns) + [c for c in other.columns if c not in self.columns]
+        columns = {}
+        for name in names:
+            left = self.columns.get(name) or ColumnSummary(nulls=self.rows)
+            right = other.columns.get(name) or ColumnSummary(nulls=other.rows)
+            columns[name] = left.merge(right)
+        return FrameSummary(self.rows + other.rows, self.rows_any + other.rows_any, columns)
+
+    def describe(self, columns=None):
+        columns = list(columns or self.columns)
+        return pd.DataFrame({c: self.columns[c].describe() for c in columns})
+
+    def nulls(self, columns=None):
+        columns = list(columns or self.columns)
+        return pd.Series({c: self.columns[c].nulls for c in columns}, dtype="int64")
+
+    def histogram(self, column):
+        return self.columns[column].histogram()
+
+
+def merge_all(summaries):
+    result = FrameSummary()
+    for summary in summaries:
+        if summary is not None:
+            result = result.merge(summary)
+    return result
+
+
+# Während des Streaming-Ingests aufgebaute Zusammenfassungen (wie schema.record_memory)
+_recorded = {}
+
+
+def record_summary(name, summary):
+    _recorded[name] = summary
+
+
+def recorded_summary(name):
+    return _recorded.get(name)
+
+
+def _path(version, cache_dir):
+    # Wie die Feather-Caches: Schema und Klassenformat gehören zum Schlüssel, sonst würde eine
+    # alte Datei nach einer Code-Änderung bei gleichem Datenstand weiterverwendet
+    key = (f"mobility-{schema_key(MOBILITY_SCHEMA)}-wetter-{schema_key(WETTER_SCHEMA)}"
+           f"-v{FORMAT_VERSION}-{MAX_DISTINCT}-{HIST_BINS}")
+    return os.path.join(cache_dir, f"{version}.{key}.pkl")
+
+
+def save_summaries(version, summaries, cache_dir=SUMMARY_DIR):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = _path(version, cache_dir) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(summaries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _path(version, cache_dir))
+    except OSError as e:
+        print("⚠️ Kennzahlen konnten nicht gespeichert werden:", e)
+
+
+def load_summaries(version, cache_dir=SUMMARY_DIR):
+    try:
+        with open(_path(version, cache_dir), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
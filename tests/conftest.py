@@ -0,0 +1,7 @@
+# Module liegen flach im Projektverzeichnis → für `pytest` ohne Installation importierbar machen
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
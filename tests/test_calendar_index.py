@@ -0,0 +1,25 @@
+# Regeln für das Sechseläuten (dritter Montag im April, verschoben wegen Ostern)
+import datetime as dt
+
+import pytest
+
+from calendar_index import _sechselaeuten, calendar_days
+
+
+@pytest.mark.parametrize("year, expected", [
+    (2011, dt.date(2011, 4, 11)),  # dritter Montag in der Karwoche → eine Woche früher
+    (2019, dt.date(2019, 4, 8)),   # dito
+    (2023, dt.date(2023, 4, 17)),  # regulär
+    (2025, dt.date(2025, 4, 28)),  # dritter Montag = Ostermontag → eine Woche später
+])
+def test_sechselaeuten(year, expected):
+    assert _sechselaeuten(year) == expected
+
+
+def test_sechselaeuten_in_calendar():
+    days = calendar_days([2019])
+    row = days.loc["2019-04-08"]
+    assert row["feiertag"] == 1 and row["event"] == 1
+    assert row["ab_stunde"] == 12
+    assert "Sechseläuten" in row["anlass"]
+    assert "Sechseläuten" not in days.loc["2019-04-15", "anlass"]
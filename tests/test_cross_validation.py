@@ -0,0 +1,39 @@
+# Gram-basierte Kreuzvalidierung gegen sklearn (KFold/TimeSeriesSplit + LinearRegression)
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold, TimeSeriesSplit
+
+from cross_validation import cross_validate
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(1)
+    n = 600
+    X = rng.normal(size=(n, 3)) * [2.0, 10.0, 0.5] + [20.0, 0.0, 5.0]
+    y = 3.0 + X @ [0.8, -0.1, 6.0] + rng.normal(0, 1.0, n)
+    return X, y
+
+
+@pytest.mark.parametrize("scheme, splitter", [
+    ("kfold", KFold(n_splits=5, shuffle=True, random_state=42)),
+    ("timeseries", TimeSeriesSplit(n_splits=5)),
+])
+def test_folds_match_sklearn(data, scheme, splitter):
+    X, y = data
+    table, summary, predictions = cross_validate(X, y, scheme, n_splits=5, random_state=42, n_jobs=1)
+
+    expected = np.full(len(y), np.nan)
+    for i, (train, test) in enumerate(splitter.split(X), start=1):
+        model = LinearRegression().fit(X[train], y[train])
+        pred = model.predict(X[test])
+        expected[test] = pred
+        assert table.loc[i, "n_train"] == len(train)
+        assert table.loc[i, "n_test"] == len(test)
+        np.testing.assert_allclose(table.loc[i, "r2"], r2_score(y[test], pred), rtol=1e-9)
+        np.testing.assert_allclose(table.loc[i, "rmse"], np.sqrt(mean_squared_error(y[test], pred)), rtol=1e-9)
+
+    np.testing.assert_allclose(predictions, expected, rtol=1e-9)
+    np.testing.assert_allclose(summary["r2_mean"], table["r2"].mean())
@@ -0,0 +1,67 @@
+# Exhaustive Suche aus Gram-Matrizen gegen eine direkte Berechnung je Teilmenge
+from itertools import combinations
+
+import numpy as np
+import pytest
+from sklearn.model_selection import KFold
+
+from feature_selection import search
+
+NAMES = ["a", "b", "c", "d"]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(2)
+    n = 400
+    X = rng.normal(size=(n, len(NAMES))) * [1.0, 3.0, 1.0, 0.2] + [5.0, 0.0, -2.0, 1.0]
+    # Nur a und c wirken, b ist schwach, d Rauschen
+    y = 1.0 + 2.0 * X[:, 0] - 1.5 * X[:, 2] + 0.05 * X[:, 1] + rng.normal(0, 1.0, n)
+    return X, y
+
+
+def _ols(X, y):
+    A = np.column_stack([np.ones(len(X)), X])
+    beta, *_ = np.linalg.lstsq(A, y, rcond=None)
+    return beta
+
+
+def _predict(beta, X):
+    return beta[0] + X @ beta[1:]
+
+
+def _brute_force(X, y, n_splits=5):
+    n = len(y)
+    folds = list(KFold(n_splits=n_splits, shuffle=True, random_state=42).split(X))
+    rows = {}
+    for size in range(1, len(NAMES) + 1):
+        for subset in combinations(range(len(NAMES)), size):
+            cols = list(subset)
+            resid = y - _predict(_ols(X[:, cols], y), X[:, cols])
+            sse = resid @ resid
+            k = size + 1
+            rmse = [np.sqrt(np.mean((y[test] - _predict(_ols(X[train][:, cols], y[train]), X[test][:, cols])) ** 2))
+                    for train, test in folds]
+            rows[tuple(NAMES[j] for j in subset)] = {
+                "R²": 1 - sse / ((y - y.mean()) ** 2).sum(),
+                "AIC": n * np.log(sse / n) + 2 * k,
+                "BIC": n * np.log(sse / n) + k * np.log(n),
+                "CV-RMSE": np.mean(rmse),
+            }
+    return rows
+
+
+@pytest.mark.parametrize("criterion", ["BIC", "AIC", "CV-RMSE"])
+def test_best_subset_matches_brute_force(data, criterion):
+    X, y = data
+    board = search(X, y, NAMES, "best_subset", criterion, "kfold", n_splits=5, random_state=42, n_jobs=1)
+    expected = _brute_force(X, y)
+
+    assert len(board) == 2 ** len(NAMES) - 1
+    scores = board.set_index("subset")
+    for subset, reference in expected.items():
+        for column, value in reference.items():
+            np.testing.assert_allclose(scores.loc[[subset], column].iloc[0], value, rtol=1e-8)
+
+    best = min(expected, key=lambda s: expected[s][criterion])
+    assert board.iloc[0]["subset"] == best
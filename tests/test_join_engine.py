@@ -0,0 +1,45 @@
+# Zuordnung Wetter → Stunde mit und ohne Toleranz
+import pandas as pd
+
+from join_engine import align_mobility_wetter, wetter_hours
+
+
+def _frames(stamps):
+    hours = pd.date_range("2023-01-01", periods=4, freq="h")
+    mobility = pd.DataFrame({"DATUM": hours, "VELO_IN": [1.0, 2.0, 3.0, 4.0]})
+    t = pd.to_datetime(stamps)
+    wetter = pd.DataFrame({"dt": t.asi8 // 10**9, "dt_iso": t.floor("h"), "temp": range(len(t))})
+    return mobility, wetter
+
+
+def test_without_tolerance_matches_inner_merge():
+    mobility, wetter = _frames(["2023-01-01 00:00", "2023-01-01 02:00", "2023-01-01 05:00"])
+    out = align_mobility_wetter(mobility, wetter)
+    expected = pd.merge(mobility, wetter, left_on="DATUM", right_on="dt_iso", how="inner")
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_tolerance_attaches_each_weather_row_to_one_hour():
+    # 00:58 gehört zu 01:00 (nicht auch zu 00:00), 02:29 und 02:31 konkurrieren nicht
+    mobility, wetter = _frames(["2023-01-01 00:58", "2023-01-01 02:29", "2023-01-01 02:31"])
+    out = align_mobility_wetter(mobility, wetter, tolerance="30min")
+
+    assert out["DATUM"].tolist() == list(pd.to_datetime(["2023-01-01 01:00", "2023-01-01 02:00",
+                                                         "2023-01-01 03:00"]))
+    assert (out["dt_iso"] == out["DATUM"]).all()
+    assert out["temp"].tolist() == [0, 1, 2]
+
+
+def test_tolerance_keeps_nearest_row_per_hour():
+    mobility, wetter = _frames(["2023-01-01 00:50", "2023-01-01 01:05", "2023-01-01 01:20"])
+    out = align_mobility_wetter(mobility, wetter, tolerance="30min")
+
+    assert out["DATUM"].tolist() == [pd.Timestamp("2023-01-01 01:00")]
+    assert out["temp"].tolist() == [1]
+
+
+def test_wetter_hours_outside_tolerance_is_nat():
+    _, wetter = _frames(["2023-01-01 00:20", "2023-01-01 00:05"])
+    hours = wetter_hours(wetter, "10min")
+    assert hours.isna().tolist() == [True, False]
+    assert wetter_hours(wetter).tolist() == wetter["dt_iso"].tolist()
@@ -0,0 +1,55 @@
+# SufficientStats (NaN-Muster-Gram) gegen df[auswahl].dropna() + Kleinste Quadrate
+import numpy as np
+import pandas as pd
+import pytest
+
+from mlr_engine import build_sufficient_stats, CONST
+
+COLUMNS = ["a", "b", "c", "d", "y"]
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    X = rng.normal(size=(n, 4)) * [1.0, 5.0, 0.1, 50.0] + [10.0, -3.0, 0.0, 1000.0]
+    y = 2.0 + X @ [1.5, -0.2, 4.0, 0.01] + rng.normal(0, 0.5, n)
+    df = pd.DataFrame(np.column_stack([X, y]), columns=COLUMNS)
+    # Unterschiedliche NaN-Muster je Spalte, auch in der Zielgrösse
+    for column, share in zip(COLUMNS, [0.05, 0.1, 0.02, 0.2, 0.03]):
+        df.loc[rng.random(n) < share, column] = np.nan
+    return df
+
+
+def _lstsq(df, target, features):
+    rows = df[features + [target]].dropna()
+    A = np.column_stack([np.ones(len(rows)), rows[features].to_numpy()])
+    beta, *_ = np.linalg.lstsq(A, rows[target].to_numpy(), rcond=None)
+    resid = rows[target].to_numpy() - A @ beta
+    sst = ((rows[target] - rows[target].mean()) ** 2).sum()
+    return len(rows), beta, 1 - resid @ resid / sst
+
+
+@pytest.mark.parametrize("features", [["a"], ["a", "b"], ["b", "d"], ["a", "b", "c", "d"]])
+def test_solve_matches_dropna_lstsq(frame, features):
+    # Kleine Chunks, damit Muster über mehrere update()-Aufrufe zusammengeführt werden
+    suff = build_sufficient_stats(frame.to_numpy(), COLUMNS, chunk=300)
+    result = suff.solve("y", features)
+    n, beta, r2 = _lstsq(frame, "y", features)
+
+    assert result["n"] == n
+    np.testing.assert_allclose(result["intercept"], beta[0], rtol=1e-8)
+    np.testing.assert_allclose(result["coef"], beta[1:], rtol=1e-8)
+    np.testing.assert_allclose(result["r2"], r2, rtol=1e-10)
+
+
+def test_gram_counts_complete_rows(frame):
+    suff = build_sufficient_stats(frame.to_numpy(), COLUMNS, chunk=500)
+    for names in (["a"], ["b", "d"], COLUMNS):
+        n, G = suff.gram([CONST] + names)
+        rows = frame[names].dropna()
+        assert n == len(rows)
+        # Diagonale der Konstanten = Zeilenzahl, erste Zeile = Summen der verschobenen Spalten
+        assert G[0, 0] == len(rows)
+        shift = suff.shift[[COLUMNS.index(c) for c in names]]
+        np.testing.assert_allclose(G[0, 1:], (rows.to_numpy() - shift).sum(axis=0), rtol=1e-9, atol=1e-6)
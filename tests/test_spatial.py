@@ -0,0 +1,92 @@
+# Umkreis-/Rechteckabfragen und Flächenaggregation gegen direkt gerechnete Erwartungen
+import numpy as np
+import pandas as pd
+import pytest
+
+from spatial import build_spatial_index, aggregate_area
+from stations import build_station_index, COUNT_COLS
+
+# Zähler auf einem Gitter (LV95), Abstand 100 m; "C" hat zwei Gültigkeitsfenster, "E" keine Koordinaten
+STANDORTE = pd.DataFrame({
+    "fk_zaehler": ["A", "B", "C", "C", "D", "E"],
+    "abkuerzung": ["VZS_A", "VZS_B", "VZS_C", "VZS_C", "VZS_D", "VZS_E"],
+    "bezeichnung": ["a", "b", "c alt", "c", "d", "e"],
+    "von": pd.to_datetime(["2023-01-01", "2023-01-01", "2020-01-01", "2023-01-01", "2023-01-01", "2023-01-01"]),
+    "bis": pd.NaT,
+    "korrekturfaktor": [1.0, 2.0, 1.0, 1.0, 1.0, 1.0],
+    "geometry": ["POINT (2681000 1250000)", "POINT (2681100 1250000)", "POINT (2690000 1260000)",
+                 "POINT (2681000 1250100)", "POINT (2681300 1250300)", ""],
+})
+
+
+@pytest.fixture
+def index():
+    return build_spatial_index(STANDORTE)
+
+
+@pytest.fixture
+def station_index():
+    # Messdaten nur für A, B und D
+    hours = pd.date_range("2023-03-01", periods=3, freq="h")
+    rows = [(key, t, v) for key, v in [("A", 1.0), ("B", 10.0), ("D", 100.0)] for t in hours]
+    mobility = pd.DataFrame(rows, columns=["FK_ZAEHLER", "DATUM", "VELO_IN"])
+    for column in COUNT_COLS[1:]:
+        mobility[column] = 0.0
+    return build_station_index(mobility, STANDORTE)
+
+
+def test_index_uses_latest_window_and_skips_invalid_points(index):
+    assert sorted(index.keys) == ["A", "B", "C", "D"]
+    assert index.points[list(index.keys).index("C")].tolist() == [2681000.0, 1250100.0]
+
+
+@pytest.mark.parametrize("r, expected", [
+    (0, ["A"]),
+    (100, ["A", "B", "C"]),
+    (99.9, ["A"]),
+    (500, ["A", "B", "C", "D"]),
+])
+def test_within_radius(index, r, expected):
+    assert sorted(index.within_radius(2681000, 1250000, r)) == expected
+
+
+def test_within_radius_empty_and_out_of_range(index):
+    assert index.within_radius(2600000, 1200000, 1000) == []
+    assert index.within_radius(2681000, 1250000, -1) == []
+
+
+def test_within_bbox(index):
+    assert sorted(index.within_bbox(2680950, 1249950, 2681150, 1250150)) == ["A", "B", "C"]
+    # Randpunkte gehören dazu
+    assert sorted(index.within_bbox(2681000, 1250000, 2681100, 1250000)) == ["A", "B"]
+
+    # Brute force über alle Punkte
+    xmin, ymin, xmax, ymax = 2681050, 1249000, 2682000, 1250350
+    px, py = index.points[:, 0], index.points[:, 1]
+    inside = (px >= xmin) & (px <= xmax) & (py >= ymin) & (py <= ymax)
+    assert sorted(index.within_bbox(xmin, ymin, xmax, ymax)) == sorted(index.keys[inside])
+
+
+def test_within_bbox_empty_and_out_of_range(index):
+    # Kandidaten im umschliessenden Kreis, aber keiner im Rechteck
+    assert index.within_bbox(2681010, 1250010, 2681090, 1250090) == []
+    assert index.within_bbox(2500000, 1100000, 2500100, 1100100) == []
+    # Vertauschte Grenzen ergeben ein leeres Rechteck
+    assert index.within_bbox(2681150, 1250150, 2680950, 1249950) == []
+
+
+def test_aggregate_area(index, station_index):
+    keys = index.within_radius(2681000, 1250000, 100)          # A, B, C (C ohne Messdaten)
+    hourly = aggregate_area(station_index, keys)
+
+    assert len(hourly) == 3
+    np.testing.assert_allclose(hourly["VELO_IN"], 1.0 + 2.0 * 10.0)
+    raw = aggregate_area(station_index, keys, corrected=False)
+    np.testing.assert_allclose(raw["VELO_IN"], 11.0)
+
+
+def test_aggregate_area_empty(index, station_index):
+    hourly = aggregate_area(station_index, index.within_radius(2600000, 1200000, 1000))
+    assert hourly.empty and list(hourly.columns) == COUNT_COLS
+    # Gefundene Zähler ohne Messdaten (C) werden ignoriert statt KeyError
+    assert aggregate_area(station_index, ["C"]).empty
@@ -0,0 +1,69 @@
+# Zusammengeführte ColumnSummary/FrameSummary gegen pandas describe() über alle Zeilen
+import numpy as np
+import pandas as pd
+import pytest
+
+import summaries
+from summaries import ColumnSummary, FrameSummary, merge_all
+
+STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def _chunks(series, sizes):
+    bounds = np.cumsum([0] + sizes)
+    return [series.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+@pytest.fixture
+def counts():
+    # Ganzzahlige Zählwerte mit Lücken → exakte Häufigkeiten (values)
+    rng = np.random.default_rng(3)
+    s = pd.Series(rng.poisson(40, 5_000).astype("float64"))
+    s[rng.random(len(s)) < 0.1] = np.nan
+    return s
+
+
+def test_merged_counts_match_describe(counts):
+    parts = [ColumnSummary.from_values(c) for c in _chunks(counts, [1, 999, 0, 2_500, 1_500])]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged = merged.merge(part)
+
+    pd.testing.assert_series_equal(merged.describe()[STATS], counts.describe()[STATS], check_names=False,
+                                   rtol=1e-10)
+    assert merged.nulls == counts.isna().sum()
+    pd.testing.assert_series_equal(merged.histogram(), counts.value_counts().sort_index(), check_names=False,
+                                   check_index_type=False)
+
+
+@pytest.mark.parametrize("q", [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+def test_quantiles_match_pandas(counts, q):
+    merged = merge_all([FrameSummary.from_frame(c.to_frame("x")) for c in _chunks(counts, [2_000, 3_000])])
+    assert merged.columns["x"].quantile(q) == pytest.approx(counts.quantile(q))
+
+
+def test_binned_merge_close_to_describe(monkeypatch):
+    # Stetige Werte über MAX_DISTINCT → Klassen; Lage/Streuung exakt, Quantile auf eine Klassenbreite
+    monkeypatch.setattr(summaries, "MAX_DISTINCT", 500)
+    rng = np.random.default_rng(4)
+    s = pd.Series(rng.normal(10, 3, 8_000))
+    parts = [ColumnSummary.from_values(c) for c in _chunks(s, [300, 4_000, 3_700])]
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    assert merged.values is None
+
+    expected = s.describe()
+    described = merged.describe()
+    for stat in ["count", "mean", "std", "min", "max"]:
+        assert described[stat] == pytest.approx(expected[stat], rel=1e-10)
+    width = (s.max() - s.min()) / summaries.HIST_BINS
+    for stat in ["25%", "50%", "75%"]:
+        assert abs(described[stat] - expected[stat]) <= width
+
+
+def test_frame_summary_rows_and_nulls():
+    df = pd.DataFrame({"a": [1.0, np.nan, 3.0, np.nan], "b": [np.nan, np.nan, 5.0, 6.0]})
+    merged = FrameSummary.from_frame(df.iloc[:2]).merge(FrameSummary.from_frame(df.iloc[2:]))
+    assert merged.rows == 4
+    assert merged.rows_any == int(df.notna().any(axis=1).sum())
+    pd.testing.assert_series_equal(merged.nulls(), df.isna().sum())
+    pd.testing.assert_frame_equal(merged.describe().loc[STATS], df.describe().loc[STATS])